@@ -0,0 +1,2 @@
+# -*- coding: utf-8 -*-
+"""Benchmarks for copra run against local test servers."""
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""Local WebSocket feed server for benchmarking copra.websocket.Client.
+
+The server mimics the Coinbase Pro feed closely enough for the client: it
+waits for a subscribe message and then streams a fixed number of synthetic
+full channel messages followed by a close.
+"""
+
+import json
+import random
+import time
+import uuid
+
+from autobahn.asyncio.websocket import WebSocketServerFactory
+from autobahn.asyncio.websocket import WebSocketServerProtocol
+from autobahn.websocket.compress import PerMessageDeflateOffer
+from autobahn.websocket.compress import PerMessageDeflateOfferAccept
+
+from copra.websocket import Channel, Client
+
+
+def full_channel_messages(count, product_ids=('BTC-USD', 'ETH-USD')):
+    """Return a list of count JSON-encoded, full channel style messages.
+
+    :param int count: The number of messages to generate.
+
+    :param product_ids: (optional) The products the messages are spread over.
+    :type product_ids: tuple of str
+
+    :returns: A list of UTF-8 encoded bytes objects.
+    """
+    rand = random.Random(42)
+    messages = []
+    for sequence in range(count):
+        msg = {
+            'type': rand.choice(('received', 'open', 'done', 'match')),
+            'time': '2019-01-07T18:00:{:02d}.{:06d}Z'.format(
+                sequence % 60, sequence % 1000000),
+            'product_id': product_ids[sequence % len(product_ids)],
+            'sequence': 7000000000 + sequence,
+            'order_id': str(uuid.UUID(int=rand.getrandbits(128))),
+            'size': '{:.8f}'.format(rand.random() * 10),
+            'price': '{:.2f}'.format(4000 + rand.random() * 10),
+            'side': rand.choice(('buy', 'sell')),
+        }
+        messages.append(json.dumps(msg).encode('utf8'))
+    return messages
+
+
+class FeedServerProtocol(WebSocketServerProtocol):
+
+    def onMessage(self, payload, isBinary):
+        msg = json.loads(payload.decode('utf8'))
+        if msg['type'] == 'subscribe':
+            for message in self.factory.messages:
+                self.sendMessage(message)
+            self.sendClose()
+
+
+class FeedServer:
+    """A local feed server.
+
+    :ivar str url: The ws:// url clients should connect to.
+    """
+
+    def __init__(self, loop, messages, host='127.0.0.1', port=0,
+                 compress=False):
+        """
+
+        :param loop: The asyncio loop the server runs in.
+
+        :param list messages: The encoded messages sent to every subscriber.
+
+        :param str host: (optional) The interface to listen on.
+
+        :param int port: (optional) The port to listen on. The default of 0
+            picks a free port.
+
+        :param bool compress: (optional) Whether or not to accept
+            permessage-deflate offers from clients. The default is False.
+        """
+        self.loop = loop
+        self.host = host
+        self.port = port
+        self.factory = WebSocketServerFactory()
+        self.factory.protocol = FeedServerProtocol
+        self.factory.messages = messages
+        if compress:
+            self.factory.setProtocolOptions(
+                perMessageCompressionAccept=self._accept_compression)
+        self.server = None
+
+    @staticmethod
+    def _accept_compression(offers):
+        for offer in offers:
+            if isinstance(offer, PerMessageDeflateOffer):
+                return PerMessageDeflateOfferAccept(offer)
+
+    @property
+    def url(self):
+        return 'ws://{}:{}'.format(self.host, self.port)
+
+    async def start(self):
+        self.server = await self.loop.create_server(self.factory, self.host,
+                                                    self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+
+class CountingClient(Client):
+
+    def on_message(self, message):
+        self.received += 1
+
+
+async def consume(loop, messages, server_compress=False, **kwargs):
+    """Stream messages from a local FeedServer to a copra client.
+
+    :param loop: The asyncio loop.
+
+    :param list messages: The encoded messages the server sends.
+
+    :param bool server_compress: (optional) Whether or not the server accepts
+        permessage-deflate. The default is False.
+
+    :param kwargs: Keyword arguments passed to the copra.websocket.Client.
+
+    :returns: A 4-tuple: (messages received, wire-level bytes received, wall
+        time, CPU time). Wire-level bytes are only tracked by the autobahn
+        transport and are None otherwise.
+    """
+    server = FeedServer(loop, messages, compress=server_compress)
+    await server.start()
+
+    try:
+        client = CountingClient(loop, Channel('full', 'BTC-USD'), server.url,
+                                auto_connect=False, auto_reconnect=False,
+                                **kwargs)
+    except Exception:
+        await server.stop()
+        raise
+    client.received = 0
+
+    wall, cpu = time.perf_counter(), time.process_time()
+    client.add_as_task_to_loop()
+    await client.connected.wait()
+    await client.disconnected.wait()
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+
+    await server.stop()
+    stats = getattr(client.protocol, 'trafficStats', None)
+    wire = stats.incomingOctetsWireLevel if stats else None
+    return (client.received, wire, wall, cpu)
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Ticker poll latency with and without request hedging.
+
+Polls GET /products/BTC-USD/ticker against a local REST server that answers
+most requests after a short latency and a random few after a long one, first
+without hedging and then with enable_hedging. Each run uses a fresh server
+with the same seed, so both see the same slow requests. The client's public
+rate limiter is lifted for the local server so that it only bounds hedges by
+the hedge budget.
+
+Usage::
+
+    python -m benchmarks.hedged_requests [polls] [latency ms] [slow ms] \
+        [slow %]
+"""
+
+import asyncio
+import sys
+import time
+
+from benchmarks.rest_server import RestServer
+from copra.rest import Client
+from copra.rest.ratelimit import RateLimiter
+
+
+def percentile(ordered, pct):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def poll(loop, count, latency, slow_latency, slow_rate, hedge):
+    server = RestServer(loop, latency, slow_rate=slow_rate,
+                        slow_latency=slow_latency)
+    await server.start()
+    client = Client(loop, server.url)
+    client.public_limiter = RateLimiter(loop, 10000, 10000)
+    await client.warmup(4)
+    hedger = None
+    if hedge:
+        hedger = client.enable_hedging(percentile=95, budget=0.05)
+
+    times = []
+    for _ in range(count):
+        start = time.monotonic()
+        await client.ticker('BTC-USD')
+        times.append((time.monotonic() - start) * 1000)
+
+    await client.close()
+    await server.stop()
+    times.sort()
+    return times, hedger.stats['hedges'] if hedger else 0
+
+
+async def run(loop, count, latency, slow_latency, slow_rate):
+    print('{} polls, {:.0f} ms latency, {:.1f}% at {:.0f} ms'.format(
+        count, latency * 1000, slow_rate * 100, slow_latency * 1000))
+    print('{:<12}{:>10}{:>10}{:>10}{:>10}{:>10}'.format(
+        'hedging', 'p50 ms', 'p99 ms', 'p99.9 ms', 'max ms', 'hedges'))
+    for hedge in (False, True):
+        times, hedges = await poll(loop, count, latency, slow_latency,
+                                   slow_rate, hedge)
+        print('{:<12}{:>10.2f}{:>10.2f}{:>10.2f}{:>10.2f}{:>10}'.format(
+            'on' if hedge else 'off', percentile(times, 50),
+            percentile(times, 99), percentile(times, 99.9), times[-1],
+            hedges))
+
+
+def main(count=2000, latency_ms=5, slow_ms=500, slow_pct=2):
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(run(loop, count, latency_ms / 1000,
+                                slow_ms / 1000, slow_pct / 100))
+
+
+if __name__ == '__main__':
+    main(*[float(arg) if '.' in arg else int(arg) for arg in sys.argv[1:]])
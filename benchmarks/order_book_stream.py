@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Peak memory and time to first level of level 3 order book decoding.
+
+Serves a synthetic level 3 order book from a local server and fetches it with
+order_book (resp.json()), order_book_stream and order_book_array. The book is
+generated once and written to a temporary file. Each method then runs in a
+fresh subprocess that serves the file, so that its peak RSS is measured in
+isolation. The figure reported is the growth in peak RSS over the process's
+peak before the request, which already includes the server's copy of the
+body.
+
+Usage::
+
+    python -m benchmarks.order_book_stream [orders per side]
+"""
+
+import asyncio
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+from aiohttp import web
+
+from copra.rest import Client
+
+METHODS = ('order_book', 'order_book_stream', 'order_book_array')
+
+
+def level3_book(orders):
+    """Return a JSON-encoded level 3 book with orders bids and asks.
+    """
+    rand = random.Random(42)
+
+    def side(start, step):
+        return [['{:.2f}'.format(start + step * (i // 5) / 100),
+                 '{:.8f}'.format(rand.random() * 5),
+                 str(uuid.UUID(int=rand.getrandbits(128)))]
+                for i in range(orders)]
+
+    return json.dumps({'sequence': 7072737439, 'bids': side(4000, -1),
+                       'asks': side(4000.01, 1)}).encode('utf8')
+
+
+def max_rss_kib():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+async def fetch(loop, method, path):
+    with open(path, 'rb') as f:
+        body = f.read()
+
+    async def book(request):
+        return web.Response(body=body, content_type='application/json')
+
+    app = web.Application()
+    app.router.add_get('/products/BTC-USD/book', book)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    client = Client(loop, 'http://127.0.0.1:{}'.format(port))
+
+    baseline = max_rss_kib()
+    start = time.perf_counter()
+    first = None
+    if method == 'order_book':
+        result = await client.order_book('BTC-USD', level=3)
+        first = time.perf_counter() - start
+        count = len(result['bids']) + len(result['asks'])
+    elif method == 'order_book_stream':
+        stream = await client.order_book_stream('BTC-USD', level=3)
+        count = 0
+        async for side, level in stream:
+            if first is None:
+                first = time.perf_counter() - start
+            count += 1
+    else:
+        result = await client.order_book_array('BTC-USD', level=3)
+        first = time.perf_counter() - start
+        count = len(result)
+    total = time.perf_counter() - start
+    growth = max_rss_kib() - baseline
+
+    await client.close()
+    await runner.cleanup()
+    return {'method': method, 'first': first, 'total': total,
+            'rss': growth, 'size': len(body), 'count': count}
+
+
+def main(orders=200000):
+    print('{} orders per side'.format(orders))
+    print('{:<20}{:>16}{:>12}{:>16}'.format('method', 'first level ms',
+                                            'total ms', 'peak RSS +KiB'))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'book.json')
+        with open(path, 'wb') as f:
+            f.write(level3_book(orders))
+        for method in METHODS:
+            out = subprocess.check_output([sys.executable, '-m',
+                                           'benchmarks.order_book_stream',
+                                           '--child', method, path])
+            result = json.loads(out.decode('utf8').splitlines()[-1])
+            assert result['count'] == orders * 2, result['count']
+            print('{:<20}{:>16.1f}{:>12.1f}{:>16,}'.format(
+                method, result['first'] * 1000, result['total'] * 1000,
+                result['rss']))
+    print('body {:,} bytes'.format(result['size']))
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--child']:
+        loop = asyncio.get_event_loop()
+        result = loop.run_until_complete(fetch(loop, sys.argv[2],
+                                               sys.argv[3]))
+        print(json.dumps(result))
+    else:
+        main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Client side cost per order of limit_order versus an OrderTemplate.
+
+Two measurements are made for each path:
+
+* build: the CPU time to validate, serialize and sign one order, without
+  sending it.
+* round trip: the wall time to place one order against a local REST server
+  that answers immediately, so that nearly all of it is client and aiohttp
+  overhead.
+
+Usage::
+
+    python -m benchmarks.order_templates [order count]
+"""
+
+import asyncio
+import json
+import sys
+import time
+import uuid
+
+from benchmarks.rest_server import RestServer, make_client
+from copra.rest.products import ProductRules
+
+PRODUCT = {'id': 'BTC-USD', 'base_min_size': '0.001', 'base_max_size': '70',
+           'quote_increment': '0.01', 'status': 'online'}
+
+
+def prices(count):
+    return ['{:.2f}'.format(3500 + (i % 100) / 100) for i in range(count)]
+
+
+def build_limit_order(client, price, validate):
+    data = client._limit_order_data('buy', 'BTC-USD', price, '0.01',
+                                    post_only=True,
+                                    client_oid=str(uuid.uuid4()))
+    if validate:
+        rules = client.product_rules['BTC-USD']
+        data['price'], data['size'], _ = rules.check_limit(
+            'buy', data['price'], data['size'], True)
+    body = json.dumps(data)
+    return client._get_auth_headers('/orders', 'POST', body)
+
+
+def build_template(client, template, price):
+    body = template.body(price, '0.01', uuid.uuid4())
+    return client._get_auth_headers('/orders', 'POST', body)
+
+
+async def run(loop, count):
+    server = RestServer(loop)
+    await server.start()
+    client = make_client(loop, server.url)
+    client.product_rules = {'BTC-USD': ProductRules(PRODUCT)}
+    await client.warmup(lane='priority')
+    quotes = prices(count)
+
+    print('{} orders'.format(count))
+    print('{:<22}{:>14}{:>18}'.format('path', 'build us', 'round trip us'))
+    for validate in (False, True):
+        template = await client.order_template('buy', 'BTC-USD',
+                                               post_only=True,
+                                               validate=validate)
+        suffix = ' +validate' if validate else ''
+
+        start = time.process_time()
+        for price in quotes:
+            build_limit_order(client, price, validate)
+        limit_build = (time.process_time() - start) / count
+
+        start = time.process_time()
+        for price in quotes:
+            build_template(client, template, price)
+        template_build = (time.process_time() - start) / count
+
+        start = time.perf_counter()
+        for price in quotes:
+            await client.limit_order('buy', 'BTC-USD', price, '0.01',
+                                     post_only=True,
+                                     client_oid=str(uuid.uuid4()),
+                                     validate=validate)
+        limit_trip = (time.perf_counter() - start) / count
+
+        start = time.perf_counter()
+        for price in quotes:
+            await template.place(price, '0.01', uuid.uuid4())
+        template_trip = (time.perf_counter() - start) / count
+
+        for name, build, trip in (('limit_order' + suffix, limit_build,
+                                   limit_trip),
+                                  ('template' + suffix, template_build,
+                                   template_trip)):
+            print('{:<22}{:>14.1f}{:>18.1f}'.format(name, build * 1e6,
+                                                    trip * 1e6))
+
+    await client.close()
+    await server.stop()
+
+
+def main(count=5000):
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(run(loop, count))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Memory and construction cost of record types versus decoded dicts.
+
+Decodes pages of 100 synthetic trades and fills the way the REST client does,
+then measures the memory held by the results as plain dicts and as
+copra.rest.records records, and how many records per second are built from
+the decoded dicts. Memory is the tracemalloc size of the results, scaled to
+1M records.
+
+Usage::
+
+    python -m benchmarks.records [record count]
+"""
+
+import gc
+import json
+import random
+import sys
+import time
+import tracemalloc
+import uuid
+
+from copra.rest.records import Fill, Trade
+
+
+def pages(count, make):
+    rand = random.Random(42)
+    return [json.dumps([make(rand, i + j) for j in range(100)])
+            for i in range(0, count, 100)]
+
+
+def trade(rand, i):
+    return {'time': '2018-09-27T22:49:{:02d}.105Z'.format(i % 60),
+            'trade_id': 51584925 + i,
+            'price': '{:.8f}'.format(6681 + rand.random()),
+            'size': '{:.8f}'.format(rand.random()),
+            'side': rand.choice(('buy', 'sell'))}
+
+
+def fill(rand, i):
+    return {'trade_id': 74 + i, 'product_id': 'BTC-USD',
+            'price': '{:.2f}'.format(6681 + rand.random()),
+            'size': '{:.8f}'.format(rand.random()),
+            'order_id': str(uuid.UUID(int=rand.getrandbits(128))),
+            'created_at': '2014-11-07T22:19:28.578544Z',
+            'liquidity': rand.choice(('M', 'T')),
+            'fee': '{:.16f}'.format(rand.random()),
+            'settled': True, 'side': rand.choice(('buy', 'sell'))}
+
+
+def measure(encoded, build):
+    gc.collect()
+    tracemalloc.start()
+    results = [build(json.loads(page)) for page in encoded]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del results
+    return size
+
+
+def main(count=200000):
+    print('{:,} records, memory scaled to 1M'.format(count))
+    print('{:<8}{:>14}{:>16}{:>18}'.format('type', 'dict MiB', 'record MiB',
+                                           'records/s'))
+    for name, make, cls in (('trade', trade, Trade), ('fill', fill, Fill)):
+        encoded = pages(count, make)
+        dict_size = measure(encoded, lambda page: page)
+        record_size = measure(encoded, lambda page: [cls.from_dict(item)
+                                                     for item in page])
+
+        decoded = [json.loads(page) for page in encoded]
+        start = time.perf_counter()
+        for page in decoded:
+            [cls.from_dict(item) for item in page]
+        rate = count / (time.perf_counter() - start)
+
+        scale = 1000000 / count / 2 ** 20
+        print('{:<8}{:>14,.0f}{:>16,.0f}{:>18,.0f}'.format(
+            name, dict_size * scale, record_size * scale, rate))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Cancel/replace latency for each replace_order mode.
+
+Replaces an order repeatedly against a local REST server that delays every
+response by a fixed latency, standing in for the network round trip, and
+compares each replace_order mode with awaiting cancel and then limit_order.
+The priority lane is warmed up first so that no request waits on a new
+connection.
+
+Usage::
+
+    python -m benchmarks.replace_order [replace count] [latency ms]
+"""
+
+import asyncio
+import statistics
+import sys
+import time
+
+from benchmarks.rest_server import RestServer, make_client
+
+ORDER = {'side': 'buy', 'product_id': 'BTC-USD', 'price': '3500.00',
+         'size': '0.01', 'post_only': True}
+
+
+async def sequential(client, order_id):
+    start = time.monotonic()
+    await client.cancel(order_id)
+    order = await client.limit_order(**ORDER)
+    return order['id'], time.monotonic() - start
+
+
+async def replace(client, order_id, mode):
+    result = await client.replace_order(order_id, ORDER, mode)
+    return result['order']['result']['id'], result['elapsed']
+
+
+async def run(loop, count, latency):
+    server = RestServer(loop, latency)
+    await server.start()
+    client = make_client(loop, server.url)
+    await client.warmup(2, lane='priority')
+
+    print('{} replaces, {:.0f} ms server latency'.format(
+        count, latency * 1000))
+    print('{:<22}{:>12}{:>12}{:>12}'.format('method', 'mean ms', 'p50 ms',
+                                            'max ms'))
+    order_id = (await client.limit_order(**ORDER))['id']
+    for name in ('cancel + limit_order', 'cancel_first', 'overlap',
+                 'new_first'):
+        times = []
+        for _ in range(count):
+            if name == 'cancel + limit_order':
+                order_id, elapsed = await sequential(client, order_id)
+            else:
+                order_id, elapsed = await replace(client, order_id, name)
+            times.append(elapsed * 1000)
+        print('{:<22}{:>12.2f}{:>12.2f}{:>12.2f}'.format(
+            name, statistics.mean(times), statistics.median(times),
+            max(times)))
+
+    await client.close()
+    await server.stop()
+
+
+def main(count=50, latency_ms=20):
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(run(loop, count, latency_ms / 1000))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""Local REST server for benchmarking copra.rest.Client order entry.
+
+The server answers the order entry endpoints the way Coinbase Pro does, closely
+enough for the client: POST /orders echoes the order back as pending, DELETE
+/orders/<id> echoes the id, GET and HEAD /time return the time, and GET
+/products/<id>/ticker returns a fixed ticker. Every response can be delayed to
+stand in for network and matching engine latency, and a random fraction of
+them delayed further to stand in for tail latency.
+"""
+
+import asyncio
+import json
+import random
+import time
+import uuid
+
+from aiohttp import web
+
+from copra.rest import Client
+
+
+class RestServer:
+    """A local order entry server.
+
+    :ivar str url: The http:// url clients should use.
+    :ivar list log: (method, path, received at, answered at) for every
+        request, with monotonic times.
+    """
+
+    def __init__(self, loop, latency=0.0, host='127.0.0.1', port=0,
+                 slow_rate=0.0, slow_latency=0.0, seed=42):
+        """
+
+        :param loop: The asyncio loop the server runs in.
+
+        :param float latency: (optional) Seconds to wait before answering each
+            request. The default is 0.
+
+        :param str host: (optional) The interface to listen on.
+
+        :param int port: (optional) The port to listen on. The default of 0
+            picks a free port.
+
+        :param float slow_rate: (optional) The fraction of requests, chosen at
+            random, that wait slow_latency seconds instead of latency. The
+            default is 0.
+
+        :param float slow_latency: (optional) The default is 0.
+
+        :param seed: (optional) The seed for choosing slow requests.
+        """
+        self.loop = loop
+        self.latency = latency
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.random = random.Random(seed)
+        self.host = host
+        self.port = port
+        self.log = []
+        self.app = web.Application()
+        self.app.router.add_get('/time', self.server_time)
+        self.app.router.add_post('/orders', self.place)
+        self.app.router.add_delete('/orders/{order_id}', self.cancel)
+        self.app.router.add_get('/products/{product_id}/ticker', self.ticker)
+        self.runner = None
+
+    @property
+    def url(self):
+        return 'http://{}:{}'.format(self.host, self.port)
+
+    async def _respond(self, request, body):
+        received = time.monotonic()
+        latency = self.latency
+        if self.slow_rate and self.random.random() < self.slow_rate:
+            latency = self.slow_latency
+        if latency:
+            await asyncio.sleep(latency)
+        self.log.append((request.method, request.path, received,
+                         time.monotonic()))
+        return web.json_response(body)
+
+    async def server_time(self, request):
+        now = time.time()
+        return await self._respond(request, {'iso': '', 'epoch': now})
+
+    async def ticker(self, request):
+        return await self._respond(request, {
+            'trade_id': 4729088, 'price': '333.99', 'size': '0.193',
+            'bid': '333.98', 'ask': '333.99', 'volume': '5957.11914015',
+            'time': '2015-11-14T20:46:03.511254Z'})
+
+    async def place(self, request):
+        order = json.loads(await request.read())
+        order.update({'id': str(uuid.uuid4()), 'status': 'pending',
+                      'settled': False})
+        return await self._respond(request, order)
+
+    async def cancel(self, request):
+        return await self._respond(request, [request.match_info['order_id']])
+
+    async def start(self):
+        self.runner = web.AppRunner(self.app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+
+def make_client(loop, url):
+    """Return an authenticated client with made up credentials for url.
+    """
+    return Client(loop, url, auth=True, key='a035b37f42394a6d343231f7f772b99d',
+                  secret='aVGe54dHHYUSudB3sJdcQx4BfQ6K5oVdcYv4eRtDN6fBHEQf5Go6'
+                         'BACew4G0iFjfLKJHmWY5ZEwlqxdslop4CC==',
+                  passphrase='a2f9ee4dx2b')
@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Bytes on the wire versus CPU time for permessage-deflate.
+
+Streams the same synthetic full channel messages from a local feed server to
+copra.websocket.Client with compression off and with a few window bits / memory
+level settings, then prints the wire-level bytes received and the CPU time for
+each run. The server runs in the same process so the CPU time includes the
+cost of compressing as well as inflating.
+
+Usage::
+
+    python -m benchmarks.websocket_compression [message count]
+"""
+
+import asyncio
+import sys
+
+from benchmarks.feed_server import consume, full_channel_messages
+
+SETTINGS = (
+    ('off', {}),
+    ('deflate', {'compress': True}),
+    ('deflate bits=12 mem=4', {'compress': True, 'compress_window_bits': 12,
+                               'compress_mem_level': 4}),
+    ('deflate bits=9 mem=1', {'compress': True, 'compress_window_bits': 9,
+                              'compress_mem_level': 1}),
+)
+
+
+def main(count=20000):
+    loop = asyncio.get_event_loop()
+    messages = full_channel_messages(count)
+    app_bytes = sum(len(msg) for msg in messages)
+
+    print('{} messages, {:,} bytes of JSON'.format(count, app_bytes))
+    print('{:<24}{:>14}{:>8}{:>10}{:>10}'.format('setting', 'wire bytes',
+                                                 'ratio', 'wall s', 'cpu s'))
+    for label, kwargs in SETTINGS:
+        received, wire, wall, cpu = loop.run_until_complete(
+            consume(loop, messages, kwargs.get('compress', False), **kwargs))
+        assert received == count, received
+        print('{:<24}{:>14,}{:>8.2f}{:>10.3f}{:>10.3f}'.format(
+            label, wire, wire / app_bytes, wall, cpu))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,42 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Per-message CPU time for each WebSocket protocol option profile.
+
+Streams the same synthetic full channel messages from a local feed server to
+copra.websocket.Client using the autobahn defaults and then each profile in
+copra.websocket.client.PROFILES. The server runs in the same process, so the
+absolute numbers include its work; the differences between rows are the
+client's.
+
+Usage::
+
+    python -m benchmarks.websocket_profiles [message count] [repeats]
+"""
+
+import asyncio
+import sys
+
+from copra.websocket.client import PROFILES
+
+from benchmarks.feed_server import consume, full_channel_messages
+
+
+def main(count=20000, repeats=3):
+    loop = asyncio.get_event_loop()
+    messages = full_channel_messages(count)
+
+    print('{} messages, best of {}'.format(count, repeats))
+    print('{:<18}{:>12}{:>14}'.format('profile', 'cpu s', 'cpu us/msg'))
+    for profile in [None] + sorted(PROFILES):
+        best = None
+        for _ in range(repeats):
+            received, wire, wall, cpu = loop.run_until_complete(
+                consume(loop, messages, profile=profile))
+            assert received == count, received
+            best = cpu if best is None else min(best, cpu)
+        print('{:<18}{:>12.3f}{:>14.2f}'.format(
+            profile or 'autobahn default', best, best / count * 1e6))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
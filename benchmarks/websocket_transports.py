@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Messages per second and memory for each WebSocket transport.
+
+Streams the same synthetic full channel messages from a local feed server to
+copra.websocket.Client running on each transport backend. Throughput is
+measured without tracing; peak memory is measured in a second run with
+tracemalloc, which also counts the server's allocations.
+
+Usage::
+
+    python -m benchmarks.websocket_transports [message count]
+"""
+
+import asyncio
+import sys
+import tracemalloc
+
+from benchmarks.feed_server import consume, full_channel_messages
+
+TRANSPORTS = ('autobahn', 'aiohttp', 'websockets')
+
+
+def main(count=20000):
+    loop = asyncio.get_event_loop()
+    messages = full_channel_messages(count)
+
+    print('{} messages'.format(count))
+    print('{:<14}{:>12}{:>12}{:>16}'.format('transport', 'msgs/s', 'cpu s',
+                                            'peak KiB'))
+    for transport in TRANSPORTS:
+        kwargs = {'transport': transport}
+        if transport == 'autobahn':
+            kwargs['profile'] = 'high_throughput'
+        try:
+            received, wire, wall, cpu = loop.run_until_complete(
+                consume(loop, messages, **kwargs))
+        except ImportError as e:
+            print('{:<14}{}'.format(transport, e))
+            continue
+        assert received == count, received
+
+        tracemalloc.start()
+        loop.run_until_complete(consume(loop, messages, **kwargs))
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        print('{:<14}{:>12,.0f}{:>12.3f}{:>16,.0f}'.format(
+            transport, count / wall, cpu, peak / 1024))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
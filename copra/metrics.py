@@ -0,0 +1,418 @@
+# -*- coding: utf-8 -*-
+"""Metrics for the copra REST and WebSocket clients.
+
+A Registry holds counters and fixed-bucket histograms, each with a set of
+label names. It can be shared by any number of copra.rest.Client and
+copra.websocket.Client instances, passed to them as metrics, and rendered in
+the OpenMetrics text format, or served over HTTP with :func:`serve`.
+
+Metrics are updated from the event loop only, so they need no locks: an
+update is a dict lookup and an addition.
+
+"""
+
+import bisect
+import math
+
+from aiohttp import web
+
+# Histogram bucket upper bounds, in seconds.
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+           1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+
+
+class Histogram:
+    """A histogram of durations with fixed buckets.
+    """
+
+    def __init__(self, buckets=BUCKETS):
+        """
+
+        :param tuple buckets: (optional) The ascending upper bounds of the
+            buckets, in seconds. Larger values are counted in a final, +Inf
+            bucket. The default is BUCKETS.
+        """
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        """Count a value.
+
+        :param float value: The value, in seconds.
+        """
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def snapshot(self):
+        """Return the histogram's counts.
+
+        :returns: A dict with the count and sum of the values and buckets, a
+            list of (upper bound, cumulative count) 2-tuples ending with
+            (inf, count).
+        """
+        cumulative = 0
+        buckets = []
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            cumulative += count
+            buckets.append((bound, cumulative))
+        return {'count': self.count, 'sum': self.sum, 'buckets': buckets}
+
+
+class Metric:
+    """A named metric with a value, or series, for each combination of label
+    values.
+
+    :ivar str name: The metric's name.
+    :ivar str help: A description of the metric.
+    :ivar tuple labels: The label names.
+    :ivar dict series: label values tuple: the series.
+    """
+
+    kind = None
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.series = {}
+
+    def _check(self, values):
+        if len(values) != len(self.labels):
+            raise ValueError('{} takes {} label values, not {}.'.format(
+                self.name, len(self.labels), len(values)))
+
+    def snapshot(self):
+        """Return the metric's series.
+
+        :returns: A dict of label values tuple: value.
+        """
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    """A count that only goes up.
+    """
+
+    kind = 'counter'
+
+    def inc(self, *values, amount=1):
+        """Add to the count of a series.
+
+        :param values: The label values of the series.
+
+        :param amount: (optional) The amount to add. The default is 1.
+
+        :raises ValueError: The number of label values is wrong.
+        """
+        try:
+            self.series[values] += amount
+        except KeyError:
+            self._check(values)
+            self.series[values] = amount
+
+    def snapshot(self):
+        return dict(self.series)
+
+
+class HistogramMetric(Metric):
+    """A fixed-bucket histogram for each series.
+    """
+
+    kind = 'histogram'
+
+    def __init__(self, name, help, labels=(), buckets=BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = buckets
+
+    def observe(self, value, *values):
+        """Count a value in the histogram of a series.
+
+        :param float value: The value.
+
+        :param values: The label values of the series.
+
+        :raises ValueError: The number of label values is wrong.
+        """
+        histogram = self.series.get(values)
+        if histogram is None:
+            self._check(values)
+            histogram = self.series[values] = Histogram(self.buckets)
+        histogram.observe(value)
+
+    def snapshot(self):
+        return {values: histogram.snapshot()
+                for values, histogram in self.series.items()}
+
+
+def _escape(value):
+    return (str(value).replace('\\', '\\\\').replace('"', '\\"')
+            .replace('\n', '\\n'))
+
+
+def _number(value):
+    return '+Inf' if value == math.inf else repr(value)
+
+
+def _sample(name, labels, value):
+    if labels:
+        name = '{}{{{}}}'.format(name, ','.join(labels))
+    return '{} {}'.format(name, _number(value))
+
+
+class Registry:
+    """A set of metrics, by name.
+    """
+
+    def __init__(self):
+        self.metrics = {}
+
+    def _metric(self, cls, name, help, labels, **kwargs):
+        metric = self.metrics.get(name)
+        if metric is None:
+            metric = self.metrics[name] = cls(name, help, labels, **kwargs)
+        elif type(metric) is not cls or metric.labels != tuple(labels):
+            raise ValueError('{} is already registered as a different '
+                             'metric.'.format(name))
+        return metric
+
+    def counter(self, name, help, labels=()):
+        """Return the counter with a name, creating it if it's new.
+
+        :param str name: The metric's name.
+
+        :param str help: A description of the metric.
+
+        :param tuple labels: (optional) The label names. The default is ().
+
+        :returns: The :class:`Counter`.
+
+        :raises ValueError: name is registered as a different metric.
+        """
+        return self._metric(Counter, name, help, labels)
+
+    def histogram(self, name, help, labels=(), buckets=BUCKETS):
+        """Return the histogram with a name, creating it if it's new.
+
+        :param str name: The metric's name.
+
+        :param str help: A description of the metric.
+
+        :param tuple labels: (optional) The label names. The default is ().
+
+        :param tuple buckets: (optional) The bucket upper bounds of a new
+            histogram. The default is BUCKETS.
+
+        :returns: The :class:`HistogramMetric`.
+
+        :raises ValueError: name is registered as a different metric.
+        """
+        return self._metric(HistogramMetric, name, help, labels,
+                            buckets=buckets)
+
+    def snapshot(self):
+        """Return every metric's series.
+
+        :returns: A dict of metric name: :meth:`Metric.snapshot` dict.
+        """
+        return {name: metric.snapshot()
+                for name, metric in self.metrics.items()}
+
+    def render(self):
+        """Render every metric in the OpenMetrics text format.
+
+        :returns str: The exposition, ending with # EOF.
+        """
+        lines = []
+        for name in sorted(self.metrics):
+            metric = self.metrics[name]
+            lines.append('# TYPE {} {}'.format(name, metric.kind))
+            lines.append('# HELP {} {}'.format(name, _escape(metric.help)))
+            for values in sorted(metric.series):
+                labels = ['{}="{}"'.format(label, _escape(value))
+                          for label, value in zip(metric.labels, values)]
+                series = metric.series[values]
+                if metric.kind == 'counter':
+                    lines.append(_sample(name + '_total', labels, series))
+                    continue
+                cumulative = 0
+                for bound, count in zip(series.buckets + (math.inf,),
+                                        series.counts):
+                    cumulative += count
+                    lines.append(_sample(
+                        name + '_bucket',
+                        labels + ['le="{}"'.format(_number(bound))],
+                        cumulative))
+                lines.append(_sample(name + '_count', labels, series.count))
+                lines.append(_sample(name + '_sum', labels, series.sum))
+        lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+
+class RestMetrics:
+    """The metrics of copra.rest.Client.
+
+    * **copra_rest_requests** - Requests completed, by endpoint and response
+      status (none if there was no response).
+    * **copra_rest_errors** - Requests that failed, by endpoint and error:
+      http, timeout, connection, circuit_open, cancelled or the exception's
+      class name.
+    * **copra_rest_request_seconds** - Request latency, including reading
+      the response, by endpoint.
+    * **copra_rest_phase_seconds** - The phase timings of traced requests,
+      by endpoint and phase. See :mod:`copra.rest.tracing`.
+    * **copra_rest_hedges** - Hedge requests sent, by endpoint.
+    * **copra_rest_cache_lookups** - Lookups of cached data, by cache and
+      result, hit or miss.
+
+    Endpoints are method and path templates, for example
+    GET /products/{}/book.
+    """
+
+    def __init__(self, registry):
+        """
+
+        :param Registry registry: The registry to add the metrics to.
+        """
+        self.registry = registry
+        self.requests = registry.counter(
+            'copra_rest_requests', 'REST requests completed.',
+            ('endpoint', 'status'))
+        self.errors = registry.counter(
+            'copra_rest_errors', 'REST requests that failed.',
+            ('endpoint', 'error'))
+        self.latency = registry.histogram(
+            'copra_rest_request_seconds', 'REST request latency.',
+            ('endpoint',))
+        self.phases = registry.histogram(
+            'copra_rest_phase_seconds', 'REST request phase timings.',
+            ('endpoint', 'phase'))
+        self.hedges = registry.counter(
+            'copra_rest_hedges', 'REST hedge requests sent.', ('endpoint',))
+        self.cache = registry.counter(
+            'copra_rest_cache_lookups', 'Lookups of cached data.',
+            ('cache', 'result'))
+
+    def request(self, endpoint, status, seconds, error=None):
+        """Record a finished request.
+
+        :param str endpoint: The request's endpoint.
+
+        :param status: The response status, or None if there was no
+            response.
+        :type status: int or None
+
+        :param float seconds: The request's latency.
+
+        :param str error: (optional) The kind of error the request failed
+            with, if it failed. The default is None.
+        """
+        self.requests.inc(endpoint, 'none' if status is None else str(status))
+        self.latency.observe(seconds, endpoint)
+        if error is not None:
+            self.errors.inc(endpoint, error)
+
+
+class WebSocketMetrics:
+    """The metrics of copra.websocket.Client.
+
+    * **copra_websocket_messages** - Messages received, by client name,
+      message type and product id (empty for messages without one).
+    * **copra_websocket_received_bytes** - The size of the messages
+      received, by client name.
+    * **copra_websocket_reconnects** - Reconnections after the connection
+      closed unexpectedly, by client name.
+    * **copra_websocket_gaps** - Gaps in a product's stream detected by the
+      client, by client name and product id.
+    * **copra_websocket_handler_seconds** - Time spent in the client's
+      callbacks, by client name and callback.
+    """
+
+    def __init__(self, registry, name):
+        """
+
+        :param Registry registry: The registry to add the metrics to.
+
+        :param str name: The client's name.
+        """
+        self.registry = registry
+        self.name = name
+        self.messages = registry.counter(
+            'copra_websocket_messages', 'WebSocket messages received.',
+            ('client', 'type', 'product'))
+        self.bytes = registry.counter(
+            'copra_websocket_received_bytes',
+            'Size of the WebSocket messages received.', ('client',))
+        self.reconnects = registry.counter(
+            'copra_websocket_reconnects', 'WebSocket reconnections.',
+            ('client',))
+        self.gaps = registry.counter(
+            'copra_websocket_gaps', 'Gaps detected in WebSocket streams.',
+            ('client', 'product'))
+        self.handler_time = registry.histogram(
+            'copra_websocket_handler_seconds',
+            'Time spent in WebSocket callbacks.', ('client', 'handler'))
+
+    def message(self, msg, size=None):
+        """Record a received message.
+
+        :param dict msg: The decoded message.
+
+        :param int size: (optional) The size of the message as received. The
+            default is None.
+        """
+        self.messages.inc(self.name, msg.get('type', ''),
+                          msg.get('product_id', ''))
+        if size:
+            self.bytes.inc(self.name, amount=size)
+
+    def handled(self, handler, seconds):
+        """Record the time a callback took.
+
+        :param str handler: The callback's name.
+
+        :param float seconds: The time it took.
+        """
+        self.handler_time.observe(seconds, self.name, handler)
+
+
+async def serve(registry, host='127.0.0.1', port=9100, path='/metrics'):
+    """Serve a registry's metrics over HTTP in the OpenMetrics text format.
+
+    Example::
+
+        registry = Registry()
+        rest = Client(loop, metrics=registry)
+        feed = copra.websocket.Client(loop, channels, metrics=registry)
+        runner = await serve(registry, port=9100)
+        ...
+        await runner.cleanup()
+
+    :param Registry registry: The registry to serve.
+
+    :param str host: (optional) The address to listen on. The default is
+        127.0.0.1.
+
+    :param int port: (optional) The port to listen on. 0 picks a free one.
+        The default is 9100.
+
+    :param str path: (optional) The path the metrics are served at. The
+        default is /metrics.
+
+    :returns: The running aiohttp.web.AppRunner. Its cleanup coroutine stops
+        the server.
+    """
+    async def metrics(request):
+        return web.Response(body=registry.render().encode('utf8'),
+                            headers={'Content-Type': CONTENT_TYPE})
+
+    app = web.Application()
+    app.router.add_get(path, metrics)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+"""Parallel, resumable backfill of a product's trade history.
+
+Client.trades pages backward through a product's trades 100 at a time, each
+page's after cursor leading to the next, so a long history is fetched one
+request after another. Trade ids are dense integers, so TradeBackfill splits
+the id range into segments and walks several segments at once, each from its
+own after cursor, within the client's public rate limit. Finished segments are
+handed to a sink in trade id order and a checkpoint records how far the sink
+has got, so that an interrupted backfill can pick up where it left off.
+
+"""
+
+import asyncio
+import json
+import os
+import time
+
+
+class JSONLinesSink:
+    """A sink that appends trades to a file, one JSON object per line.
+    """
+
+    def __init__(self, path):
+        """
+
+        :param str path: The file to append to.
+        """
+        self.path = path
+
+    def __call__(self, trades):
+        with open(self.path, 'a') as f:
+            for trade in trades:
+                f.write(json.dumps(trade))
+                f.write('\n')
+
+
+class TradeBackfill:
+    """Fetch every trade of a product in a trade id range.
+
+    Typically used through :meth:`copra.rest.Client.backfill_trades`.
+
+    :ivar int next_id: The lowest trade id not yet passed to the sink.
+    :ivar dict stats: The number of pages requested and trades written, and
+        the elapsed time in seconds of the last run.
+    """
+
+    def __init__(self, client, product_id, start_id, end_id, sink,
+                 checkpoint=None, segment_size=10000, concurrency=4,
+                 timeout=None):
+        """
+
+        :param client: The client to make the requests with.
+        :type client: copra.rest.Client
+
+        :param str product_id: The product whose trades are fetched.
+
+        :param int start_id: The first trade id to fetch.
+
+        :param int end_id: The last trade id to fetch.
+
+        :param sink: A callable, or coroutine function, called with each
+            finished segment's trades as a list of dicts in ascending trade id
+            order. Segments are passed in order and each trade exactly once.
+
+        :param str checkpoint: (optional) A file to record progress in. If it
+            exists and is for the same product and range, the backfill
+            resumes from it. The default is None.
+
+        :param int segment_size: (optional) The number of trade ids in each
+            segment. The default is 10000.
+
+        :param int concurrency: (optional) The number of segments fetched at
+            once. The default is 4.
+
+        :param timeout: (optional) The time budget shared by every request,
+            passed on to :meth:`copra.rest.Client.get`. The default is None.
+        :type timeout: float or copra.rest.timeouts.Deadline
+
+        :raises ValueError: start_id is greater than end_id, or segment_size
+            or concurrency is less than 1.
+        """
+        if start_id > end_id:
+            raise ValueError('start_id must not be greater than end_id.')
+        if segment_size < 1 or concurrency < 1:
+            raise ValueError('segment_size and concurrency must be at least '
+                             '1.')
+
+        self.client = client
+        self.product_id = product_id
+        self.start_id = start_id
+        self.end_id = end_id
+        self.sink = sink
+        self.checkpoint = checkpoint
+        self.segment_size = segment_size
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.next_id = start_id
+        self.stats = {'pages': 0, 'trades': 0, 'elapsed': 0.0}
+        self._load_checkpoint()
+
+    def _load_checkpoint(self):
+        if not (self.checkpoint and os.path.exists(self.checkpoint)):
+            return
+        with open(self.checkpoint) as f:
+            state = json.load(f)
+        if (state.get('product_id') == self.product_id and
+                state.get('start_id') == self.start_id and
+                state.get('end_id') == self.end_id):
+            self.next_id = state['next_id']
+
+    def _save_checkpoint(self):
+        if not self.checkpoint:
+            return
+        state = {'product_id': self.product_id, 'start_id': self.start_id,
+                 'end_id': self.end_id, 'next_id': self.next_id}
+        tmp = self.checkpoint + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp, self.checkpoint)
+
+    @property
+    def done(self):
+        """True once every trade in the range has been passed to the sink.
+        """
+        return self.next_id > self.end_id
+
+    def segments(self):
+        """Return the (first id, last id) 2-tuples still to be fetched.
+        """
+        return [(first, min(first + self.segment_size - 1, self.end_id))
+                for first in range(self.next_id, self.end_id + 1,
+                                   self.segment_size)]
+
+    async def _fetch_segment(self, first, last):
+        """Fetch the trades with ids from first to last.
+
+        :returns: The trades in ascending trade id order.
+        """
+        path = '/products/{}/trades'.format(self.product_id)
+        trades = {}
+        cursor = last + 1
+        while cursor > first:
+            await self.client.public_limiter.acquire()
+            headers, page = await self.client.get(
+                path, {'limit': 100, 'after': cursor}, raw=False,
+                timeout=self.timeout)
+            self.stats['pages'] += 1
+            if not page:
+                break
+            for trade in page:
+                if first <= trade['trade_id'] <= last:
+                    trades[trade['trade_id']] = trade
+            cursor = min(trade['trade_id'] for trade in page)
+        return [trades[trade_id] for trade_id in sorted(trades)]
+
+    async def run(self):
+        """Fetch the remaining segments and pass them to the sink.
+
+        Segments that finish ahead of an earlier one are held until it
+        arrives, so a worker doesn't start another segment while twice
+        concurrency segments are being fetched or held.
+
+        If a request fails the error is raised once the segments being
+        fetched have been abandoned. Everything passed to the sink before
+        then is recorded in the checkpoint, so running again resumes from
+        there.
+
+        :returns: The stats dict.
+
+        :raises APIRequestError: Any error generated by the Coinbase Pro API
+            server.
+        """
+        start = time.monotonic()
+        segments = iter(self.segments())
+        finished = {}
+        fetching = 0
+        lock = asyncio.Lock()
+        space = asyncio.Condition()
+        limit = self.concurrency * 2
+
+        async def flush():
+            async with lock:
+                while self.next_id in finished:
+                    trades, last = finished.pop(self.next_id)
+                    result = self.sink(trades)
+                    if asyncio.iscoroutine(result):
+                        await result
+                    self.stats['trades'] += len(trades)
+                    self.next_id = last + 1
+                    self._save_checkpoint()
+            async with space:
+                space.notify_all()
+
+        async def worker():
+            nonlocal fetching
+            while True:
+                async with space:
+                    await space.wait_for(
+                        lambda: len(finished) + fetching < limit)
+                    segment = next(segments, None)
+                    if segment is None:
+                        return
+                    fetching += 1
+                first, last = segment
+                try:
+                    trades = await self._fetch_segment(first, last)
+                finally:
+                    fetching -= 1
+                finished[first] = (trades, last)
+                await flush()
+
+        workers = [self.client.loop.create_task(worker())
+                   for _ in range(self.concurrency)]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for task in workers:
+                task.cancel()
+            self.stats['elapsed'] = time.monotonic() - start
+        return self.stats
@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+"""Per-endpoint circuit breakers for the copra REST client.
+
+When a single Coinbase Pro endpoint is failing, requests to it keep waiting
+for errors or timeouts, tying up connections that healthy endpoints could
+use. A circuit breaker watches the recent failure rate of an endpoint. Once
+it is too high the circuit opens and requests to that endpoint fail at once,
+without being sent. After a cool-off period a few probe requests are let
+through (half open); if they succeed the circuit closes again.
+
+Endpoints are identified by method and path template, with the variable
+parts of the path, product and object ids, replaced by {}: GET
+/products/{}/book, POST /orders, DELETE /orders/{}.
+
+"""
+
+import collections
+import re
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# A path segment is variable if it is a UUID or contains an upper case letter
+# or digit. Fixed segments, like payment-methods, are lower case words.
+_VARIABLE = re.compile(r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-'
+                       r'[0-9a-f]{12}$|[A-Z0-9]')
+
+
+def endpoint(method, path):
+    """Return the endpoint that a request belongs to.
+
+    :param str method: The HTTP method.
+
+    :param str path: The request path, without the query string.
+
+    :returns: The method and path template, for example
+        'GET /products/{}/book'.
+    """
+    segments = ['{}' if _VARIABLE.search(segment) else segment
+                for segment in path.split('?')[0].split('/')]
+    return '{} {}'.format(method, '/'.join(segments))
+
+
+class Circuit:
+    """The circuit breaker of a single endpoint.
+
+    :ivar str endpoint: The endpoint.
+    :ivar str state: closed, open or half_open.
+    """
+
+    def __init__(self, breakers, endpoint):
+        self.breakers = breakers
+        self.endpoint = endpoint
+        self.state = CLOSED
+        self.opened_at = None
+        self.probes = 0
+        self._outcomes = collections.deque()
+
+    def _trim(self, now):
+        while (self._outcomes and
+               self._outcomes[0][0] <= now - self.breakers.window):
+            self._outcomes.popleft()
+
+    def allow(self):
+        """Decide whether a request may be sent.
+
+        A request that is allowed must be followed by :meth:`record` or
+        :meth:`release`.
+
+        :returns: True if the request may be sent, False if it should fail
+            fast.
+        """
+        if self.state == OPEN:
+            if (self.breakers.loop.time() - self.opened_at <
+                    self.breakers.reset_timeout):
+                return False
+            self.state = HALF_OPEN
+        if self.state == HALF_OPEN:
+            if self.probes >= self.breakers.probes:
+                return False
+            self.probes += 1
+        return True
+
+    def release(self):
+        """Note that an allowed request ended without an outcome, for example
+        because it was cancelled.
+        """
+        if self.state == HALF_OPEN and self.probes:
+            self.probes -= 1
+
+    def record(self, failed):
+        """Record the outcome of an allowed request.
+
+        :param bool failed: True if the endpoint failed the request.
+        """
+        now = self.breakers.loop.time()
+        if self.state == HALF_OPEN:
+            self.probes = max(0, self.probes - 1)
+            if failed:
+                self._open(now)
+            elif self.probes == 0:
+                self.state = CLOSED
+                self._outcomes.clear()
+            return
+        if self.state == OPEN:
+            # A request sent before the circuit opened.
+            return
+
+        self._outcomes.append((now, failed))
+        self._trim(now)
+        requests = len(self._outcomes)
+        if requests >= self.breakers.min_requests:
+            failures = sum(1 for _, failed in self._outcomes if failed)
+            if failures / requests >= self.breakers.failure_rate:
+                self._open(now)
+
+    def _open(self, now):
+        self.state = OPEN
+        self.opened_at = now
+        self.probes = 0
+        self._outcomes.clear()
+
+    def status(self):
+        """Return the circuit's state.
+
+        :returns: A dict with the state, the number of requests and of
+            failures in the current window, and, while open, the number of
+            seconds until probing starts (otherwise None).
+        """
+        now = self.breakers.loop.time()
+        self._trim(now)
+        retry_in = None
+        if self.state == OPEN:
+            retry_in = max(0.0, self.opened_at + self.breakers.reset_timeout -
+                           now)
+        return {'state': self.state, 'requests': len(self._outcomes),
+                'failures': sum(1 for _, failed in self._outcomes if failed),
+                'retry_in': retry_in}
+
+
+class CircuitBreakers:
+    """The circuit breakers of every endpoint a client has used.
+
+    Typically created by :meth:`copra.rest.Client.enable_circuit_breakers`.
+    """
+
+    def __init__(self, loop, failure_rate=0.5, min_requests=10, window=30,
+                 reset_timeout=10, probes=1):
+        """
+
+        :param loop: The asyncio loop that the requests run in.
+        :type loop: asyncio loop
+
+        :param float failure_rate: (optional) The fraction of failed requests
+            in the window, between 0 and 1, at which a circuit opens. The
+            default is 0.5.
+
+        :param int min_requests: (optional) The number of requests in the
+            window before the failure rate is acted on. The default is 10.
+
+        :param float window: (optional) The number of seconds of requests the
+            failure rate is measured over. The default is 30.
+
+        :param float reset_timeout: (optional) The number of seconds an open
+            circuit fails fast before probing. The default is 10.
+
+        :param int probes: (optional) The number of requests let through at
+            once to probe a half open circuit. The default is 1.
+
+        :raises ValueError: An argument is out of range.
+        """
+        if not 0 < failure_rate <= 1:
+            raise ValueError('failure_rate must be greater than 0 and at '
+                             'most 1.')
+        if min_requests < 1 or probes < 1:
+            raise ValueError('min_requests and probes must be at least 1.')
+        if window <= 0 or reset_timeout <= 0:
+            raise ValueError('window and reset_timeout must be greater '
+                             'than 0.')
+
+        self.loop = loop
+        self.failure_rate = failure_rate
+        self.min_requests = min_requests
+        self.window = window
+        self.reset_timeout = reset_timeout
+        self.probes = probes
+        self.circuits = {}
+
+    def circuit(self, method, path):
+        """Return the circuit of the endpoint a request belongs to.
+
+        :param str method: The HTTP method.
+
+        :param str path: The request path.
+
+        :returns: The Circuit, created closed if the endpoint is new.
+        """
+        key = endpoint(method, path)
+        circuit = self.circuits.get(key)
+        if circuit is None:
+            circuit = self.circuits[key] = Circuit(self, key)
+        return circuit
+
+    def status(self):
+        """Return the state of every endpoint's circuit.
+
+        :returns: A dict of endpoint: :meth:`Circuit.status` dict.
+        """
+        return {key: circuit.status()
+                for key, circuit in self.circuits.items()}
+
+    def reset(self):
+        """Close every circuit and forget its history.
+        """
+        self.circuits.clear()
@@ -10,15 +10,32 @@ from datetime import datetime, timedelta
 import hashlib
 import hmac
 import json
+import os
 import sys
 import time
 import urllib.parse
+import uuid
 
 import aiohttp
 import dateutil.parser
 from multidict import CIMultiDict
 
 from copra import __version__
+from copra.metrics import RestMetrics
+from copra.rest.backfill import TradeBackfill
+from copra.rest.breaker import CircuitBreakers, endpoint
+from copra.rest.clock import ClockSync
+from copra.rest.columns import candles_to_columns, levels_to_columns, trades_to_columns
+from copra.rest.hedge import Hedger
+from copra.rest.lane import Lane
+from copra.rest.orderbook import ArrayBook, OrderBookStream
+from copra.rest.products import ProductRules
+from copra.rest.records import Candle, Fill, LedgerEntry, Trade
+from copra.rest.ratelimit import PRIVATE_RATE_LIMIT, PUBLIC_RATE_LIMIT, RateLimiter
+from copra.rest.reports import ReportRows, download_report
+from copra.rest.templates import OrderTemplate
+from copra.rest.timeouts import Deadline
+from copra.rest.tracing import Tracer
 
 URL = 'https://api.pro.coinbase.com'
 SANDBOX_URL = 'https://api-public.sandbox.pro.coinbase.com'
@@ -74,7 +91,10 @@ class Client:
         
     """
     
-    def __init__(self, loop, url=URL, auth=False, key='', secret='', passphrase=''):
+    def __init__(self, loop, url=URL, auth=False, key='', secret='', passphrase='',
+                 limit=100, limit_per_host=0, keepalive_timeout=15,
+                 dns_cache_ttl=10, priority_limit=10, raw=False, timeout=None,
+                 connect_timeout=None, read_timeout=None, metrics=None):
         """
         
         :param loop: The asyncio loop that the client runs in.
@@ -97,22 +117,102 @@ class Client:
             
         :param str passphrase: (optional) The passphrase for the API key used 
             for authentication. Required if auth is True. The default is ''.
+
+        :param int limit: (optional) The maximum number of simultaneous 
+            connections in the client's connection pool. 0 means no limit. The
+            default is 100.
+
+        :param int limit_per_host: (optional) The maximum number of 
+            simultaneous connections to a single host. 0 means no limit. The
+            default is 0.
+
+        :param float keepalive_timeout: (optional) How long, in seconds, an 
+            idle connection is kept open for reuse. The default is 15.
+
+        :param int dns_cache_ttl: (optional) How long, in seconds, resolved
+            DNS entries are cached. None caches them forever. The default is
+            10.
+            
+        :param int priority_limit: (optional) The maximum number of 
+            simultaneous connections in the priority lane's connection pool. 
+            See :meth:`copra.rest.Client.queue_delay`. The default is 10.
+            
+        :param bool raw: (optional) If True, responses are returned undecoded
+            by default. See :meth:`get`. The default is False.
+            
+        :param float timeout: (optional) The default total time budget, in 
+            seconds, of each client method call. See :meth:`deadline`. The 
+            default is None which leaves aiohttp's default of 5 minutes per 
+            request.
+            
+        :param float connect_timeout: (optional) The budget, in seconds, of 
+            each request for getting a connection, including waiting for one
+            from the pool. The default is None.
+            
+        :param float read_timeout: (optional) The budget, in seconds, of each
+            read from the socket. The default is None.
+            
+        :param metrics: (optional) A registry, which may be shared with other
+            clients, to record the client's requests, errors and latency in.
+            See :class:`copra.metrics.RestMetrics` for the metrics. The 
+            default is None which records nothing.
+        :type metrics: copra.metrics.Registry
             
         :raises ValueError: If auth is True and key, secret, and passphrase are
-            not provided.
+            not provided, or a timeout is not greater than 0.
         """
         self.loop = loop
         self.url = url
         
         if auth and not (key and secret and passphrase):
             raise ValueError('auth requires key, secret, and passphrase')
+            
+        for value in (timeout, connect_timeout, read_timeout):
+            if value is not None and value <= 0:
+                raise ValueError('timeouts must be greater than 0.')
         
         self.auth = auth
+        self.raw = raw
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
         self.key = key
         self.secret = secret
         self.passphrase = passphrase
 
-        self.session = aiohttp.ClientSession(loop=loop)
+        # Order entry gets a lane, and so a connection pool, of its own so 
+        # that it never queues behind market data requests.
+        self.lanes = {
+            'default': Lane('default', loop, limit, limit_per_host, 
+                            keepalive_timeout, dns_cache_ttl),
+            'priority': Lane('priority', loop, priority_limit, 0,
+                             keepalive_timeout, dns_cache_ttl)
+        }
+        self.connector = self.lanes['default'].connector
+        self.session = self.lanes['default'].session
+        
+        # Bulk operations, like place_orders, pace their requests with these.
+        self.public_limiter = RateLimiter(loop, *PUBLIC_RATE_LIMIT)
+        self.private_limiter = RateLimiter(loop, *PRIVATE_RATE_LIMIT)
+        
+        # Product id: ProductRules, filled by load_products.
+        self.product_rules = {}
+        
+        # A ClockSync, set by sync_clock, that corrects signing timestamps.
+        self.clock = None
+        
+        # A Hedger, set by enable_hedging, that duplicates slow GETs.
+        self.hedger = None
+        
+        # CircuitBreakers, set by enable_circuit_breakers.
+        self.circuits = None
+        
+        # A Tracer, set by enable_tracing, that times a sample of requests.
+        self.tracer = None
+        
+        self.metrics = None if metrics is None else RestMetrics(metrics)
+        
+        self._hmac = None
 
 
     @property
@@ -125,16 +225,279 @@ class Client:
     async def close(self):
         """Close the client session and release all aquired resources.
         """
-        await self.session.close()
+        if self.clock is not None:
+            await self.clock.stop()
+        for lane in self.lanes.values():
+            await lane.close()
         
         
     async def __aenter__(self):
         return self
     
     async def __aexit__(self, exc_type, exc_value, traceback):
-        await self.session.close()
+        await self.close()
+        
+        
+    def queue_delay(self):
+        """Get the time requests in each lane spent waiting for a connection.
+        
+        Requests made by :meth:`limit_order`, :meth:`market_order`, 
+        :meth:`cancel` and :meth:`cancel_all` use the priority lane. 
+        Everything else uses the default lane. Each lane has its own 
+        connection pool so a burst of market data requests filling the default
+        pool doesn't delay order entry.
+        
+        :returns: A dict of queueing delay statistics keyed by lane name. See
+            :meth:`copra.rest.lane.Lane.queue_stats`.
+            
+            Example::
+            
+                {
+                  'default': {'requests': 120, 'queued': 4, 'total': 0.0213,
+                              'mean': 0.0001775, 'max': 0.0092},
+                  'priority': {'requests': 6, 'queued': 0, 'total': 0.0,
+                               'mean': 0.0, 'max': 0.0}
+                }
+        """
+        return {name: lane.queue_stats() for name, lane in self.lanes.items()}
 
 
+    async def warmup(self, connections=1, lane='default', timeout=None):
+        """Open connections to the API server ahead of time.
+        
+        Establishing a new connection costs a TCP and a TLS handshake, several
+        round trips, on top of the request itself. This method opens 
+        connections concurrently with lightweight HEAD requests and returns 
+        them to the pool so that later requests, an order placed immediately 
+        after startup for example, can reuse them. Connections are closed after
+        keepalive_timeout seconds of inactivity so call this again after an 
+        idle period.
+        
+        .. note:: The HEAD requests are not authenticated but may still count 
+            against the public rate limit.
+        
+        :param int connections: (optional) The number of connections to open.
+            The default is 1.
+            
+        :param str lane: (optional) The lane, default or priority, whose pool
+            the connections are opened in. The default is default.
+            
+        :param timeout: (optional) The time budget shared by the requests, in
+            seconds or as a :class:`copra.rest.timeouts.Deadline`. See 
+            :meth:`get`. Connections not opened in time aren't counted. The
+            default is None.
+        :type timeout: float or Deadline
+            
+        :returns: The number of connections that were successfully opened.
+        """
+        session = self.lanes[lane].session
+        timeout = self._deadline(timeout)
+        
+        async def head():
+            resp = await session.head(self.url + '/time', headers=HEADERS,
+                                      **self._timeout_kwargs(timeout))
+            return resp
+            
+        results = await asyncio.gather(*[head() for _ in range(connections)],
+                                       return_exceptions=True)
+        opened = 0
+        for resp in results:
+            if not isinstance(resp, Exception):
+                resp.release()
+                opened += 1
+        return opened
+        
+        
+    async def sync_clock(self, interval=60, samples=3, alpha=0.25):
+        """Correct signing timestamps for the local clock's offset.
+        
+        Authenticated requests are rejected if their timestamp is more than 
+        30 seconds from the API server's time. This method estimates the 
+        offset of the local clock from the server's, using the server time 
+        request with the shortest round trip out of samples, and then keeps 
+        the estimate up to date in a background task every interval seconds. 
+        Signing timestamps are corrected by the current estimate, with no 
+        request of their own. The background task is stopped by 
+        :meth:`close`.
+        
+        To correct the timestamps of an authenticated copra.websocket.Client
+        too, pass it this client's clock::
+        
+            await rest_client.sync_clock()
+            ws = copra.websocket.Client(loop, channels, auth=True, ..., 
+                                        clock=rest_client.clock)
+                                        
+        :param float interval: (optional) The number of seconds between 
+            updates. The default is 60.
+            
+        :param int samples: (optional) The number of server time requests 
+            made for each update. The default is 3.
+            
+        :param float alpha: (optional) The weight of each update in the 
+            smoothed offset, greater than 0 and at most 1. The default is 0.25.
+            
+        :returns: The ClockSync, whose offset and rtt attributes and metrics
+            method report the estimate.
+            
+        :raises ValueError: An argument is out of range.
+            
+        :raises APIRequestError: Any error generated by the Coinbase Pro API 
+            server during the first update.
+        """
+        clock = ClockSync(self, interval, samples, alpha)
+        await clock.sync()
+        if self.clock is not None:
+            await self.clock.stop()
+        self.clock = clock
+        clock.start()
+        return clock
+        
+        
+    def enable_hedging(self, percentile=95, budget=0.05, window=200,
+                       min_samples=20):
+        """Hedge slow GET requests.
+        
+        Once enabled, a GET that has not answered within the given percentile
+        of the latency of recent GETs is sent again, and the first response
+        to arrive is returned. This cuts the tail latency of polling 
+        order_book or ticker, for example, at the cost of a few duplicate 
+        requests. GETs are safe to duplicate since they change nothing. 
+        
+        A duplicate is only sent if the hedge budget allows it and a token 
+        can be taken from the client's public, or for authenticated requests
+        private, rate limiter without waiting. Pass hedge=False to 
+        :meth:`get` to never hedge a request, and set the client's hedger 
+        attribute to None to stop hedging altogether.
+        
+        :param float percentile: (optional) The percentile of recent latency
+            after which a request is hedged. The default is 95.
+            
+        :param float budget: (optional) The maximum ratio of hedges to 
+            requests. The default is 0.05.
+            
+        :param int window: (optional) The number of recent requests the 
+            latency percentile is taken over. The default is 200.
+            
+        :param int min_samples: (optional) The number of requests observed 
+            before any is hedged. The default is 20.
+            
+        :returns: The copra.rest.hedge.Hedger, whose stats attribute counts
+            requests, hedges sent, hedges that answered first, and hedges 
+            denied by the budget or rate limit.
+            
+        :raises ValueError: An argument is out of range.
+        """
+        self.hedger = Hedger(self.loop, percentile, budget, window, 
+                             min_samples)
+        return self.hedger
+        
+        
+    def enable_circuit_breakers(self, failure_rate=0.5, min_requests=10, 
+                                window=30, reset_timeout=10, probes=1):
+        """Fail fast on endpoints that are failing.
+        
+        Once enabled, the requests to each endpoint, a method and path 
+        template like GET /products/{}/book or POST /orders, are watched. 
+        Server errors (HTTP 5xx), connection errors and timeouts count as 
+        failures. When at least min_requests requests to an endpoint were 
+        made in the last window seconds and failure_rate of them failed, the
+        endpoint's circuit opens: requests to it raise APIRequestError 
+        immediately, without being sent, so that they don't tie up 
+        connections that other endpoints could use. After reset_timeout 
+        seconds up to probes requests are let through. If they succeed the 
+        circuit closes, if not it stays open for another reset_timeout.
+        
+        The APIRequestError raised while a circuit is open has response 
+        None.
+        
+        :param float failure_rate: (optional) The fraction of failed requests,
+            greater than 0 and at most 1, at which a circuit opens. The 
+            default is 0.5.
+            
+        :param int min_requests: (optional) The number of requests in the 
+            window before the failure rate is acted on. The default is 10.
+            
+        :param float window: (optional) The number of seconds of requests the
+            failure rate is measured over. The default is 30.
+            
+        :param float reset_timeout: (optional) The number of seconds an open 
+            circuit fails fast before probing. The default is 10.
+            
+        :param int probes: (optional) The number of probe requests let 
+            through at once. The default is 1.
+            
+        :returns: The copra.rest.breaker.CircuitBreakers. Its status method 
+            returns the state of each endpoint's circuit.
+            
+            Example::
+            
+                {
+                  'GET /fills': {
+                    'state': 'open', 
+                    'requests': 0, 
+                    'failures': 0, 
+                    'retry_in': 6.2
+                  },
+                  'GET /products/{}/book': {
+                    'state': 'closed', 
+                    'requests': 42, 
+                    'failures': 1, 
+                    'retry_in': None
+                  }
+                }
+                
+        :raises ValueError: An argument is out of range.
+        """
+        self.circuits = CircuitBreakers(self.loop, failure_rate, min_requests,
+                                        window, reset_timeout, probes)
+        return self.circuits
+        
+        
+    def enable_tracing(self, sample_rate=0.01, callback=None):
+        """Time the phases of a sample of requests.
+        
+        Once enabled, sample_rate of the requests made with :meth:`get`, 
+        :meth:`post` and :meth:`delete` are timed phase by phase: waiting 
+        for a pooled connection (queue), DNS, connecting including TLS, 
+        sending the body, waiting for the response headers, reading the body
+        and the total. The timings are collected in a histogram per endpoint
+        and phase, and can also be passed to a callback. Requests that aren't
+        sampled cost next to nothing.
+        
+        See :mod:`copra.rest.tracing` for the phases.
+        
+        :param float sample_rate: (optional) The fraction of requests, 
+            greater than 0 and at most 1, that are traced. The default is 
+            0.01.
+            
+        :param callback: (optional) A function called with the 
+            :class:`copra.rest.tracing.RequestTrace` of each traced request
+            once it has finished. Its endpoint, status, error and phases()
+            describe the request. The default is None.
+            
+        :returns: The copra.rest.tracing.Tracer. Its snapshot method returns
+            the histograms.
+            
+            Example::
+            
+                {
+                  'POST /orders': {
+                    'wait': {
+                      'count': 12, 
+                      'sum': 0.2617, 
+                      'buckets': [(0.0005, 0), ..., (0.025, 11), 
+                                  (0.05, 12), ..., (inf, 12)]
+                    },
+                    ...
+                  }
+                }
+                
+        :raises ValueError: sample_rate is out of range.
+        """
+        self.tracer = Tracer(sample_rate, callback)
+        return self.tracer
+        
+        
     def _get_auth_headers(self, path, method='GET', data='', timestamp=None):
         """Get the headers necessary to authenticate a client request.
         
@@ -144,14 +507,17 @@ class Client:
         :param str method: (optional) The method of the request. The default is
             GET.
             
-        :param json data: (optional) json-encoded dict or Multidict of key/value 
+        :param data: (optional) json-encoded dict or Multidict of key/value 
             str pairs to be sent as the body of a POST request. The default is ''.
+        :type data: str or bytes
             
         :param float timestamp: (optional) A UNIX timestamp. This parameter 
             exists for testing purposes and generally should not be used. If a 
             timestamp is provided it must be within 30 seconds of the API 
             server's time. This can be found using: 
-            :meth:`copra.rest.Client.server_time`.
+            :meth:`copra.rest.Client.server_time`. The default is None which
+            uses the local time, corrected by :meth:`sync_clock` if it has 
+            been called.
             
         :returns: A dict of headers to be added to the request.
         
@@ -161,12 +527,18 @@ class Client:
             raise ValueError('client is not properly configured for authorization')
             
         if not timestamp:
-            timestamp = time.time()
+            timestamp = self.clock.time() if self.clock else time.time()
         timestamp = str(timestamp)
-        message = timestamp + method + path + data
-        message = message.encode('ascii')
-        hmac_key = base64.b64decode(self.secret)
-        signature = hmac.new(hmac_key, message, hashlib.sha256)
+        message = (timestamp + method + path).encode('ascii')
+        message += data if isinstance(data, bytes) else data.encode('ascii')
+        
+        # Decoding the secret and keying the HMAC is done once. Each request 
+        # signs with a copy of the keyed HMAC.
+        if self._hmac is None:
+            self._hmac = hmac.new(base64.b64decode(self.secret), 
+                                  digestmod=hashlib.sha256)
+        signature = self._hmac.copy()
+        signature.update(message)
         signature_b64 = base64.b64encode(signature.digest()).decode('utf-8')
         
         return {
@@ -194,9 +566,208 @@ class Client:
             msg = (await response.json())['message']
         msg += ' [{}]'.format(response.status)
         raise APIRequestError(msg, response)
+        
+        
+    async def _process_response(self, resp, raw=False):
+        """Read a response and release its connection back to the pool.
+        
+        The connection is released whether or not reading succeeds so that 
+        errors can't leak pool connections.
+        
+        :param aiohttp.ClientResponse resp: the response returned by the
+            aiohttp request call.
+            
+        :param bool raw: (optional) If True, the body is returned as bytes
+            and the headers as the response's read-only, case-insensitive 
+            header view instead of being decoded and copied. The default is 
+            False.
+            
+        :returns: A 2-tuple: (response headers, response body).
+        
+        :raises APIRequestError: Any error generated by the Coinbase Pro API 
+            server.
+        """
+        try:
+            if int(resp.status) >= 400:
+                await self._handle_error(resp)
+            
+            if raw:
+                return (resp.headers, await resp.read())
+            body = await resp.json()
+            headers = dict(resp.headers)
+        finally:
+            resp.release()
+        
+        return (headers, body)
  
  
-    async def delete(self, path='/', params=None, auth=False):
+    def deadline(self, timeout=None):
+        """Create a time budget to share between requests.
+        
+        Every client method takes a timeout argument. A number of seconds 
+        is the budget of that call alone, including every request it makes.
+        A Deadline can be passed to several calls instead, so that each 
+        request is only given what is left, for example when retrying::
+        
+            deadline = client.deadline(2)
+            while True:
+                try:
+                    return await client.ticker('BTC-USD', timeout=deadline)
+                except APIRequestError:
+                    if deadline.expired:
+                        raise
+                        
+        :param float timeout: (optional) The total budget in seconds. None 
+            uses the client's timeout. The default is None.
+            
+        :returns: A :class:`copra.rest.timeouts.Deadline` with the client's
+            connect_timeout and read_timeout.
+        """
+        return Deadline(self.loop, self.timeout if timeout is None else timeout,
+                        self.connect_timeout, self.read_timeout)
+                        
+                        
+    def _deadline(self, timeout):
+        """Return the Deadline for a timeout argument, or None if neither it
+        nor the client sets any limit.
+        """
+        if isinstance(timeout, Deadline):
+            return timeout
+        if (timeout is None and self.timeout is None and 
+                self.connect_timeout is None and self.read_timeout is None):
+            return None
+        return self.deadline(timeout)
+        
+        
+    def _timeout_kwargs(self, timeout):
+        """Return the keyword arguments that apply a timeout argument to an 
+        aiohttp request.
+        
+        :raises asyncio.TimeoutError: The budget has already run out.
+        """
+        deadline = self._deadline(timeout)
+        return {} if deadline is None else {'timeout': deadline.client_timeout()}
+        
+        
+    async def _send(self, method, path, send, raw, timeout=None, process=None):
+        """Send a request and process its response, through the endpoint's
+        circuit breaker if circuit breakers are enabled, and tracing it if it
+        is sampled.
+        
+        :param str method: The HTTP method.
+        
+        :param str path: The path of the request, without the query string.
+        
+        :param send: A function that returns a coroutine sending the request
+            and returning the aiohttp.ClientResponse. It is passed the 
+            request's aiohttp timeout, if it has one, as keyword argument 
+            timeout, and its RequestTrace, if it is traced, as 
+            trace_request_ctx.
+            
+        :param bool raw: See :meth:`_process_response`.
+        
+        :param timeout: (optional) See :meth:`get`.
+        
+        :param process: (optional) A coroutine function called with the 
+            response and raw instead of :meth:`_process_response`, whose 
+            result is returned. The request is finished, for the circuit
+            breaker, trace and metrics, once it returns. The default is None.
+        
+        :returns: A 2-tuple: (response headers, response body).
+        
+        :raises APIRequestError: Any error generated by the Coinbase Pro API 
+            server, or the endpoint's circuit is open.
+            
+        :raises asyncio.TimeoutError: The request's time budget ran out.
+        """
+        kwargs = self._timeout_kwargs(timeout)
+        if self.tracer is not None:
+            trace = self.tracer.start(method, path)
+            if trace is not None:
+                kwargs['trace_request_ctx'] = trace
+                
+        if self.circuits is None:
+            return await self._exchange(method, path, send, kwargs, raw, 
+                                        process)
+            
+        circuit = self.circuits.circuit(method, path)
+        if not circuit.allow():
+            if self.metrics is not None:
+                self.metrics.errors.inc(circuit.endpoint, 'circuit_open')
+            raise APIRequestError('Circuit open for {}'.format(circuit.endpoint), 
+                                  None)
+        try:
+            result = await self._exchange(method, path, send, kwargs, raw, 
+                                          process)
+        except APIRequestError as e:
+            # Client errors and rate limiting say nothing of the endpoint's 
+            # health.
+            circuit.record(e.response is not None and 
+                           int(e.response.status) >= 500)
+            raise
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            circuit.record(True)
+            raise
+        except BaseException:
+            circuit.release()
+            raise
+        circuit.record(False)
+        return result
+        
+        
+    async def _exchange(self, method, path, send, kwargs, raw, process=None):
+        """Send a request and process its response, finishing its trace if
+        it is traced and recording it if metrics are enabled.
+        
+        See :meth:`_send` for the parameters. kwargs are passed to send.
+        """
+        if process is None:
+            process = self._process_response
+        trace = kwargs.get('trace_request_ctx')
+        if trace is None and self.metrics is None:
+            return await process(await send(**kwargs), raw)
+            
+        start = time.monotonic()
+        resp = None
+        error = None
+        try:
+            resp = await send(**kwargs)
+            return await process(resp, raw)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            if trace is not None:
+                self.tracer.finish(trace, resp, error)
+            if self.metrics is not None:
+                self._record(method, path, trace, time.monotonic() - start, 
+                             resp, error)
+                
+                
+    def _record(self, method, path, trace, seconds, resp, error):
+        """Record a finished request in the client's metrics.
+        """
+        key = endpoint(method, path) if trace is None else trace.endpoint
+        kind = None
+        if isinstance(error, APIRequestError):
+            kind = 'http'
+        elif isinstance(error, asyncio.TimeoutError):
+            kind = 'timeout'
+        elif isinstance(error, aiohttp.ClientError):
+            kind = 'connection'
+        elif isinstance(error, asyncio.CancelledError):
+            kind = 'cancelled'
+        elif error is not None:
+            kind = type(error).__name__
+        self.metrics.request(key, None if resp is None else int(resp.status), 
+                             seconds, kind)
+        if trace is not None:
+            for phase, phase_seconds in trace.phases().items():
+                self.metrics.phases.observe(phase_seconds, key, phase)
+        
+        
+    async def delete(self, path='/', params=None, auth=False, lane='default',
+                     raw=None, timeout=None):
         """Base method for making DELETE requests.
         
         :param str path: (optional) The path not including the base URL of the
@@ -208,6 +779,17 @@ class Client:
         :param boolean auth: (optional) Indicates whether or not this request 
             needs to be authenticated. The default is False.
             
+        :param str lane: (optional) The lane, default or priority, to send the
+            request in. The default is default.
+            
+        :param bool raw: (optional) If True, the response is returned without
+            decoding: the body as bytes and the headers as the response's 
+            read-only, case-insensitive header view rather than a copy. This 
+            saves the work when the response is only passed on. None uses the
+            client's raw setting. The default is None.
+            
+        :param timeout: (optional) See :meth:`get`.
+            
         :returns: A 2-tuple: (response headers, response body). 
         
             Response headers is a dict with the HTTP headers of the response. 
@@ -215,24 +797,22 @@ class Client:
             
         :raises APIRequestError: Any error generated by the Coinbase Pro API 
             server.
+            
+        :raises asyncio.TimeoutError: The request's time budget ran out.
         """
         # Coinbase doesn't like ':' urlencoded
         qs = '?{}'.format(urllib.parse.urlencode(params, safe=':')) if params else ''
         url = self.url + path + qs
         req_headers = self._get_auth_headers(path + qs, 'DELETE') if auth else HEADERS
         
-        resp = await self.session.delete(url, headers=req_headers)
-        
-        if int(resp.status) >= 400:
-            await self._handle_error(resp)
-        
-        body = await resp.json()
-        headers = dict(resp.headers)
-        
-        return (headers, body)
+        return await self._send('DELETE', path, 
+                                lambda **kwargs: self.lanes[lane].session.delete(
+                                    url, headers=req_headers, **kwargs),
+                                self.raw if raw is None else raw, timeout)
         
 
-    async def get(self, path='/', params=None, auth=False):
+    async def get(self, path='/', params=None, auth=False, lane='default', 
+                  raw=None, hedge=None, timeout=None):
         """Base method for making GET requests.
         
         :param str path: (optional) The path not including the base URL of the
@@ -244,6 +824,26 @@ class Client:
         :param boolean auth: (optional) Indicates whether or not this request 
             needs to be authenticated. The default is False.
             
+        :param str lane: (optional) The lane, default or priority, to send the
+            request in. The default is default.
+            
+        :param bool raw: (optional) If True, the response is returned without
+            decoding: the body as bytes and the headers as the response's 
+            read-only, case-insensitive header view rather than a copy. This 
+            saves the work when the response is only passed on. None uses the
+            client's raw setting. The default is None.
+            
+        :param bool hedge: (optional) If False, the request is never hedged.
+            None hedges it if :meth:`enable_hedging` has been called. The 
+            default is None.
+            
+        :param timeout: (optional) The time budget of the request: a number
+            of seconds or a :class:`copra.rest.timeouts.Deadline` shared with
+            other requests. If the budget runs out the request is cancelled,
+            its connection closed, and asyncio.TimeoutError raised. None uses
+            the client's timeout settings. The default is None.
+        :type timeout: float or Deadline
+            
         :returns: A 2-tuple: (response headers, response body). 
         
             Response headers is a dict with the HTTP headers of the response. 
@@ -251,6 +851,26 @@ class Client:
             
         :raises APIRequestError: Any error generated by the Coinbase Pro API 
             server.
+            
+        :raises asyncio.TimeoutError: The request's time budget ran out.
+        """
+        return await self._send('GET', path, 
+                                lambda **kwargs: self._get_response(
+                                    path, params, auth, lane, hedge, **kwargs),
+                                self.raw if raw is None else raw, timeout)
+        
+        
+    async def _get_response(self, path='/', params=None, auth=False, 
+                            lane='default', hedge=None, timeout=None,
+                            trace_request_ctx=None):
+        """Send a GET request and return the response unread.
+        
+        See :meth:`get` for the parameters, except that timeout is an 
+        aiohttp.ClientTimeout. trace_request_ctx is an optional 
+        :class:`copra.rest.tracing.RequestTrace`. The caller must release the
+        response.
+        
+        :returns: The aiohttp.ClientResponse.
         """
         if not params:
             params = {}
@@ -264,29 +884,53 @@ class Client:
         qs = '?{}'.format(urllib.parse.urlencode(params, safe=':')) if params else ''
         url = self.url + path + qs
         req_headers = self._get_auth_headers(path + qs) if auth else HEADERS
-        resp = await self.session.get(url, headers=req_headers)
-        
-        if int(resp.status) >= 400:
-            await self._handle_error(resp)
-        
-        body = await resp.json()
-        headers = dict(resp.headers)
-        
-        return (headers, body)
-        
-        
-    async def post(self, path='/', data=None, auth=False):
+        session = self.lanes[lane].session
+        kwargs = {'timeout': timeout} if timeout else {}
+        if self.hedger is None or hedge is False:
+            return await session.get(url, headers=req_headers, 
+                                     trace_request_ctx=trace_request_ctx,
+                                     **kwargs)
+                                     
+        # Only the original request is traced, not its hedge.
+        traces = [trace_request_ctx]
+        limiter = self.private_limiter if auth else self.public_limiter
+        hedges = self.hedger.stats['hedges']
+        try:
+            return await self.hedger.request(
+                lambda: session.get(url, headers=req_headers, 
+                                    trace_request_ctx=traces.pop() if traces else None,
+                                    **kwargs), limiter)
+        finally:
+            if self.metrics is not None and self.hedger.stats['hedges'] > hedges:
+                self.metrics.hedges.inc(endpoint('GET', path))
+        
+        
+    async def post(self, path='/', data=None, auth=False, lane='default',
+                   raw=None, timeout=None):
         """Base method for making POST requests.
         
         :param str path: (optional) The path not including the base URL of the
             resource to be POST'ed to. The default is '/'
             
-        :param dict data: (optional) Dictionary of key/value str pairs
-            to be sent in the body of the request. The default is None.
+        :param data: (optional) Dictionary of key/value str pairs
+            to be sent in the body of the request, or a body that is already
+            JSON encoded. The default is None.
+        :type data: dict or bytes
             
         :param boolean auth: (optional) Indicates whether or not this request 
             needs to be authenticated. The default is False.
             
+        :param str lane: (optional) The lane, default or priority, to send the
+            request in. The default is default.
+            
+        :param bool raw: (optional) If True, the response is returned without
+            decoding: the body as bytes and the headers as the response's 
+            read-only, case-insensitive header view rather than a copy. This 
+            saves the work when the response is only passed on. None uses the
+            client's raw setting. The default is None.
+            
+        :param timeout: (optional) See :meth:`get`.
+            
         :returns: A 2-tuple: (response headers, response body). 
         
             Response headers is a dict with the HTTP headers of the response. 
@@ -294,23 +938,21 @@ class Client:
             
         :raises APIRequestError: Any error generated by the Coinbase Pro API 
             server.
+            
+        :raises asyncio.TimeoutError: The request's time budget ran out.
         """
-        data = json.dumps(data) if data else ''
+        if not isinstance(data, bytes):
+            data = json.dumps(data) if data else ''
         url = self.url + path
         req_headers = self._get_auth_headers(path, 'POST', data) if auth else HEADERS
             
-        resp = await self.session.post(url, data=data, headers=req_headers)
-        
-        if int(resp.status) >= 400:
-            await self._handle_error(resp)
-            
-        body = await resp.json()
-        headers = dict(resp.headers)
-        
-        return (headers, body)
+        return await self._send('POST', path, 
+                                lambda **kwargs: self.lanes[lane].session.post(
+                                    url, data=data, headers=req_headers, **kwargs),
+                                self.raw if raw is None else raw, timeout)
             
             
-    async def products(self):
+    async def products(self, timeout=None):
         """Get a list of available currency pairs for trading.
         
         The base_min_size and base_max_size fields define the min and max order 
@@ -324,6 +966,11 @@ class Client:
         .. note:: Product ID will not change once assigned to a product but 
             the min/max/quote sizes can be updated in the future.
         
+        :param timeout: (optional) The time budget of the request, in seconds
+            or as a :class:`copra.rest.timeouts.Deadline`. See :meth:`get`. 
+            The default is None.
+        :type timeout: float or Deadline
+            
         :returns: A list of dicts representing the currency pairs available
             for trading.
 
@@ -353,11 +1000,94 @@ class Client:
         :raises APIRequestError: Any error generated by the Coinbase Pro API 
             server.
         """
-        headers, body = await self.get('/products')
+        headers, body = await self.get('/products', timeout=timeout)
         return body
 
         
-    async def order_book(self, product_id, level=1):
+    async def load_products(self, timeout=None):
+        """Fetch the product list and cache each product's trading rules.
+        
+        The cached rules are used by :meth:`limit_order`, :meth:`market_order`
+        and :meth:`place_orders` to validate orders locally when asked to. They
+        are loaded automatically the first time they are needed. Call this 
+        method to refresh them.
+        
+        :param timeout: (optional) The time budget of the request, in seconds
+            or as a :class:`copra.rest.timeouts.Deadline`. See :meth:`get`. 
+            The default is None.
+        :type timeout: float or Deadline
+            
+        :returns: A dict of :class:`copra.rest.products.ProductRules` keyed by 
+            product id.
+        
+        :raises APIRequestError: Any error generated by the Coinbase Pro API 
+            server.
+        """
+        headers, products = await self.get('/products', raw=False, timeout=timeout)
+        self.product_rules = {product['id']: ProductRules(product) 
+                              for product in products}
+        return self.product_rules
+        
+        
+    async def _get_product_rules(self, product_id, timeout=None):
+        """Get the cached trading rules of a product, loading them if needed.
+        
+        :param str product_id: The product id.
+        
+        :returns: The product's :class:`copra.rest.products.ProductRules`.
+        
+        :raises ValueError: The product id is unknown.
+        """
+        cached = product_id in self.product_rules
+        if self.metrics is not None:
+            self.metrics.cache.inc('product_rules', 'hit' if cached else 'miss')
+        if not cached:
+            await self.load_products(timeout=timeout)
+        try:
+            return self.product_rules[product_id]
+        except KeyError:
+            raise ValueError('Unknown product_id: {}'.format(product_id)) from None
+            
+            
+    async def _validate_order(self, data, validate, timeout=None):
+        """Check an order against its product's cached trading rules.
+        
+        :param dict data: The body of a limit or market order request, as 
+            built by _limit_order_data or _market_order_data. Prices, sizes 
+            and funds are replaced with the (possibly rounded) decimal strings
+            that passed.
+            
+        :param validate: True to raise on any violation, or round to round 
+            values to the product's increments first.
+            
+        :raises ValueError: validate is not True or round, or the order breaks
+            one of the product's rules.
+        """
+        if validate not in (True, 'round'):
+            raise ValueError(
+                "Invalid validate: {}. Must be True, False or round.".format(validate))
+                
+        rules = await self._get_product_rules(data['product_id'], timeout=timeout)
+        round_values = validate == 'round'
+        
+        if data['type'] == 'limit':
+            data['price'], data['size'], stop_price = rules.check_limit(
+                data['side'], data['price'], data['size'], data['post_only'],
+                data.get('stop_price'), round_values)
+        else:
+            size, funds, stop_price = rules.check_market(
+                data['side'], data.get('size'), data.get('funds'), 
+                data.get('stop_price'), round_values)
+            if size:
+                data['size'] = size
+            if funds:
+                data['funds'] = funds
+                
+        if stop_price:
+            data['stop_price'] = stop_price
+            
+        
+    async def order_book(self, product_id, level=1, as_array=False, timeout=None):
         """Get a list of open orders for a product. 
         
         By default, only the inside (i.e. best) bid and ask are returned. This 
@@ -402,6 +1132,17 @@ class Client:
         :param int level: (optional) The level customizes the amount of detail 
             shown. See bove for more detail. The default is 1.
             
+        :param bool as_array: (optional) If True, bids and asks are each 
+            returned as a structured NumPy array with the fields price, size 
+            and num_orders (levels 1 and 2) or order_id (level 3), or as a 
+            dict of array.array columns if NumPy isn't installed. See 
+            :func:`copra.rest.columns.levels_to_columns`. The default is False.
+            
+        :param timeout: (optional) The time budget of the request, in seconds
+            or as a :class:`copra.rest.timeouts.Deadline`. See :meth:`get`. 
+            The default is None.
+        :type timeout: float or Deadline
+            
         :returns: A dict representing the order book for the product id
             specified. The layout of the dict will vary based on the level. See
             the examples below.
@@ -450,11 +1191,102 @@ class Client:
             raise ValueError("level must be 1, 2, or 3")    
             
         headers, body = await self.get('/products/{}/book'.format(product_id), 
-                                       params={'level': level})
+                                       params={'level': level}, 
+                                       raw=False if as_array else None,
+                                       timeout=timeout)
+        if as_array:
+            body['bids'] = levels_to_columns(body['bids'], level)
+            body['asks'] = levels_to_columns(body['asks'], level)
         return body
+        
+        
+    async def order_book_stream(self, product_id, level=3, chunk_size=65536,
+                                timeout=None):
+        """Get an order book, decoding its levels as they are received.
+        
+        :meth:`order_book` buffers and decodes the whole response before 
+        returning. For a level 3 book that can be tens of megabytes and a 
+        large spike in memory. This method returns once the response headers
+        have arrived, and the bids and asks can then be consumed as they
+        stream in.
+        
+        Example::
+        
+            stream = await client.order_book_stream('BTC-USD')
+            async for side, (price, size, order_id) in stream:
+                ...
+            print(stream.sequence)
+            
+        :param str product_id: The product id of the order book.
+        
+        :param int level: (optional) See :meth:`order_book`. The default is 3.
+        
+        :param int chunk_size: (optional) The maximum number of bytes read at
+            a time. The default is 65536.
+            
+        :param timeout: (optional) The time budget of the request, in seconds
+            or as a :class:`copra.rest.timeouts.Deadline`, including reading 
+            the whole book. See :meth:`get`. The default is None.
+        :type timeout: float or Deadline
+            
+        :returns: A :class:`copra.rest.orderbook.OrderBookStream` that yields
+            (side, level) 2-tuples, all bids first and then all asks. side is 
+            bids or asks, and level is a list as in :meth:`order_book`.
+            
+        :raises ValueError: level not 1, 2, or 3.
+        
+        :raises APIRequestError: Any error generated by the Coinbase Pro API 
+            server.
+            
+        .. note:: The request goes through the circuit breakers, tracing and
+            metrics like any other, but counts as finished once the response
+            headers have arrived. Time spent reading the book isn't included.
+        """
+        if level not in (1, 2, 3):
+            raise ValueError("level must be 1, 2, or 3")
+            
+        async def open_stream(resp, raw):
+            if int(resp.status) >= 400:
+                try:
+                    await self._handle_error(resp)
+                finally:
+                    resp.release()
+            return OrderBookStream(resp, chunk_size)
+            
+        path = '/products/{}/book'.format(product_id)
+        return await self._send('GET', path, 
+                                lambda **kwargs: self._get_response(
+                                    path, {'level': level}, **kwargs),
+                                False, timeout, open_stream)
+        
+        
+    async def order_book_array(self, product_id, level=3, timeout=None):
+        """Get an order book as compact arrays of prices and sizes.
+        
+        The book is streamed with :meth:`order_book_stream` straight into an
+        :class:`copra.rest.orderbook.ArrayBook`, so the full decoded response
+        is never held in memory. Prices and sizes are stored as floats.
+        
+        :param str product_id: The product id of the order book.
+        
+        :param int level: (optional) See :meth:`order_book`. The default is 3.
+        
+        :param timeout: (optional) See :meth:`order_book_stream`. The default
+            is None.
+        :type timeout: float or Deadline
+        
+        :returns: A :class:`copra.rest.orderbook.ArrayBook`.
+        
+        :raises ValueError: level not 1, 2, or 3.
+        
+        :raises APIRequestError: Any error generated by the Coinbase Pro API 
+            server.
+        """
+        stream = await self.order_book_stream(product_id, level, timeout=timeout)
+        return await ArrayBook(level).fill(stream)
  
         
-    async def ticker(self, product_id):
+    async def ticker(self, product_id, timeout=None):
         """Get information about the last trade for a specific product.
 
         .. note:: Polling is discouraged in favor of connecting via the 
@@ -462,6 +1294,11 @@ class Client:
             
         :param str product_id: The product id of the tick to be retrieved.
             
+        :param timeout: (optional) The time budget of the request, in seconds
+            or as a :class:`copra.rest.timeouts.Deadline`. See :meth:`get`. 
+            The default is None.
+        :type timeout: float or Deadline
+            
         :returns: A dict containing information about the last trade (tick) for
            the product.
            
@@ -480,11 +1317,13 @@ class Client:
         :raises APIRequestError: Any error generated by the Coinbase Pro API 
             server.
         """
-        header, body = await self.get('/products/{}/ticker'.format(product_id))
+        header, body = await self.get('/products/{}/ticker'.format(product_id),
+                                      timeout=timeout)
         return body
 
         
-    async def trades(self, product_id, limit=100, before=None, after=None):
+    async def trades(self, product_id, limit=100, before=None, after=None,
+                     records=False, as_array=False, timeout=None):
         """List the latest trades for a product.
         
         The trade side indicates the maker order side. The maker order is the 
@@ -507,6 +1346,20 @@ class Client:
         :param int after: (optional) The after cursor value. The default is 
             None. 
             
+        :param bool records: (optional) If True, trades are returned as 
+            :class:`copra.rest.records.Trade` records with numeric price and
+            size. The default is False.
+            
+        :param bool as_array: (optional) If True, trades are returned as a 
+            structured NumPy array, or a dict of array.array columns if NumPy 
+            isn't installed. See :func:`copra.rest.columns.trades_to_columns`.
+            The default is False.
+            
+        :param timeout: (optional) The time budget of the request, in seconds
+            or as a :class:`copra.rest.timeouts.Deadline`. See :meth:`get`. 
+            The default is None.
+        :type timeout: float or Deadline
+            
         :returns: A 3-tuple: (trades, before cursor, after cursor)
             
             trades is a list of dicts representing trades for the 
@@ -551,11 +1404,98 @@ class Client:
             params.update({'after': after})
             
         headers, body = await self.get('/products/{}/trades'.format(product_id),
-                                       params)
+                                       params, 
+                                       raw=False if records or as_array else None,
+                                       timeout=timeout)
+        if records:
+            body = [Trade.from_dict(trade) for trade in body]
+        elif as_array:
+            body = trades_to_columns(body)
         return (body, headers.get('cb-before', None), headers.get('cb-after', None))
 
         
-    async def historic_rates(self, product_id, granularity=3600, start=None, stop=None):
+    async def backfill_trades(self, product_id, start_id, sink, end_id=None, 
+                              checkpoint=None, segment_size=10000, 
+                              concurrency=4, timeout=None):
+        """Fetch every trade of a product in a trade id range, in parallel.
+        
+        The range is split into segments of segment_size trade ids and up to
+        concurrency segments are paged through at once. Each page request 
+        waits for a token from the client's public rate limiter. As segments
+        finish they are passed to sink in trade id order, without duplicates.
+        
+        Example::
+        
+            from copra.rest.backfill import JSONLinesSink
+            
+            stats = await client.backfill_trades(
+                'BTC-USD', 50000000, JSONLinesSink('btc-usd.jsonl'),
+                checkpoint='btc-usd.checkpoint')
+                
+        :param str product_id: The product whose trades are fetched.
+        
+        :param int start_id: The first trade id to fetch.
+        
+        :param sink: A callable, or coroutine function, called with each 
+            finished segment's trades as a list of dicts in ascending trade 
+            id order. See :class:`copra.rest.backfill.JSONLinesSink`.
+            
+        :param int end_id: (optional) The last trade id to fetch. None fetches
+            up to the product's latest trade. The default is None.
+            
+        :param str checkpoint: (optional) A file to record progress in. If a 
+            backfill of the same product and range is interrupted, calling 
+            this again with the same checkpoint resumes it. With end_id None 
+            the range ends at the latest trade when the backfill first ran.
+            The default is None.
+            
+        :param int segment_size: (optional) The number of trade ids in each 
+            segment. The default is 10000.
+            
+        :param int concurrency: (optional) The number of segments fetched at 
+            once. The default is 4.
+            
+        :param timeout: (optional) The time budget shared by every request 
+            this makes, in seconds or as a :class:`copra.rest.timeouts.Deadline`.
+            See :meth:`get`. If it runs out, the trades already passed to the
+            sink are in the checkpoint. The default is None.
+        :type timeout: float or Deadline
+            
+        :returns: A dict with the number of pages requested, the number of 
+            trades passed to the sink, and the elapsed time in seconds.
+            
+            Example::
+            
+                {'pages': 402, 'trades': 40000, 'elapsed': 134.2}
+                
+        :raises ValueError: start_id is greater than end_id, or segment_size
+            or concurrency is less than 1.
+            
+        :raises APIRequestError: Any error generated by the Coinbase Pro API 
+            server.
+        """
+        timeout = self._deadline(timeout)
+        if end_id is None and checkpoint and os.path.exists(checkpoint):
+            with open(checkpoint) as f:
+                state = json.load(f)
+            if state.get('product_id') == product_id and state.get('start_id') == start_id:
+                end_id = state['end_id']
+                
+        if end_id is None:
+            headers, latest = await self.get('/products/{}/trades'.format(product_id),
+                                             {'limit': 1}, raw=False,
+                                             timeout=timeout)
+            end_id = latest[0]['trade_id'] if latest else start_id - 1
+            if end_id < start_id:
+                return {'pages': 0, 'trades': 0, 'elapsed': 0.0}
+                
+        backfill = TradeBackfill(self, product_id, start_id, end_id, sink, 
+                                 checkpoint, segment_size, concurrency, timeout)
+        return await backfill.run()
+        
+        
+    async def historic_rates(self, product_id, granularity=3600, start=None, stop=None,
+                             records=False, as_array=False, timeout=None):
         """Get historic rates for a product. 
         
         Rates are returned in grouped buckets based on the requested granularity.
@@ -592,7 +1532,20 @@ class Client:
         :param str stop: (optional) The end time as a str in ISO 8601 format. 
             This field is optional. If it is set then start must be set as well. 
             If it is not set, stop will default to now().
+            
+        :param bool records: (optional) If True, buckets are returned as 
+            :class:`copra.rest.records.Candle` records. The default is False.
+            
+        :param bool as_array: (optional) If True, buckets are returned as a 
+            structured NumPy array, or a dict of array.array columns if NumPy 
+            isn't installed. See :func:`copra.rest.columns.candles_to_columns`.
+            The default is False.
         
+        :param timeout: (optional) The time budget of the request, in seconds
+            or as a :class:`copra.rest.timeouts.Deadline`. See :meth:`get`. 
+            The default is None.
+        :type timeout: float or Deadline
+            
         :returns: A list of lists where each list item is a "bucket" 
             representing a timeslice of length granularity. The fields of the
             bucket are: [ time, low, high, open, close, volume ]
@@ -635,18 +1588,30 @@ class Client:
             params.update({'start': start, 'stop': stop})
             
         headers, body = await self.get('/products/{}/candles'.format(product_id),
-                                       params=params)
+                                       params=params, 
+                                       raw=False if (start and stop) or records or as_array 
+                                           else None,
+                                       timeout=timeout)
                                        
         if start and stop:
-            return [x for x in body if x[0] >= dateutil.parser.parse(start).timestamp()]
+            body = [x for x in body if x[0] >= dateutil.parser.parse(start).timestamp()]
+        if records:
+            body = [Candle.from_list(candle) for candle in body]
+        elif as_array:
+            body = candles_to_columns(body)
         return body
 
        
-    async def get_24hour_stats(self, product_id):
+    async def get_24hour_stats(self, product_id, timeout=None):
         """Get 24 hr stats for a product.
         
         :param str product_id: The product id.
         
+        :param timeout: (optional) The time budget of the request, in seconds
+            or as a :class:`copra.rest.timeouts.Deadline`. See :meth:`get`. 
+            The default is None.
+        :type timeout: float or Deadline
+            
         :returns: A dict of stats for the product including: open, high, low,
             volume, last price, and 30 day volume.
             
@@ -664,11 +1629,12 @@ class Client:
         :raises APIRequestError: Any error generated by the Coinbase Pro API 
             server.
         """
-        headers, body = await self.get('/products/{}/stats'.format(product_id))
+        headers, body = await self.get('/products/{}/stats'.format(product_id),
+                                       timeout=timeout)
         return body
 
         
-    async def currencies(self):
+    async def currencies(self, timeout=None):
         """List known currencies.
         
         Currency codes will conform to the ISO 4217 standard where possible. 
@@ -677,6 +1643,11 @@ class Client:
         
         .. note:: Not all currencies may be currently in use for trading.
         
+        :param timeout: (optional) The time budget of the request, in seconds
+            or as a :class:`copra.rest.timeouts.Deadline`. See :meth:`get`. 
+            The default is None.
+        :type timeout: float or Deadline
+            
         :returns: A list of dicts where each dict contains information about a
             currency.
             
@@ -699,13 +1670,18 @@ class Client:
         :raises APIRequestError: Any error generated by the Coinbase Pro API 
             server.
         """
-        headers, body = await self.get('/currencies')
+        headers, body = await self.get('/currencies', timeout=timeout)
         return body
 
         
-    async def server_time(self):
+    async def server_time(self, timeout=None):
         """Get the API server time.
         
+        :param timeout: (optional) The time budget of the request, in seconds
+            or as a :class:`copra.rest.timeouts.Deadline`. See :meth:`get`. 
+            The default is None.
+        :type timeout: float or Deadline
+            
         :returns: A dict with two fields: iso and epoch. iso is an ISO 8601 str,
             and epoch is a float. Both represent the current time at the API
             server.
@@ -720,11 +1696,11 @@ class Client:
         :raises APIRequestError: Any error generated by the Coinbase Pro API 
             server.
         """
-        headers, body = await self.get('/time')
+        headers, body = await self.get('/time', timeout=timeout)
         return body
 
         
-    async def accounts(self):
+    async def accounts(self, timeout=None):
         """Get a list of Coinbase Pro trading accounts.
         
         .. admonition:: Authorization
@@ -733,6 +1709,11 @@ class Client:
             This method requires authorization. The API key must have either the 
             "view" or "trade" permission.
         
+        :param timeout: (optional) The time budget of the request, in seconds
+            or as a :class:`copra.rest.timeouts.Deadline`. See :meth:`get`. 
+            The default is None.
+        :type timeout: float or Deadline
+            
         :returns: A list of dicts where each dict contains information about
             a trading a account.
             
@@ -755,11 +1736,11 @@ class Client:
         :raises APIRequestError: Any error generated by the Coinbase Pro API 
             server.
         """
-        headers, body = await self.get('/accounts', auth=True)
+        headers, body = await self.get('/accounts', auth=True, timeout=timeout)
         return body
 
        
-    async def account(self, account_id):
+    async def account(self, account_id, timeout=None):
         """Retrieve information for a single account. 
         
         .. admonition:: Authorization
@@ -770,6 +1751,11 @@ class Client:
             
         :param str account_id: The account id.
             
+        :param timeout: (optional) The time budget of the request, in seconds
+            or as a :class:`copra.rest.timeouts.Deadline`. See :meth:`get`. 
+            The default is None.
+        :type timeout: float or Deadline
+            
         :returns: A dict of account information.
         
             Example::
@@ -788,11 +1774,13 @@ class Client:
         :raises APIRequestError: Any error generated by the Coinbase Pro API 
             server.
         """
-        headers, body = await self.get('/accounts/{}'.format(account_id), auth=True)
+        headers, body = await self.get('/accounts/{}'.format(account_id), auth=True,
+                                       timeout=timeout)
         return body
 
       
-    async def account_history(self, account_id, limit=100, before=None, after=None):
+    async def account_history(self, account_id, limit=100, before=None, after=None,
+                              records=False, timeout=None):
         """Retrieve a list account activity.
         
         Account activity includes transactions that either increase or decrease 
@@ -818,7 +1806,16 @@ class Client:
         
         :param int after: (optional) The after cursor value. The default is 
             None.
+            
+        :param bool records: (optional) If True, entries are returned as 
+            :class:`copra.rest.records.LedgerEntry` records with numeric 
+            amount and balance. The default is False.
         
+        :param timeout: (optional) The time budget of the request, in seconds
+            or as a :class:`copra.rest.timeouts.Deadline`. See :meth:`get`. 
+            The default is None.
+        :type timeout: float or Deadline
+            
         :returns: A 3-tuple (results, before cursor, after cursor)
             
             results is a list of dicts each representing an instance of
@@ -883,11 +1880,16 @@ class Client:
             params.update({'after': after})
             
         headers, body = await self.get('/accounts/{}/ledger'.format(account_id), 
-                                       params=params, auth=True)
+                                       params=params, auth=True, 
+                                       raw=False if records else None,
+                                       timeout=timeout)
+        if records:
+            body = [LedgerEntry.from_dict(entry) for entry in body]
         return (body, headers.get('cb-before', None), headers.get('cb-after', None))
 
         
-    async def holds(self, account_id, limit=100, before=None, after=None):
+    async def holds(self, account_id, limit=100, before=None, after=None,
+                    timeout=None):
         """Get any existing holds on an account.
         
         Holds are placed on an account for any active orders or pending withdraw 
@@ -915,6 +1917,11 @@ class Client:
         
         :param int after: (optional) The after cursor value. The default is 
             
+        :param timeout: (optional) The time budget of the request, in seconds
+            or as a :class:`copra.rest.timeouts.Deadline`. See :meth:`get`. 
+            The default is None.
+        :type timeout: float or Deadline
+            
         :returns: A 3-tuple (holds, before cursor, after cursor)
             
             holds is a list of dicts where each dict represents a hold on the
@@ -957,14 +1964,75 @@ class Client:
             params['after'] = after
             
         headers, body = await self.get('/accounts/{}/holds'.format(account_id), 
-                                       params=params, auth=True)
+                                       params=params, auth=True, timeout=timeout)
         return (body, headers.get('cb-before', None), headers.get('cb-after', None))
         
     
+    def _limit_order_data(self, side, product_id, price, size, time_in_force='GTC',
+                          cancel_after=None, post_only=False, client_oid=None,
+                          stp='dc', stop=None, stop_price=None):
+        """Validate the parameters of a limit order and build its request body.
+        
+        See :meth:`limit_order` for the parameters and the errors raised.
+        
+        :returns: A dict to be sent as the body of the order request.
+        """
+        if side not in ('buy', 'sell'):
+            raise ValueError("Invalid side: {}. Must be either buy or sell".format(side))
+            
+        if time_in_force not in ('GTC', 'GTT', 'IOC', 'FOK'):
+            raise ValueError('time_in_force must be GTC, GCC, IOC or FOK.')
+            
+        if time_in_force == 'GTT' and not cancel_after:
+            raise ValueError('cancel_after required for GTT time_in_force.')
+            
+        if cancel_after and cancel_after not in ('min', 'hour', 'day'):
+            raise ValueError('cancel_after must be min, hour, or day.')
+            
+        if cancel_after and not time_in_force == 'GTT':
+            raise ValueError('cancel_after requires time_in_force to be GTT.')
+            
+        if (time_in_force == 'IOC' or time_in_force == 'FOK') and post_only:
+            raise ValueError(
+                'post_only must be False for time_in_force {}'.format(time_in_force))
+                
+        if stp not in ('dc', 'co', 'cn', 'cb'):
+            raise ValueError('Invalid stp: {}. Must be dc, co, cn, or cb.'.format(stp))
+            
+        if stop and stop not in ('loss', 'entry'):
+            raise ValueError("Invalid stop: {}. Must be either loss or entry.".format(stop))
+
+        if stop and not stop_price:
+            raise ValueError("Stop orders must have stop_price set.")
+            
+        if stop_price and not stop:
+            raise ValueError("Stop orders must have the stop parameter set.")
+            
+        if stop and post_only:
+            raise ValueError("post_only must be False for stop orders.")
+            
+        data = {'type': 'limit', 'side': side, 'product_id': product_id, 
+                'price': price, 'size': size, 'time_in_force': time_in_force, 
+                'post_only': post_only, 'stp': stp}
+                
+        if cancel_after:
+            data['cancel_after'] = cancel_after
+            
+        if client_oid:
+            data['client_oid'] = client_oid
+            
+        if stop:
+            data['stop'] = stop
+            data['stop_price'] = stop_price
+            
+        return data
+        
+        
     async def limit_order(self, side, product_id, price, size, 
                           time_in_force='GTC', cancel_after=None, 
                           post_only=False, client_oid=None, stp='dc',
-                          stop=None, stop_price=None):
+                          stop=None, stop_price=None, validate=False,
+                          timeout=None):
         """Place a limit order or a stop entry/loss limit order.
 
         .. admonition:: Authorization
@@ -1012,6 +2080,21 @@ class Client:
             Required if stop is set. This may also be a string. The default is 
             None. 
             
+        :param validate: (optional) If True, the price, stop_price and size 
+            are checked against the product's cached trading rules (see 
+            :meth:`load_products`) before the order is sent: the prices must
+            be multiples of quote_increment and the size a multiple of 
+            base_increment between base_min_size and base_max_size. If round,
+            prices are rounded to quote_increment, down for buys and up for 
+            sells, and the size is rounded down instead of raising on those
+            violations. The default is False.
+        :type validate: bool or str
+            
+        :param timeout: (optional) The time budget shared by every request 
+            this makes, in seconds or as a :class:`copra.rest.timeouts.Deadline`.
+            See :meth:`get`. The default is None.
+        :type timeout: float or Deadline
+            
         .. warning:: As of 11/18, sending anything other than dc for stp while
             testing in Coinbase Pro's sandbox yields an APIRequestError 
             "Invalid stp..." even though the Coinbase API documentation claims
@@ -1058,50 +2141,134 @@ class Client:
             * A stop order does not have stop_price set.
             * stop_price is set but stop is not
             * A stop_order has post_only set to True
+            * validate is set and the order breaks the product's trading rules
+              or the product is unknown.
   
         :raises APIRequestError: Any error generated by the Coinbase Pro API 
             server.
         """
-        if side not in ('buy', 'sell'):
-            raise ValueError("Invalid side: {}. Must be either buy or sell".format(side))
+        timeout = self._deadline(timeout)
+        data = self._limit_order_data(side, product_id, price, size, time_in_force, 
+                                       cancel_after, post_only, client_oid, stp, 
+                                       stop, stop_price)
+        
+        if validate:
+            await self._validate_order(data, validate, timeout=timeout)
             
-        if time_in_force not in ('GTC', 'GTT', 'IOC', 'FOK'):
-            raise ValueError('time_in_force must be GTC, GCC, IOC or FOK.')
+        headers, body = await self.post('/orders', data=data, auth=True, 
+                                        lane='priority', timeout=timeout)
+        return body
+
+
+    async def order_template(self, side, product_id, time_in_force='GTC', 
+                             cancel_after=None, post_only=False, stp='dc', 
+                             validate=False, timeout=None):
+        """Create a template for quickly placing repeated limit orders.
+        
+        The order parameters are checked once, when the template is created,
+        and the fixed part of the request body is serialized once. Each order 
+        placed from the template only fills in its price, size and client_oid.
+        This is meant for re-quoting the same product many times a second.
+        
+        Example::
+        
+            bid = await client.order_template('buy', 'BTC-USD', post_only=True)
+            order = await bid.place('3500.12', '0.01')
             
-        if time_in_force == 'GTT' and not cancel_after:
-            raise ValueError('cancel_after required for GTT time_in_force.')
+        .. admonition:: Authorization
+            :class: attention
             
-        if cancel_after and cancel_after not in ('min', 'hour', 'day'):
-            raise ValueError('cancel_after must be min, hour, or day.')
+            Orders placed from the template require authorization. The API key
+            must have the "trade" permission.
+        
+        :param str side: Either buy or sell
+        
+        :param str product_id: The product id to be bought or sold.
+        
+        :param str time_in_force: (optional) See :meth:`limit_order`. The 
+            default is GTC.
             
-        if cancel_after and not time_in_force == 'GTT':
-            raise ValueError('cancel_after requires time_in_force to be GTT.')
+        :param str cancel_after: (optional) See :meth:`limit_order`. The 
+            default is None.
             
-        if (time_in_force == 'IOC' or time_in_force == 'FOK') and post_only:
-            raise ValueError(
-                'post_only must be False for time_in_force {}'.format(time_in_force))
+        :param bool post_only: (optional) See :meth:`limit_order`. The 
+            default is False.
+            
+        :param str stp: (optional) See :meth:`limit_order`. The default is dc.
+        
+        :param validate: (optional) If True or round, the product's trading
+            rules are loaded now and each order's price and size are checked, 
+            or rounded, against them as described in :meth:`limit_order`. The
+            default is False.
+        :type validate: bool or str
+        
+        :param timeout: (optional) The time budget of the request, in seconds
+            or as a :class:`copra.rest.timeouts.Deadline`. See :meth:`get`. 
+            The default is None.
+        :type timeout: float or Deadline
+            
+        .. note:: Stop orders can't be placed from a template. Use
+            :meth:`limit_order`.
+            
+        :returns: A :class:`copra.rest.templates.OrderTemplate`. Its 
+            place(price, size, client_oid=None, timeout=None) coroutine places
+            an order and returns the same dict as :meth:`limit_order`.
+            
+        :raises ValueError: Any of the parameters are invalid as described in
+            :meth:`limit_order`, validate is not True, False or round, or the
+            product is unknown.
+        """
+        data = self._limit_order_data(side, product_id, '0', '0', time_in_force,
+                                       cancel_after, post_only, None, stp)
+        del data['price']
+        del data['size']
+        
+        rules = None
+        if validate:
+            if validate not in (True, 'round'):
+                raise ValueError(
+                    "Invalid validate: {}. Must be True, False or round.".format(validate))
+            rules = await self._get_product_rules(product_id, timeout=timeout)
+            
+        return OrderTemplate(self, data, rules, validate == 'round')
+
+
+    def _market_order_data(self, side, product_id, size=None, funds=None,
+                           client_oid=None, stp='dc', stop=None, stop_price=None):
+        """Validate the parameters of a market order and build its request body.
+        
+        See :meth:`market_order` for the parameters and the errors raised.
+        
+        :returns: A dict to be sent as the body of the order request.
+        """
+        if side not in ('buy', 'sell'):
+            raise ValueError("Invalid side: {}. Must be either buy or sell".format(side))
+            
+        if not (size or funds):
+                raise ValueError('Market orders must have size or funds set.')
+                
+        if size and funds:
+                raise ValueError("Market orders can't have both size and funds set.")
                 
         if stp not in ('dc', 'co', 'cn', 'cb'):
             raise ValueError('Invalid stp: {}. Must be dc, co, cn, or cb.'.format(stp))
             
         if stop and stop not in ('loss', 'entry'):
             raise ValueError("Invalid stop: {}. Must be either loss or entry.".format(stop))
-
+            
         if stop and not stop_price:
             raise ValueError("Stop orders must have stop_price set.")
             
         if stop_price and not stop:
             raise ValueError("Stop orders must have the stop parameter set.")
-            
-        if stop and post_only:
-            raise ValueError("post_only must be False for stop orders.")
-            
-        data = {'type': 'limit', 'side': side, 'product_id': product_id, 
-                'price': price, 'size': size, 'time_in_force': time_in_force, 
-                'post_only': post_only, 'stp': stp}
                 
-        if cancel_after:
-            data['cancel_after'] = cancel_after
+        data = {'type': 'market', 'side': side, 'product_id': product_id, 'stp':stp}
+        
+        if size:
+            data['size'] = size
+            
+        if funds:
+            data['funds'] = funds
             
         if client_oid:
             data['client_oid'] = client_oid
@@ -1110,12 +2277,12 @@ class Client:
             data['stop'] = stop
             data['stop_price'] = stop_price
             
-        headers, body = await self.post('/orders', data=data, auth=True)
-        return body
-
-
+        return data
+        
+        
     async def market_order(self, side, product_id, size=None, funds=None,
-                         client_oid=None, stp='dc', stop=None, stop_price=None):
+                         client_oid=None, stp='dc', stop=None, stop_price=None,
+                         validate=False, timeout=None):
         """Place a market order or a stop entry/loss market order.
         
         .. admonition:: Authorization
@@ -1152,6 +2319,22 @@ class Client:
             Required if stop is set. This may also be a string. The default is 
             None.
             
+        :param validate: (optional) If True, the size, funds and stop_price
+            are checked against the product's cached trading rules (see 
+            :meth:`load_products`) before the order is sent: the size must be
+            a multiple of base_increment between base_min_size and 
+            base_max_size, funds a multiple of quote_increment between 
+            min_market_funds and max_market_funds, and the product must accept
+            market orders. If round, size and funds are rounded down and 
+            stop_price rounded to quote_increment instead of raising on 
+            increment violations. The default is False.
+        :type validate: bool or str
+            
+        :param timeout: (optional) The time budget shared by every request 
+            this makes, in seconds or as a :class:`copra.rest.timeouts.Deadline`.
+            See :meth:`get`. The default is None.
+        :type timeout: float or Deadline
+            
         .. warning:: As of 11/18, sending anything other than dc for stp while
             testing in Coinbase Pro's sandbox yields an APIRequestError 
             "Invalid stp..." even though the Coinbase API documentation claims
@@ -1161,7 +2344,7 @@ class Client:
         .. note:: To see a more detailed explanation of these parameters and to
             learn more about the order life cycle, please see the official 
             Coinbase Pro API documentation at: https://docs.gdax.com/#channels.
-        
+            
         :returns: A dict of information about the order.
         
             Example::
@@ -1192,51 +2375,165 @@ class Client:
             * stop is set to something other than loss or entry.
             * A stop order does not have stop_price set.
             * stop_price is set but stop is not
+            * validate is set and the order breaks the product's trading rules
+              or the product is unknown.
             
         :raises APIRequestError: Any error generated by the Coinbase Pro API 
             server.        
         """
-        if side not in ('buy', 'sell'):
-            raise ValueError("Invalid side: {}. Must be either buy or sell".format(side))
+        timeout = self._deadline(timeout)
+        data = self._market_order_data(side, product_id, size, funds, client_oid, 
+                                        stp, stop, stop_price)
+        
+        if validate:
+            await self._validate_order(data, validate, timeout=timeout)
             
-        if not (size or funds):
-                raise ValueError('Market orders must have size or funds set.')
-                
-        if size and funds:
-                raise ValueError("Market orders can't have both size and funds set.")
-                
-        if stp not in ('dc', 'co', 'cn', 'cb'):
-            raise ValueError('Invalid stp: {}. Must be dc, co, cn, or cb.'.format(stp))
+        headers, body = await self.post('/orders', data=data, auth=True, 
+                                        lane='priority', timeout=timeout)
+        return body
+
+
+    async def _order_spec_data(self, order, timeout=None):
+        """Validate an order spec and build its request body.
+        
+        :param dict order: The keyword arguments for :meth:`limit_order` or
+            :meth:`market_order`, plus an optional type key, either limit or
+            market, that picks which. The default type is limit. The dict is
+            not modified.
             
-        if stop and stop not in ('loss', 'entry'):
-            raise ValueError("Invalid stop: {}. Must be either loss or entry.".format(stop))
+        :returns: A dict to be sent as the body of the order request. It 
+            always includes a client_oid, generated if the spec has none.
             
-        if stop and not stop_price:
-            raise ValueError("Stop orders must have stop_price set.")
+        :raises ValueError: The type is not limit or market, or the order 
+            fails validation.
+        """
+        order = dict(order)
+        order_type = order.pop('type', 'limit')
+        validate = order.pop('validate', False)
+        if not order.get('client_oid'):
+            order['client_oid'] = str(uuid.uuid4())
+        try:
+            if order_type == 'limit':
+                data = self._limit_order_data(**order)
+            elif order_type == 'market':
+                data = self._market_order_data(**order)
+            else:
+                raise ValueError(
+                    'Invalid type: {}. Must be limit or market.'.format(order_type))
+        except TypeError as e:
+            raise ValueError(str(e)) from e
+        if validate:
+            await self._validate_order(data, validate, timeout=timeout)
+        return data
+        
+        
+    async def place_orders(self, orders, timeout=None):
+        """Place several orders concurrently.
+        
+        Every order is validated, by the same rules :meth:`limit_order` and 
+        :meth:`market_order` apply, before any is sent. Orders without a 
+        client_oid are given a random one so that each can be identified 
+        (and looked up later) even if its request fails. The orders are then
+        sent concurrently, paced by the client's private rate limiter so that 
+        the batch doesn't run into Coinbase Pro's rate limit. A failed order
+        doesn't stop the others.
+        
+        .. admonition:: Authorization
+            :class: attention
             
-        if stop_price and not stop:
-            raise ValueError("Stop orders must have the stop parameter set.")
+            This method requires authorization. The API key must have the 
+            "trade" permission.
+            
+        :param list orders: A list of dicts, each holding the keyword arguments
+            for :meth:`limit_order` or :meth:`market_order`. The optional key 
+            type, either limit or market, picks which. The default type is 
+            limit.
+            
+            Example::
+            
+                [
+                  {'side': 'buy', 'product_id': 'BTC-USD', 'price': '3500.00',
+                   'size': '0.01', 'post_only': True},
+                  {'type': 'market', 'side': 'sell', 'product_id': 'BTC-USD', 
+                   'funds': '100.00'}
+                ]
                 
-        data = {'type': 'market', 'side': side, 'product_id': product_id, 'stp':stp}
-        
-        if size:
-            data['size'] = size
+        :param timeout: (optional) The time budget shared by every request 
+            this makes, in seconds or as a :class:`copra.rest.timeouts.Deadline`.
+            See :meth:`get`. The default is None.
+        :type timeout: float or Deadline
             
-        if funds:
-            data['funds'] = funds
+        :returns: A 2-tuple: (results, elapsed)
+        
+            results is a list of dicts, one per order and in the same order. 
+            Each holds the client_oid of the order, the order dict returned by
+            the server or None if the request failed, the error raised or None
+            if it succeeded, the time in seconds spent waiting on the rate 
+            limiter, and the latency in seconds of the request itself. elapsed
+            is the wall time in seconds of the whole batch.
             
-        if client_oid:
-            data['client_oid'] = client_oid
+            Example::
             
-        if stop:
-            data['stop'] = stop
-            data['stop_price'] = stop_price
+                (
+                  [
+                    {
+                      'client_oid': 'a4e8bcd9-b4ef-4f53-b41c-9d4e1a87e4a4',
+                      'order': {'id': '97059421-3033-4cf4-99cb-925c1bf2c54f',
+                                'status': 'pending', ...},
+                      'error': None,
+                      'wait': 0.0,
+                      'latency': 0.0841
+                    },
+                    {
+                      'client_oid': '6d5e21b1-3f4b-4b63-a6d2-bb5f1e9b35f2',
+                      'order': None,
+                      'error': APIRequestError('Insufficient funds [400]'),
+                      'wait': 0.0,
+                      'latency': 0.0794
+                    }
+                  ],
+                  0.0852
+                )
+                
+        :raises ValueError:
+        
+            * The client is not configured for authorization.
+            * An order's type is not limit or market.
+            * An order fails validation. See :meth:`limit_order` and 
+              :meth:`market_order`. No order is sent.
+        """
+        timeout = self._deadline(timeout)
+        if not self.auth:
+            raise ValueError('client is not properly configured for authorization')
             
-        headers, body = await self.post('/orders', data=data, auth=True)
-        return body
-
-
-    async def cancel(self, order_id):
+        bodies = []
+        for index, order in enumerate(orders):
+            try:
+                bodies.append(await self._order_spec_data(order, timeout=timeout))
+            except ValueError as e:
+                raise ValueError('order {}: {}'.format(index, e)) from e
+                
+        async def place(data):
+            result = {'client_oid': data['client_oid'], 'order': None, 'error': None}
+            start = time.monotonic()
+            await self.private_limiter.acquire()
+            sent = time.monotonic()
+            try:
+                headers, result['order'] = await self.post('/orders', data=data, 
+                                                           auth=True, lane='priority',
+                                                           timeout=timeout)
+            except (APIRequestError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+                result['error'] = e
+            result['wait'] = sent - start
+            result['latency'] = time.monotonic() - sent
+            return result
+            
+        start = time.monotonic()
+        results = await asyncio.gather(*[place(data) for data in bodies])
+        return (list(results), time.monotonic() - start)
+        
+        
+    async def cancel(self, order_id, timeout=None):
         """Cancel a previously placed order.
 
         If the order had no matches during its lifetime its record may be 
@@ -1252,6 +2549,11 @@ class Client:
         :param str order_id: The id of the order to be cancelled. This is the 
             server-assigned order id and not the optional client_oid.
             
+        :param timeout: (optional) The time budget of the request, in seconds
+            or as a :class:`copra.rest.timeouts.Deadline`. See :meth:`get`. 
+            The default is None.
+        :type timeout: float or Deadline
+            
         :returns: A list consisting of a single string entry, the id of the 
             cancelled order.
             
@@ -1264,12 +2566,140 @@ class Client:
         :raises APIRequestError: Any error generated by the Coinbase Pro API 
             server.
         """
-        headers, body = await self.delete('/orders/{}'.format(order_id), auth=True)
+        headers, body = await self.delete('/orders/{}'.format(order_id), auth=True,
+                                          lane='priority', timeout=timeout)
         
         return body
         
         
-    async def cancel_all(self, product_id=None, stop=False):
+    async def replace_order(self, order_id, order, mode='cancel_first',
+                            timeout=None):
+        """Cancel an order and place another in its place.
+        
+        Re-quoting with :meth:`cancel` followed by :meth:`limit_order` always
+        costs two round trips. This method sends both requests through the 
+        priority lane, concurrently if the mode allows it, and reports both 
+        outcomes together. The mode decides what may happen if one of the two
+        requests fails or the exchange processes them out of order:
+        
+        * cancel_first: the new order is sent once the cancel has succeeded.
+          Both orders are never live at once, and if the cancel fails, e.g. 
+          because the old order has filled, the new order isn't sent. Costs 
+          two round trips.
+        * overlap: both requests are sent at once. Costs one round trip, but 
+          both orders can be live for a moment and each request succeeds or 
+          fails independently.
+        * new_first: the cancel is sent once the new order has been accepted.
+          There is always an order on the book, and if the new order is 
+          rejected the old one is left in place. Costs two round trips and 
+          both orders are live for one of them.
+          
+        Call :meth:`warmup` with lane priority beforehand so that neither 
+        request has to wait on a new connection.
+        
+        .. admonition:: Authorization
+            :class: attention
+            
+            This method requires authorization. The API key must have the 
+            "trade" permission.
+            
+        :param str order_id: The server-assigned id of the order to cancel.
+        
+        :param dict order: The keyword arguments for :meth:`limit_order` or 
+            :meth:`market_order` as described in :meth:`place_orders`.
+            
+        :param str mode: (optional) cancel_first, overlap or new_first. The 
+            default is cancel_first.
+            
+        :param timeout: (optional) The time budget shared by every request 
+            this makes, in seconds or as a :class:`copra.rest.timeouts.Deadline`.
+            See :meth:`get`. The default is None.
+        :type timeout: float or Deadline
+            
+        :returns: A dict with the outcome of each request and the elapsed 
+            wall time in seconds. Each outcome records whether the request was
+            sent, the server's response body or None, the error raised or 
+            None, and the request's latency in seconds. The new order's 
+            client_oid is included so that it can be looked up if its request
+            failed.
+            
+            Example::
+            
+                {
+                  'mode': 'overlap',
+                  'cancel': {
+                    'sent': True,
+                    'result': ['97059421-3033-4cf4-99cb-925c1bf2c54f'],
+                    'error': None,
+                    'latency': 0.0812
+                  },
+                  'order': {
+                    'client_oid': 'a4e8bcd9-b4ef-4f53-b41c-9d4e1a87e4a4',
+                    'sent': True,
+                    'result': {'id': '144c6f8e-713f-4682-8435-5280fbe8b2b4',
+                               'status': 'pending', ...},
+                    'error': None,
+                    'latency': 0.0841
+                  },
+                  'elapsed': 0.0843
+                }
+                
+        :raises ValueError:
+        
+            * The client is not configured for authorization.
+            * mode is not cancel_first, overlap or new_first.
+            * The new order fails validation. See :meth:`limit_order` and 
+              :meth:`market_order`. Nothing is sent.
+        """
+        timeout = self._deadline(timeout)
+        if not self.auth:
+            raise ValueError('client is not properly configured for authorization')
+            
+        if mode not in ('cancel_first', 'overlap', 'new_first'):
+            raise ValueError(
+                'Invalid mode: {}. Must be cancel_first, overlap or new_first.'.format(mode))
+                
+        data = await self._order_spec_data(order, timeout=timeout)
+        
+        cancel = {'sent': False, 'result': None, 'error': None, 'latency': None}
+        placed = {'client_oid': data['client_oid'], 'sent': False, 
+                  'result': None, 'error': None, 'latency': None}
+        
+        async def send(outcome, request):
+            outcome['sent'] = True
+            sent = time.monotonic()
+            try:
+                headers, outcome['result'] = await request
+            except (APIRequestError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+                outcome['error'] = e
+            outcome['latency'] = time.monotonic() - sent
+            return outcome['error'] is None
+            
+        def cancel_request():
+            return self.delete('/orders/{}'.format(order_id), auth=True, 
+                               lane='priority', timeout=timeout)
+            
+        def order_request():
+            return self.post('/orders', data=data, auth=True, lane='priority',
+                             timeout=timeout)
+            
+        start = time.monotonic()
+        if mode == 'cancel_first':
+            if await send(cancel, cancel_request()):
+                await send(placed, order_request())
+        elif mode == 'new_first':
+            if await send(placed, order_request()):
+                await send(cancel, cancel_request())
+        else:
+            await asyncio.gather(send(cancel, cancel_request()), 
+                                 send(placed, order_request()))
+                                 
+        return {'mode': mode, 'cancel': cancel, 'order': placed, 
+                'elapsed': time.monotonic() - start}
+                
+                
+    async def cancel_all(self, product_id=None, stop=False, timing=False,
+                         timeout=None):
         """Cancel "all" orders.
         
         The default behavior of this method (and the underlying Coinbase API 
@@ -1289,9 +2719,30 @@ class Client:
         :param str product_id: (optional) Only cancel orders for the specified
             product. The default is None.
             
-        :param bool stop: (optional) Also delete stop orders.
+        :param bool stop: (optional) Also delete stop orders. Every page of
+            active, open and pending orders is fetched and each order the bulk
+            cancel didn't already cancel is cancelled individually. Those 
+            requests are sent concurrently, at the highest rate the client's
+            private rate limiter allows, ahead of any other rate limited 
+            request. The default is False.
+            
+        :param bool timing: (optional) Also return timing information. The 
+            default is False.
+            
+        :param timeout: (optional) The time budget shared by every request 
+            this makes, in seconds or as a :class:`copra.rest.timeouts.Deadline`.
+            See :meth:`get`. The default is None.
+        :type timeout: float or Deadline
             
         :returns: A list of the ids of orders that were successfully cancelled.
+            An order whose own cancel request fails, with an error from the 
+            server, a connection error or a timeout, is left out.
+        
+            If timing is True, a 2-tuple: (cancelled ids, timing). timing is a
+            dict with the wall time in seconds of the whole call (elapsed) and 
+            of the bulk cancel request (bulk), the number of pages of orders 
+            fetched, the number of orders found on them that the bulk cancel
+            had not cancelled, and the number of those that were cancelled.
             
             Example::
         
@@ -1308,26 +2759,71 @@ class Client:
         :raises APIRequestError: For any error generated by the Coinbase Pro API 
             server.
         """
+        timeout = self._deadline(timeout)
         params = {'product_id': product_id} if product_id else {}
         
-        headers, cancelled = await self.delete('/orders', params=params, auth=True)
+        start = time.monotonic()
+        headers, cancelled = await self.delete('/orders', params=params, auth=True,
+                                               lane='priority', raw=False,
+                                               timeout=timeout)
+        stats = {'bulk': time.monotonic() - start, 'pages': 0, 'found': 0, 
+                 'cancelled': 0}
         
         if stop:
-            orders, _, _ = await self.orders(['active', 'open', 'pending'])
-            for order in orders:
+            async def cancel(order_id):
+                await self.private_limiter.acquire(priority=True)
                 try:
-                    if not product_id or product_id == order['product_id']:
-                        resp = await self.cancel(order['id'])
-                        if len(resp):
-                            cancelled.append(resp[0])
-                except APIRequestError:
-                    pass
-        
+                    headers, resp = await self.delete('/orders/{}'.format(order_id),
+                                                      auth=True, lane='priority', 
+                                                      raw=False, timeout=timeout)
+                except (APIRequestError, aiohttp.ClientError, 
+                        asyncio.TimeoutError):
+                    # Leave it out of the results rather than lose the
+                    # orders that were cancelled.
+                    return None
+                return resp[0] if len(resp) else None
+                
+            # Cancel each page of orders while the next one is fetched.
+            seen = set(cancelled)
+            tasks = []
+            params = CIMultiDict([('status', 'active'), ('status', 'open'), 
+                                  ('status', 'pending'), ('limit', 100)])
+            if product_id:
+                params['product_id'] = product_id
+                
+            try:
+                while True:
+                    await self.private_limiter.acquire(priority=True)
+                    headers, orders = await self.get('/orders', params=params.copy(), 
+                                                     auth=True, lane='priority',
+                                                     raw=False, timeout=timeout)
+                    stats['pages'] += 1
+                    for order in orders:
+                        if order['id'] not in seen:
+                            seen.add(order['id'])
+                            tasks.append(self.loop.create_task(cancel(order['id'])))
+                    after = headers.get('cb-after')
+                    if len(orders) < params['limit'] or not after:
+                        break
+                    params['after'] = after
+            finally:
+                # Even if fetching a page fails, finish the cancels under way.
+                results = await asyncio.gather(*tasks)
+                
+            stats['found'] = len(tasks)
+            for order_id in results:
+                if order_id:
+                    cancelled.append(order_id)
+                    stats['cancelled'] += 1
+        
+        stats['elapsed'] = time.monotonic() - start
+        if timing:
+            return (cancelled, stats)
         return cancelled
         
     
     async def orders(self, status=None, product_id=None, limit=100, before=None, 
-                     after=None):
+                     after=None, timeout=None):
         """Retrieve a list orders. 
         
         The status of an order may change between the request and response
@@ -1359,6 +2855,11 @@ class Client:
         :param int after: (optional) The after cursor value. The default is 
             None. 
             
+        :param timeout: (optional) The time budget of the request, in seconds
+            or as a :class:`copra.rest.timeouts.Deadline`. See :meth:`get`. 
+            The default is None.
+        :type timeout: float or Deadline
+            
         :returns: A 3-tuple: (orders, before cursor, after cursor)
             
             orders is a list of dicts where each dict represents an order. 
@@ -1436,12 +2937,13 @@ class Client:
         if product_id:
             params['product_id'] = product_id
                     
-        headers, body = await self.get('/orders', params=params, auth=True)
+        headers, body = await self.get('/orders', params=params, auth=True,
+                                       timeout=timeout)
         
         return (body, headers.get('cb-before', None), headers.get('cb-after', None))
         
         
-    async def get_order(self, order_id):
+    async def get_order(self, order_id, timeout=None):
         """Get a single order by order id.
 
         .. admonition:: Authorization
@@ -1452,6 +2954,11 @@ class Client:
             
         :param str order_id: The order id.
         
+        :param timeout: (optional) The time budget of the request, in seconds
+            or as a :class:`copra.rest.timeouts.Deadline`. See :meth:`get`. 
+            The default is None.
+        :type timeout: float or Deadline
+            
         :returns: A dict of information about the order.
         
             Example::
@@ -1484,13 +2991,14 @@ class Client:
         :raises APIRequestError: Any error generated by the Coinbase Pro API 
             server.
         """
-        headers, body = await self.get('/orders/{}'.format(order_id), auth=True)
+        headers, body = await self.get('/orders/{}'.format(order_id), auth=True,
+                                       timeout=timeout)
         
         return body
         
         
     async def fills(self, order_id='', product_id='', limit=100, before=None, 
-                    after=None):
+                    after=None, records=False, timeout=None):
         """Get a list of recent fills.
 
         .. admonition:: Authorization
@@ -1517,7 +3025,16 @@ class Client:
         
         :param int after: (optional) The after cursor value. The default is 
             None.       
+            
+        :param bool records: (optional) If True, fills are returned as 
+            :class:`copra.rest.records.Fill` records with numeric price, size
+            and fee. The default is False.
         
+        :param timeout: (optional) The time budget of the request, in seconds
+            or as a :class:`copra.rest.timeouts.Deadline`. See :meth:`get`. 
+            The default is None.
+        :type timeout: float or Deadline
+            
         :returns: A 3-tuple (fills, before cursor, after cursor)
        
             fills is a list of dicts where each dict represents a fill.
@@ -1568,12 +3085,16 @@ class Client:
         if product_id:
             params['product_id'] = product_id
             
-        headers, body = await self.get('/fills', params=params, auth=True)
+        headers, body = await self.get('/fills', params=params, auth=True,
+                                       raw=False if records else None,
+                                       timeout=timeout)
+        if records:
+            body = [Fill.from_dict(fill) for fill in body]
     
         return (body, headers.get('cb-before', None), headers.get('cb-after', None))
         
         
-    async def payment_methods(self):
+    async def payment_methods(self, timeout=None):
         """Get a list of the payment methods you have on file.
 
         .. admonition:: Authorization
@@ -1582,6 +3103,11 @@ class Client:
             This method requires authorization. The API key must have the 
             "transfer" permission.
             
+        :param timeout: (optional) The time budget of the request, in seconds
+            or as a :class:`copra.rest.timeouts.Deadline`. See :meth:`get`. 
+            The default is None.
+        :type timeout: float or Deadline
+            
         :returns: A list of dicts where each dict contains detailed information
             about a payment method the account has available.
             
@@ -1661,11 +3187,12 @@ class Client:
         :raises APIRequestError: Any error generated by the Coinbase Pro API 
             server.
         """
-        headers, body = await self.get('/payment-methods', auth=True)
+        headers, body = await self.get('/payment-methods', auth=True,
+                                       timeout=timeout)
         return body
         
     
-    async def coinbase_accounts(self):
+    async def coinbase_accounts(self, timeout=None):
         """Get a list of your coinbase accounts.
 
         .. admonition:: Authorization
@@ -1674,6 +3201,11 @@ class Client:
             This method requires authorization. The API key must have the 
             "transfer" permission.
             
+        :param timeout: (optional) The time budget of the request, in seconds
+            or as a :class:`copra.rest.timeouts.Deadline`. See :meth:`get`. 
+            The default is None.
+        :type timeout: float or Deadline
+            
         :returns: A list of dicts where each dict contains information about a
             Coinbase account.
             
@@ -1728,12 +3260,14 @@ class Client:
         :raises APIRequestError: Any error generated by the Coinbase Pro API 
             server.
         """
-        headers, body = await self.get('/coinbase-accounts', auth=True)
+        headers, body = await self.get('/coinbase-accounts', auth=True,
+                                       timeout=timeout)
         
         return body
         
     
-    async def deposit_payment_method(self, amount, currency, payment_method_id):
+    async def deposit_payment_method(self, amount, currency, payment_method_id,
+                                     timeout=None):
         """Deposit funds from a payment method on file.
         
         To get a list of available payment methods, use 
@@ -1753,6 +3287,11 @@ class Client:
         
         :param str payment_method_id: The id of the payment method to use. 
             
+        :param timeout: (optional) The time budget of the request, in seconds
+            or as a :class:`copra.rest.timeouts.Deadline`. See :meth:`get`. 
+            The default is None.
+        :type timeout: float or Deadline
+            
         :returns: A dict with a deposit id, timestamp and other deposit 
             information.
         
@@ -1774,11 +3313,12 @@ class Client:
                                         data={'amount': amount,
                                               'currency': currency,
                                               'payment_method_id': payment_method_id},
-                                        auth=True)
+                                        auth=True, timeout=timeout)
         return body
         
         
-    async def deposit_coinbase(self, amount, currency, coinbase_account_id):
+    async def deposit_coinbase(self, amount, currency, coinbase_account_id,
+                               timeout=None):
         """Deposit funds from a Coinbase account.
 
         .. admonition:: Authorization
@@ -1797,6 +3337,11 @@ class Client:
             deposit from. To get a list of Coinbase accounts, use:
             :meth:`copra.rest.Client.coinbase_accounts`.
         
+        :param timeout: (optional) The time budget of the request, in seconds
+            or as a :class:`copra.rest.timeouts.Deadline`. See :meth:`get`. 
+            The default is None.
+        :type timeout: float or Deadline
+            
         :returns: A dict with a deposit id and confirmation of the deposit 
             amount and currency.
         
@@ -1817,11 +3362,12 @@ class Client:
                                 data={'amount': amount,
                                       'currency': currency,
                                       'coinbase_account_id': coinbase_account_id},
-                                auth=True)
+                                auth=True, timeout=timeout)
         return body
         
         
-    async def withdraw_payment_method(self, amount, currency, payment_method_id):
+    async def withdraw_payment_method(self, amount, currency, payment_method_id,
+                                      timeout=None):
         """Withdraw funds to a payment method on file.
         
         To get a list of available payment methods, use 
@@ -1842,6 +3388,11 @@ class Client:
         :param str payment_method_id: The id of the payment method on file to
             use. 
             
+        :param timeout: (optional) The time budget of the request, in seconds
+            or as a :class:`copra.rest.timeouts.Deadline`. See :meth:`get`. 
+            The default is None.
+        :type timeout: float or Deadline
+            
         :returns: A dict with a withdrawal id, timestamp, and other withdrawal 
             information.
             
@@ -1863,11 +3414,12 @@ class Client:
                         data={'amount': amount,
                               'currency': currency,
                               'payment_method_id': payment_method_id},
-                        auth=True)
+                        auth=True, timeout=timeout)
         return body
 
         
-    async def withdraw_coinbase(self, amount, currency, coinbase_account_id):
+    async def withdraw_coinbase(self, amount, currency, coinbase_account_id,
+                                timeout=None):
         """Withdraw funds to a coinbase account.
 
         .. admonition:: Authorization
@@ -1886,6 +3438,11 @@ class Client:
             withdraw to. To get a list of Coinbase accounts, use:
             :meth:`copra.rest.Client.coinbase_accounts`.
         
+        :param timeout: (optional) The time budget of the request, in seconds
+            or as a :class:`copra.rest.timeouts.Deadline`. See :meth:`get`. 
+            The default is None.
+        :type timeout: float or Deadline
+            
         :returns: A dict with the withdrawal id, and confirmation of the 
             withdrawl amount and currency.
         
@@ -1906,11 +3463,12 @@ class Client:
                                 data={'amount': amount,
                                       'currency': currency,
                                       'coinbase_account_id': coinbase_account_id},
-                                auth=True)
+                                auth=True, timeout=timeout)
         return body
         
         
-    async def withdraw_crypto(self, amount, currency, crypto_address):
+    async def withdraw_crypto(self, amount, currency, crypto_address,
+                              timeout=None):
         """Withdraw funds to a crypto address.
         
         .. admonition:: Authorization
@@ -1927,6 +3485,11 @@ class Client:
             
         :param str crypto_address: The crypto address of the recipient.
         
+        :param timeout: (optional) The time budget of the request, in seconds
+            or as a :class:`copra.rest.timeouts.Deadline`. See :meth:`get`. 
+            The default is None.
+        :type timeout: float or Deadline
+            
         :returns: A dict with the withrawal id and confirmation of the withdrawl 
             amount and currency.
         
@@ -1947,11 +3510,12 @@ class Client:
                                 data={'amount': amount,
                                       'currency': currency,
                                       'crypto_address': crypto_address},
-                                auth=True)
+                                auth=True, timeout=timeout)
         return body        
 
         
-    async def stablecoin_conversion(self, from_currency_id, to_currency_id, amount):
+    async def stablecoin_conversion(self, from_currency_id, to_currency_id, amount,
+                                    timeout=None):
         """Convert to and from a stablecoin.
         
         .. admonition:: Authorization
@@ -1970,6 +3534,11 @@ class Client:
         :param float amount: The amount of currency to convert. This 
             paramater may also be a string to avoid floating point issues.
         
+        :param timeout: (optional) The time budget of the request, in seconds
+            or as a :class:`copra.rest.timeouts.Deadline`. See :meth:`get`. 
+            The default is None.
+        :type timeout: float or Deadline
+            
         :returns: A dict summarizing the conversion.
         
             Example::
@@ -1992,13 +3561,55 @@ class Client:
                                 data={'from': from_currency_id,
                                       'to': to_currency_id,
                                       'amount': amount},
-                                auth=True)
+                                auth=True, timeout=timeout)
         return body
         
         
+    def _report_data(self, report_type, start_date, end_date, product_id='',
+                     account_id='', report_format='pdf', email=''):
+        """Validate the parameters of a report and build its request body.
+        
+        See :meth:`create_report` for the parameters and the errors raised.
+        
+        :returns: A dict to be sent as the body of the report request.
+        """
+        if report_type not in ("account", "fills"):
+            raise ValueError(
+                "Invalid report_type: {}. Must be 'fills' or 'account'.".format(
+                    report_type))
+        
+        if report_type == 'fills' and not product_id:
+            raise ValueError("product_id must be defined for report_type fills.")
+            
+        if report_type == 'account' and not account_id:
+            raise ValueError("account_id must be defined for report_type account.")
+            
+        if report_format not in ('csv', 'pdf'):
+            raise ValueError(
+                "Invalid format {}. Must be either 'csv' or 'pdf'.".format(report_format))
+            
+        data = {
+                'type': report_type,
+                'start_date': start_date,
+                'end_date': end_date,
+                'format': report_format
+               }
+               
+        if product_id:
+            data['product_id'] = product_id
+            
+        if account_id:
+            data['account_id'] = account_id
+            
+        if email:
+            data['email'] = email
+        
+        return data
+        
+        
     async def create_report(self, report_type, start_date, end_date, 
                             product_id='', account_id='', report_format='pdf',
-                            email=''):
+                            email='', timeout=None):
         """Create a report about your account history.
         
         Reports provide batches of historic information about your account in 
@@ -2040,6 +3651,11 @@ class Client:
         :param str email: (optional) Email address to send the report to. The 
             default is None.
             
+        :param timeout: (optional) The time budget of the request, in seconds
+            or as a :class:`copra.rest.timeouts.Deadline`. See :meth:`get`. 
+            The default is None.
+        :type timeout: float or Deadline
+            
         :returns: A dict of information about the report including its id which
             can be used to check its status.
             
@@ -2069,43 +3685,16 @@ class Client:
         :raises APIRequestError: Any error generated by the Coinbase Pro API 
             server.
         """
-        if report_type not in ("account", "fills"):
-            raise ValueError(
-                "Invalid report_type: {}. Must be 'fills' or 'account'.".format(
-                    report_type))
-        
-        if report_type == 'fills' and not product_id:
-            raise ValueError("product_id must be defined for report_type fills.")
-            
-        if report_type == 'account' and not account_id:
-            raise ValueError("account_id must be defined for report_type account.")
-            
-        if report_format not in ('csv', 'pdf'):
-            raise ValueError(
-                "Invalid format {}. Must be either 'csv' or 'pdf'.".format(report_format))
-            
-        data = {
-                'type': report_type,
-                'start_date': start_date,
-                'end_date': end_date,
-                'format': report_format
-               }
-               
-        if product_id:
-            data['product_id'] = product_id
-            
-        if account_id:
-            data['account_id'] = account_id
-            
-        if email:
-            data['email'] = email
+        data = self._report_data(report_type, start_date, end_date, product_id,
+                                 account_id, report_format, email)
         
-        headers, body = await self.post('/reports', data=data, auth=True)
+        headers, body = await self.post('/reports', data=data, auth=True,
+                                        timeout=timeout)
         
         return body
         
         
-    async def report_status(self, report_id):
+    async def report_status(self, report_id, timeout=None):
         """Get the status of a report.
         
         Once a report request has been accepted for processing, the status is 
@@ -2128,6 +3717,11 @@ class Client:
             
         :param str report_id: The id of the report. This is obtained from :meth:`copra.rest.Client.create_report`.
             
+        :param timeout: (optional) The time budget of the request, in seconds
+            or as a :class:`copra.rest.timeouts.Deadline`. See :meth:`get`. 
+            The default is None.
+        :type timeout: float or Deadline
+            
         :returns: A dict summarizing the current status of the report. Examples
             follow.
         
@@ -2169,12 +3763,236 @@ class Client:
         :raises APIRequestError: Any error generated by the Coinbase Pro API 
             server.
         """
-        headers, body = await self.get('/reports/{}'.format(report_id), auth=True)
+        headers, body = await self.get('/reports/{}'.format(report_id), auth=True,
+                                       timeout=timeout)
         
         return body
         
         
-    async def trailing_volume(self):
+    async def wait_for_report(self, report_id, poll_interval=1, 
+                              max_poll_interval=30, timeout=None):
+        """Poll a report's status until it is ready.
+        
+        Polling starts every poll_interval seconds and backs off by half again
+        after each poll that finds the report still pending, up to 
+        max_poll_interval. Once the report is being created it is polled at 
+        poll_interval again since it should be ready soon.
+        
+        .. admonition:: Authorization
+            :class: attention
+            
+            This method requires authorization. The API key must have either 
+            the "view" or "trade" permission.
+        
+        :param str report_id: The id of the report.
+        
+        :param float poll_interval: (optional) The initial, and shortest, time
+            in seconds between polls. The default is 1.
+            
+        :param float max_poll_interval: (optional) The longest time in seconds
+            between polls. The default is 30.
+            
+        :param timeout: (optional) The maximum time in seconds to wait, or a
+            :class:`copra.rest.timeouts.Deadline` to wait until. Each poll is
+            given what is left of it. None waits indefinitely. The default 
+            is None.
+        :type timeout: float or Deadline
+            
+        :returns: The report status dict with status ready. See 
+            :meth:`report_status`.
+            
+        :raises ValueError: The client is not configured for authorization.
+        
+        :raises asyncio.TimeoutError: The report wasn't ready within timeout 
+            seconds.
+        
+        :raises APIRequestError: Any error generated by the Coinbase Pro API 
+            server, or the report's status is something other than pending, 
+            creating or ready.
+        """
+        deadline = None if timeout is None else self._deadline(timeout)
+        interval = poll_interval
+        while True:
+            headers, report = await self.get('/reports/{}'.format(report_id), 
+                                             auth=True, raw=False, 
+                                             timeout=deadline)
+            status = report.get('status')
+            if status == 'ready':
+                return report
+            if status not in ('pending', 'creating'):
+                raise APIRequestError('Report {} is {}'.format(report_id, status), 
+                                      None)
+                                      
+            if status == 'creating':
+                interval = poll_interval
+            delay = interval
+            remaining = None if deadline is None else deadline.remaining()
+            if remaining is not None:
+                if remaining <= 0:
+                    raise asyncio.TimeoutError(
+                        'Report {} not ready in time'.format(report_id))
+                delay = min(delay, remaining)
+            await asyncio.sleep(delay)
+            interval = min(interval * 1.5, max_poll_interval)
+            
+            
+    async def download_report(self, report, path, chunk_size=65536, 
+                              timeout=None):
+        """Stream a finished report's file to disk.
+        
+        The file is downloaded through the client's session a chunk at a time 
+        so that a large report never sits in memory.
+        
+        :param dict report: The report status dict of a ready report, as 
+            returned by :meth:`report_status` or :meth:`wait_for_report`.
+            
+        :param str path: The file to write.
+        
+        :param int chunk_size: (optional) The maximum number of bytes read and
+            written at a time. The default is 65536.
+            
+        :param timeout: (optional) The time budget of the download, in 
+            seconds or as a :class:`copra.rest.timeouts.Deadline`. See 
+            :meth:`get`. The default is None.
+        :type timeout: float or Deadline
+            
+        :returns int: The number of bytes written.
+        
+        :raises ValueError: The report has no file_url.
+        
+        :raises aiohttp.ClientResponseError: The download failed.
+        
+        :raises asyncio.TimeoutError: The download's time budget ran out.
+        """
+        if not report.get('file_url'):
+            raise ValueError('report {} has no file_url.'.format(report.get('id')))
+        return await download_report(self.loop, self.session, report['file_url'],
+                                     path, chunk_size, 
+                                     self._timeout_kwargs(timeout).get('timeout'))
+                                     
+                                     
+    def report_rows(self, report, path=None, chunk_size=65536, timeout=None):
+        """Iterate over the rows of a finished CSV report as it downloads.
+        
+        Each row is a dict keyed by the report's CSV header. Rows are parsed
+        out of each chunk as it arrives so a multi-gigabyte report is never 
+        held in memory.
+        
+        Example::
+        
+            report = await client.generate_report('fills', start, end, 
+                                                  product_id='BTC-USD',
+                                                  report_format='csv')
+            async for row in client.report_rows(report, path='fills.csv'):
+                print(row['trade id'], row['size'], row['price'])
+                
+        :param dict report: The report status dict of a ready csv report, as 
+            returned by :meth:`report_status`, :meth:`wait_for_report` or 
+            :meth:`generate_report`.
+            
+        :param str path: (optional) If provided, the report is also written to
+            this file as it is downloaded. The default is None.
+            
+        :param int chunk_size: (optional) The maximum number of bytes read at
+            a time. The default is 65536.
+            
+        :param timeout: (optional) The time budget of the download, counted
+            from this call, in seconds or as a 
+            :class:`copra.rest.timeouts.Deadline`. See :meth:`get`. The 
+            default is None.
+        :type timeout: float or Deadline
+            
+        :returns: A :class:`copra.rest.reports.ReportRows` asynchronous 
+            iterator.
+            
+        :raises ValueError: The report has no file_url.
+        
+        :raises asyncio.TimeoutError: The budget has already run out. If it 
+            runs out during the download, iterating raises it.
+        """
+        if not report.get('file_url'):
+            raise ValueError('report {} has no file_url.'.format(report.get('id')))
+        return ReportRows(self.loop, self.session, report['file_url'], path, 
+                          chunk_size, self._timeout_kwargs(timeout).get('timeout'))
+                          
+                          
+    async def generate_report(self, report_type, start_date, end_date, 
+                              product_id='', account_id='', report_format='pdf',
+                              email='', path=None, poll_interval=1, 
+                              max_poll_interval=30, timeout=None):
+        """Create a report, wait for it to be ready and optionally download it.
+        
+        This combines :meth:`create_report`, :meth:`wait_for_report` and 
+        :meth:`download_report`. To process a csv report row by row instead 
+        of downloading it first, leave path unset and pass the result to 
+        :meth:`report_rows`.
+        
+        .. admonition:: Authorization
+            :class: attention
+            
+            This method requires authorization. The API key must have either 
+            the "view" or "trade" permission.
+            
+        :param str report_type: See :meth:`create_report`.
+        
+        :param str start_date: See :meth:`create_report`.
+        
+        :param str end_date: See :meth:`create_report`.
+        
+        :param str product_id: (optional) See :meth:`create_report`.
+        
+        :param str account_id: (optional) See :meth:`create_report`.
+        
+        :param str report_format: (optional) See :meth:`create_report`. The 
+            default is pdf.
+            
+        :param str email: (optional) See :meth:`create_report`.
+        
+        :param str path: (optional) If provided, the finished report is 
+            downloaded to this file. The default is None.
+            
+        :param float poll_interval: (optional) See :meth:`wait_for_report`. 
+            The default is 1.
+            
+        :param float max_poll_interval: (optional) See 
+            :meth:`wait_for_report`. The default is 30.
+            
+        :param timeout: (optional) The time budget of the whole call, in
+            seconds or as a :class:`copra.rest.timeouts.Deadline`: creating 
+            the report, waiting for it and downloading it. None waits for the
+            report indefinitely. The default is None.
+        :type timeout: float or Deadline
+            
+        :returns: The report status dict of the ready report. See 
+            :meth:`report_status`. If path was provided, it also holds path
+            and the number of bytes downloaded as size.
+            
+        :raises ValueError: See :meth:`create_report`.
+        
+        :raises asyncio.TimeoutError: The report wasn't ready or downloaded 
+            within timeout.
+            
+        :raises APIRequestError: Any error generated by the Coinbase Pro API 
+            server, or the report failed.
+            
+        :raises aiohttp.ClientResponseError: The download failed.
+        """
+        data = self._report_data(report_type, start_date, end_date, product_id, 
+                                 account_id, report_format, email)
+        if timeout is not None:
+            timeout = self._deadline(timeout)
+        headers, report = await self.post('/reports', data=data, auth=True, 
+                                          raw=False, timeout=timeout)
+        report = await self.wait_for_report(report['id'], poll_interval, 
+                                            max_poll_interval, timeout)
+        if path:
+            report['path'] = path
+            report['size'] = await self.download_report(report, path, 
+                                                        timeout=timeout)
+        return report
+        
+        
+    async def trailing_volume(self, timeout=None):
         """Return your 30-day trailing volume for all products.
         
         This is a cached value that’s calculated every day at midnight UTC.
@@ -2185,6 +4003,11 @@ class Client:
             This method requires authorization. The API key must have either the 
             "view" or "trade" permission.
             
+        :param timeout: (optional) The time budget of the request, in seconds
+            or as a :class:`copra.rest.timeouts.Deadline`. See :meth:`get`. 
+            The default is None.
+        :type timeout: float or Deadline
+            
         :returns: A list of dicts where each dict contains information about
             a specific product that was traded.
             
@@ -2210,6 +4033,7 @@ class Client:
         :raises APIRequestError: Any error generated by the Coinbase Pro
             API server.
         """
-        headers, body = await self.get('/users/self/trailing-volume', auth=True)
+        headers, body = await self.get('/users/self/trailing-volume', auth=True,
+                                       timeout=timeout)
         
         return body
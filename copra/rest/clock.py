@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""Server clock offset estimation for signed requests.
+
+Authenticated requests, REST and WebSocket, are signed with a timestamp that
+Coinbase Pro rejects if it is more than 30 seconds from the server's clock.
+ClockSync samples the server time in the background and keeps a smoothed
+estimate of the difference between it and the local clock, so that signing
+timestamps can be corrected without a request of their own.
+
+"""
+
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class ClockSync:
+    """A smoothed estimate of the API server clock's offset from local time.
+
+    Each sync round samples the server time a few times. The sample with the
+    shortest round trip is the least distorted by network delay, and its
+    offset is the server time less the local time halfway through that round
+    trip. The estimate is an exponential moving average of those offsets.
+
+    :ivar float offset: The estimated server time less the local time, in
+        seconds. 0 until the first sync.
+    :ivar float rtt: The round trip time, in seconds, of the sample used in
+        the last sync, or None before the first.
+    """
+
+    def __init__(self, client, interval=60, samples=3, alpha=0.25):
+        """
+
+        :param client: The client to sample the server time with.
+        :type client: copra.rest.Client
+
+        :param float interval: (optional) The number of seconds between sync
+            rounds once started. The default is 60.
+
+        :param int samples: (optional) The number of server time requests in
+            each round. The default is 3.
+
+        :param float alpha: (optional) The weight, between 0 and 1, of each
+            new round's offset in the moving average. The default is 0.25.
+
+        :raises ValueError: interval is not greater than 0, samples is less
+            than 1, or alpha is not greater than 0 and at most 1.
+        """
+        if interval <= 0:
+            raise ValueError('interval must be greater than 0.')
+        if samples < 1:
+            raise ValueError('samples must be at least 1.')
+        if not 0 < alpha <= 1:
+            raise ValueError('alpha must be greater than 0 and at most 1.')
+
+        self.client = client
+        self.interval = interval
+        self.samples = samples
+        self.alpha = alpha
+        self.offset = 0.0
+        self.rtt = None
+        self.syncs = 0
+        self.errors = 0
+        self.last_sync = None
+        self._task = None
+
+    def time(self):
+        """Return the estimated current server time as a UNIX timestamp.
+        """
+        return time.time() + self.offset
+
+    def metrics(self):
+        """Return the estimate and how it was arrived at.
+
+        :returns: A dict with the offset and rtt in seconds, the number of
+            successful syncs and of failed ones, and the local UNIX time of
+            the last successful sync (None before the first).
+        """
+        return {'offset': self.offset, 'rtt': self.rtt, 'syncs': self.syncs,
+                'errors': self.errors, 'last_sync': self.last_sync}
+
+    async def _sample(self):
+        """Request the server time once.
+
+        The round trip is timed on the monotonic clock, so that the local
+        clock being stepped mid-request can't skew it.
+
+        :returns: A 2-tuple: (offset, round trip time) in seconds.
+        """
+        sent = time.time()
+        start = time.monotonic()
+        headers, body = await self.client.get('/time', raw=False)
+        rtt = time.monotonic() - start
+        return body['epoch'] - (sent + rtt / 2), rtt
+
+    async def sync(self):
+        """Run a sync round and update the estimate.
+
+        :returns: The new offset in seconds.
+
+        :raises APIRequestError: Any error generated by the Coinbase Pro API
+            server.
+        """
+        offset, rtt = min([await self._sample() for _ in range(self.samples)],
+                          key=lambda sample: sample[1])
+        if self.syncs:
+            self.offset += self.alpha * (offset - self.offset)
+        else:
+            self.offset = offset
+        self.rtt = rtt
+        self.syncs += 1
+        self.last_sync = time.time()
+        return self.offset
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.sync()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.errors += 1
+                logger.warning('Clock sync failed: {}'.format(e))
+
+    def start(self):
+        """Sync every interval seconds in a background task.
+        """
+        if self._task is None or self._task.done():
+            self._task = self.client.loop.create_task(self._run())
+
+    async def stop(self):
+        """Stop the background task, if it is running.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""Columnar conversion of REST results for analytics.
+
+Historic rates, trades and order books are often turned into arrays as soon
+as they arrive. The functions here do that once, straight from the decoded
+response, into arrays allocated at their final size.
+
+NumPy is optional. With NumPy installed each function returns a structured
+numpy.ndarray with one named field per column. Without it, it returns a dict
+of columns: array.array for numeric columns and list for text columns.
+
+"""
+
+from array import array
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+CANDLE_FIELDS = (('time', 'q'), ('low', 'd'), ('high', 'd'), ('open', 'd'),
+                 ('close', 'd'), ('volume', 'd'))
+
+TRADE_FIELDS = (('time', 'M8[us]'), ('trade_id', 'q'), ('price', 'd'),
+                ('size', 'd'), ('side', 'U4'))
+
+LEVEL_FIELDS = (('price', 'd'), ('size', 'd'), ('num_orders', 'q'))
+
+ORDER_FIELDS = (('price', 'd'), ('size', 'd'), ('order_id', 'U36'))
+
+
+def _empty(fields, length, use_numpy):
+    """Allocate the columns for length rows.
+
+    :param fields: (name, type) 2-tuples. Single character types are
+        array.array typecodes, which NumPy also accepts; anything else is a
+        NumPy type stored in a list without NumPy.
+
+    :returns: A structured numpy.ndarray or a dict of columns.
+    """
+    if use_numpy:
+        return numpy.empty(length, dtype=list(fields))
+    columns = {}
+    for name, code in fields:
+        if len(code) == 1:
+            columns[name] = array(code, bytes(array(code).itemsize * length))
+        else:
+            columns[name] = [None] * length
+    return columns
+
+
+def _fill(fields, rows, getters, use_numpy):
+    """Allocate columns for rows and fill each from its getter.
+
+    :param getters: One function per field returning that field's value
+        from a row.
+    """
+    result = _empty(fields, len(rows), use_numpy)
+    for (name, code), get in zip(fields, getters):
+        column = result[name]
+        if use_numpy:
+            column[:] = numpy.fromiter(map(get, rows), column.dtype,
+                                       count=len(rows))
+        elif code in ('d', 'q'):
+            convert = float if code == 'd' else int
+            for i, row in enumerate(rows):
+                column[i] = convert(get(row))
+        else:
+            column[:] = [get(row) for row in rows]
+    return result
+
+
+def _item(index):
+    return lambda row: row[index]
+
+
+def _key(name):
+    return lambda row: row[name]
+
+
+def _numpy_time(row):
+    # datetime64 doesn't accept the trailing Z (UTC) designator.
+    return row['time'].rstrip('Z')
+
+
+def _numpy(use_numpy):
+    if use_numpy is None:
+        return numpy is not None
+    if use_numpy and numpy is None:
+        raise ImportError('use_numpy requires the numpy package')
+    return use_numpy
+
+
+def candles_to_columns(candles, use_numpy=None):
+    """Convert historic rates to columns.
+
+    :param list candles: [time, low, high, open, close, volume] lists as
+        returned by :meth:`copra.rest.Client.historic_rates`.
+
+    :param bool use_numpy: (optional) True to return a NumPy array, False to
+        return array.array columns. None uses NumPy if it is installed. The
+        default is None.
+
+    :returns: A structured array or dict of columns with the fields time
+        (int), low, high, open, close and volume (float).
+    """
+    return _fill(CANDLE_FIELDS, candles,
+                 [_item(i) for i in range(len(CANDLE_FIELDS))],
+                 _numpy(use_numpy))
+
+
+def trades_to_columns(trades, use_numpy=None):
+    """Convert trades to columns.
+
+    :param list trades: Trade dicts as returned by
+        :meth:`copra.rest.Client.trades`.
+
+    :param bool use_numpy: (optional) See :func:`candles_to_columns`.
+
+    :returns: A structured array or dict of columns with the fields time,
+        trade_id (int), price and size (float) and side (str). With NumPy,
+        time is a datetime64[us]. Without it, time is the ISO 8601 str.
+    """
+    use_numpy = _numpy(use_numpy)
+    time = _key('time')
+    if use_numpy:
+        time = _numpy_time
+    return _fill(TRADE_FIELDS, trades,
+                 [time, _key('trade_id'), _key('price'), _key('size'),
+                  _key('side')],
+                 use_numpy)
+
+
+def levels_to_columns(levels, level=2, use_numpy=None):
+    """Convert one side of an order book to columns.
+
+    :param list levels: The bids or asks of an order book as returned by
+        :meth:`copra.rest.Client.order_book`.
+
+    :param int level: (optional) The level of the order book. The default is
+        2.
+
+    :param bool use_numpy: (optional) See :func:`candles_to_columns`.
+
+    :returns: A structured array or dict of columns with the fields price and
+        size (float) and, for levels 1 and 2, num_orders (int) or, for level
+        3, order_id (str).
+    """
+    fields = ORDER_FIELDS if level == 3 else LEVEL_FIELDS
+    return _fill(fields, levels, [_item(0), _item(1), _item(2)],
+                 _numpy(use_numpy))
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""Hedged GET requests for the copra REST client.
+
+Most responses arrive in a few tens of milliseconds but a few take seconds.
+A hedged request sends a duplicate if the original has not answered by a high
+percentile of recently observed latency, and takes whichever response arrives
+first. Since only the slowest few percent of requests are duplicated, the
+extra load is small and bounded by a budget, while the tail latency of the
+rest drops to roughly the hedge delay plus a typical response time.
+
+"""
+
+import asyncio
+import collections
+import math
+
+
+class Hedger:
+    """Decides when to hedge a request and races the duplicate.
+
+    :ivar dict stats: The number of requests made, hedges sent, hedges that
+        answered first, and hedges skipped for lack of budget or rate limit
+        tokens.
+    """
+
+    def __init__(self, loop, percentile=95, budget=0.05, window=200,
+                 min_samples=20, max_tokens=10):
+        """
+
+        :param loop: The asyncio loop that the requests run in.
+        :type loop: asyncio loop
+
+        :param float percentile: (optional) The percentile of recent latency
+            after which a request is hedged. The default is 95.
+
+        :param float budget: (optional) The maximum ratio of hedges to
+            requests. Each request earns budget hedges, up to max_tokens
+            saved up. The default is 0.05.
+
+        :param int window: (optional) The number of recent latencies the
+            percentile is taken over. The default is 200.
+
+        :param int min_samples: (optional) The number of latencies observed
+            before any request is hedged. The default is 20.
+
+        :param float max_tokens: (optional) The most hedges that can be saved
+            up for a burst of slow requests. The default is 10.
+
+        :raises ValueError: percentile is not between 0 and 100, budget is
+            not between 0 and 1, or window or min_samples is less than 1.
+        """
+        if not 0 < percentile < 100:
+            raise ValueError('percentile must be between 0 and 100.')
+        if not 0 < budget <= 1:
+            raise ValueError('budget must be greater than 0 and at most 1.')
+        if window < 1 or min_samples < 1:
+            raise ValueError('window and min_samples must be at least 1.')
+
+        self.loop = loop
+        self.percentile = percentile
+        self.budget = budget
+        self.min_samples = min(min_samples, window)
+        self.max_tokens = max_tokens
+        self.latencies = collections.deque(maxlen=window)
+        self.stats = {'requests': 0, 'hedges': 0, 'wins': 0, 'denied': 0}
+        self._tokens = 0.0
+
+    def delay(self):
+        """Return the time in seconds after which a request is hedged.
+
+        :returns: The percentile of recent latency, or None if too few
+            requests have been observed to hedge yet.
+        """
+        if len(self.latencies) < self.min_samples:
+            return None
+        ordered = sorted(self.latencies)
+        index = math.ceil(len(ordered) * self.percentile / 100) - 1
+        return ordered[max(index, 0)]
+
+    async def request(self, send, limiter=None):
+        """Send a request, and a duplicate if it is slow.
+
+        :param send: A function that returns a coroutine sending the request
+            and returning the aiohttp.ClientResponse.
+
+        :param limiter: (optional) The rate limiter a duplicate must take a
+            token from, without waiting, before it is sent. The default is
+            None.
+        :type limiter: copra.rest.ratelimit.RateLimiter
+
+        :returns: The first response to arrive. Any other is released.
+        """
+        self.stats['requests'] += 1
+        self._tokens = min(self.max_tokens, self._tokens + self.budget)
+        start = self.loop.time()
+        delay = self.delay()
+        first = self.loop.create_task(send())
+        tasks = [first]
+        winner = None
+        try:
+            if delay is not None:
+                await asyncio.wait(tasks, timeout=delay)
+                if not first.done():
+                    if (self._tokens >= 1 and
+                            (limiter is None or limiter.try_acquire())):
+                        self._tokens -= 1
+                        self.stats['hedges'] += 1
+                        tasks.append(self.loop.create_task(send()))
+                    else:
+                        self.stats['denied'] += 1
+
+            pending = tasks
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED)
+                winners = [task for task in tasks if task in done and
+                           not task.cancelled() and task.exception() is None]
+                if winners:
+                    winner = winners[0]
+                    if winner is not first:
+                        self.stats['wins'] += 1
+                    self.latencies.append(self.loop.time() - start)
+                    return winner.result()
+            # Every attempt failed; raise the original's error.
+            return first.result()
+        finally:
+            for task in tasks:
+                if task is winner:
+                    continue
+                if not task.done():
+                    task.cancel()
+                task.add_done_callback(_release)
+
+
+def _release(task):
+    """Release the response of a request that lost the race.
+    """
+    if not task.cancelled() and task.exception() is None:
+        task.result().release()
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""Request lanes for the copra REST client.
+
+A lane is an aiohttp session with its own connection pool. Giving order entry
+its own lane means a burst of market data requests can't occupy every pooled
+connection and leave a cancel waiting in aiohttp's connection queue.
+
+"""
+
+import time
+import types
+
+import aiohttp
+
+from copra.rest.tracing import install
+
+
+class Lane:
+    """A connection pool, and the session using it, for one class of requests.
+
+    The lane records how long its requests wait in aiohttp's queue for a free
+    connection, and times the phases of requests sent with a
+    :class:`copra.rest.tracing.RequestTrace`.
+
+    :ivar str name: The name of the lane.
+    :ivar aiohttp.TCPConnector connector: The lane's connection pool.
+    :ivar aiohttp.ClientSession session: The session using the connector.
+    """
+
+    def __init__(self, name, loop, limit=100, limit_per_host=0,
+                 keepalive_timeout=15, dns_cache_ttl=10):
+        """
+
+        :param str name: The name of the lane.
+
+        :param loop: The asyncio loop that the lane runs in.
+        :type loop: asyncio loop
+
+        :param int limit: (optional) The maximum number of simultaneous
+            connections. 0 means no limit. The default is 100.
+
+        :param int limit_per_host: (optional) The maximum number of
+            simultaneous connections to a single host. 0 means no limit. The
+            default is 0.
+
+        :param float keepalive_timeout: (optional) How long, in seconds, an
+            idle connection is kept open for reuse. The default is 15.
+
+        :param int dns_cache_ttl: (optional) How long, in seconds, resolved
+            DNS entries are cached. None caches them forever. The default is
+            10.
+        """
+        self.name = name
+        self.requests = 0
+        self.queued = 0
+        self.queue_time = 0.0
+        self.max_queue_time = 0.0
+
+        trace_config = aiohttp.TraceConfig(
+            trace_config_ctx_factory=self._trace_context)
+        trace_config.on_request_start.append(self._on_request_start)
+        trace_config.on_connection_queued_start.append(self._on_queued_start)
+        trace_config.on_connection_queued_end.append(self._on_queued_end)
+        install(trace_config)
+
+        self.connector = aiohttp.TCPConnector(
+            limit=limit, limit_per_host=limit_per_host,
+            keepalive_timeout=keepalive_timeout, ttl_dns_cache=dns_cache_ttl,
+            loop=loop)
+        self.session = aiohttp.ClientSession(connector=self.connector,
+                                             trace_configs=[trace_config],
+                                             loop=loop)
+
+    @staticmethod
+    def _trace_context(trace_request_ctx=None):
+        return types.SimpleNamespace(queued_at=None,
+                                     trace_request_ctx=trace_request_ctx)
+
+    async def _on_request_start(self, session, ctx, params):
+        self.requests += 1
+
+    async def _on_queued_start(self, session, ctx, params):
+        ctx.queued_at = time.monotonic()
+
+    async def _on_queued_end(self, session, ctx, params):
+        waited = time.monotonic() - ctx.queued_at
+        self.queued += 1
+        self.queue_time += waited
+        self.max_queue_time = max(self.max_queue_time, waited)
+
+    def queue_stats(self):
+        """Return the queueing delay statistics for the lane.
+
+        :returns: A dict with the number of requests made, the number that had
+            to wait for a connection, and the total, mean (over all requests)
+            and maximum wait in seconds.
+
+            Example::
+
+                {
+                  'requests': 120,
+                  'queued': 4,
+                  'total': 0.0213,
+                  'mean': 0.0001775,
+                  'max': 0.0092
+                }
+        """
+        return {
+            'requests': self.requests,
+            'queued': self.queued,
+            'total': self.queue_time,
+            'mean': self.queue_time / self.requests if self.requests else 0.0,
+            'max': self.max_queue_time,
+        }
+
+    async def close(self):
+        """Close the lane's session and its connections.
+        """
+        await self.session.close()
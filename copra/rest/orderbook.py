@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+"""Incremental decoding of large order book responses.
+
+A level 3 order book for a busy product runs to tens of megabytes of JSON.
+Decoding it with resp.json() means holding the whole body, its decoded text
+and a list of lists for every order in memory at once, and nothing is usable
+until the last byte has arrived. OrderBookStream instead decodes the bids and
+asks a chunk at a time as they are received, and ArrayBook stores them in
+compact arrays.
+
+"""
+
+from array import array
+import codecs
+import collections
+import json
+import re
+
+_KEY = re.compile(r'"(bids|asks|sequence)"\s*:\s*')
+_SEQUENCE = re.compile(r'(\d+)(?=\D)')
+_SIDE_START = re.compile(r'\s*\[')
+_NEXT = re.compile(r'[\s,]*(\S)')
+_SIDE_END = re.compile(r'\]\s*\]')
+
+
+class OrderBookStream:
+    """An asynchronous iterator over the levels of an order book response.
+
+    Each item is a 2-tuple: (side, level) where side is bids or asks and level
+    is the same list that decoding the whole response would give, e.g.
+    ['468.9', '0.011', '48c3ed25-616d-430d-bab4-cb338b489a33'] at level 3 or
+    ['468.9', '12.5', 4] at levels 1 and 2. All bids are received before any
+    asks.
+
+    The levels of a received chunk are decoded together with json.loads. The
+    decoder relies on the book's layout, levels being flat arrays of strings
+    and numbers, and is not a general purpose streaming JSON parser.
+
+    :ivar int sequence: The book's sequence number, or None if it hasn't been
+        received yet. Coinbase Pro sends it before the bids and asks.
+    :ivar int bytes_read: The number of bytes received so far.
+    """
+
+    def __init__(self, response, chunk_size=65536):
+        """
+
+        :param aiohttp.ClientResponse response: The order book response,
+            unread.
+
+        :param int chunk_size: (optional) The maximum number of bytes read at
+            a time. The default is 65536.
+        """
+        self.response = response
+        self.chunk_size = chunk_size
+        self.sequence = None
+        self.bytes_read = 0
+
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ''
+        self._side = None
+        self._eof = False
+        self._levels = collections.deque()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while not self._levels:
+            batch = await self.read_batch()
+            if batch is None:
+                raise StopAsyncIteration
+            side, levels = batch
+            self._levels.extend((side, level) for level in levels)
+        return self._levels.popleft()
+
+    async def read_batch(self):
+        """Read until at least one level has been decoded.
+
+        This is faster than iterating level by level when the levels are
+        processed in bulk.
+
+        :returns: A 2-tuple: (side, list of levels) or None once the response
+            has been read in full. Levels left over from iteration are
+            returned first.
+
+        :raises ValueError: The response isn't a well formed order book.
+        """
+        if self._levels:
+            side = self._levels[0][0]
+            levels = []
+            while self._levels and self._levels[0][0] == side:
+                levels.append(self._levels.popleft()[1])
+            return side, levels
+
+        try:
+            while True:
+                batch = self._parse()
+                if batch:
+                    return batch
+                if self._eof:
+                    if self._side is not None:
+                        raise ValueError('Order book response ended early.')
+                    self.response.release()
+                    return None
+                chunk = await self.response.content.read(self.chunk_size)
+                self.bytes_read += len(chunk)
+                self._eof = not chunk
+                self._buffer += self._decoder.decode(chunk, final=self._eof)
+        except BaseException:
+            self.response.release()
+            raise
+
+    def _parse(self):
+        """Decode as much of the buffer as possible.
+
+        :returns: A (side, levels) 2-tuple, or None if more data is needed.
+        """
+        buf = self._buffer
+        pos = 0
+        try:
+            while True:
+                if self._side is None:
+                    match = _KEY.search(buf, pos)
+                    if not match:
+                        # Keep enough to complete a key split across chunks.
+                        pos = max(pos, len(buf) - 16)
+                        return None
+                    key = match.group(1)
+                    if key == 'sequence':
+                        value = _SEQUENCE.match(buf, match.end())
+                        if not value:
+                            pos = match.start()
+                            return None
+                        self.sequence = int(value.group(1))
+                        pos = value.end()
+                        continue
+                    start = _SIDE_START.match(buf, match.end())
+                    if not start:
+                        pos = match.start()
+                        return None
+                    self._side = key
+                    pos = start.end()
+
+                nxt = _NEXT.match(buf, pos)
+                if not nxt:
+                    return None
+                if nxt.group(1) == ']':
+                    self._side = None
+                    pos = nxt.end()
+                    continue
+                pos = nxt.start(1)
+
+                end = _SIDE_END.search(buf, pos)
+                if end:
+                    cut = end.start() + 1
+                else:
+                    cut = buf.rfind(']', pos) + 1
+                    if not cut:
+                        return None
+                levels = json.loads('[' + buf[pos:cut] + ']')
+                side = self._side
+                if end:
+                    self._side = None
+                    pos = end.end()
+                else:
+                    pos = cut
+                return side, levels
+        finally:
+            self._buffer = buf[pos:]
+
+
+class ArrayBook:
+    """An order book snapshot stored in compact arrays.
+
+    Prices and sizes are stored as floats in array.array('d'), 8 bytes each,
+    rather than as a str object apiece. Level 3 order ids are kept as a list
+    of str; the order counts of levels 1 and 2 are kept in an array('l').
+
+    :ivar int sequence: The book's sequence number.
+    :ivar array bid_prices: Bid prices, best first.
+    :ivar array bid_sizes: Bid sizes.
+    :ivar bid_ids: Bid order ids (level 3) or order counts (levels 1 and 2).
+    :ivar array ask_prices: Ask prices, best first.
+    :ivar array ask_sizes: Ask sizes.
+    :ivar ask_ids: Ask order ids (level 3) or order counts (levels 1 and 2).
+    """
+
+    def __init__(self, level=3):
+        """
+
+        :param int level: (optional) The level of the book. The default is 3.
+        """
+        self.level = level
+        self.sequence = None
+        self.bid_prices = array('d')
+        self.bid_sizes = array('d')
+        self.ask_prices = array('d')
+        self.ask_sizes = array('d')
+        if level == 3:
+            self.bid_ids = []
+            self.ask_ids = []
+        else:
+            self.bid_ids = array('l')
+            self.ask_ids = array('l')
+
+    def extend(self, side, levels):
+        """Append levels to one side of the book.
+
+        :param str side: bids or asks.
+
+        :param list levels: Levels as returned by the API.
+        """
+        if side == 'bids':
+            prices, sizes, ids = self.bid_prices, self.bid_sizes, self.bid_ids
+        else:
+            prices, sizes, ids = self.ask_prices, self.ask_sizes, self.ask_ids
+        prices.extend(float(level[0]) for level in levels)
+        sizes.extend(float(level[1]) for level in levels)
+        ids.extend(level[2] for level in levels)
+
+    async def fill(self, stream):
+        """Read every level of an order book stream into the book.
+
+        :param OrderBookStream stream: The stream to read.
+
+        :returns: The book.
+        """
+        while True:
+            batch = await stream.read_batch()
+            if batch is None:
+                break
+            self.extend(*batch)
+        self.sequence = stream.sequence
+        return self
+
+    def __len__(self):
+        return len(self.bid_prices) + len(self.ask_prices)
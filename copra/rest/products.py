@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*-
+"""Local order validation against Coinbase Pro product metadata.
+
+The server rejects orders whose price isn't a multiple of the product's
+quote_increment or whose size is outside base_min_size and base_max_size, but
+only after a full round trip (and a request's worth of rate limit).
+ProductRules applies the same checks locally.
+
+Values are compared as scaled integers, e.g. a price of '3500.12' with a
+quote_increment of '0.01' is 350012 hundredths, which avoids both floating
+point error and the cost of Decimal for the common plain decimal strings and
+floats.
+
+"""
+
+from decimal import Decimal
+
+
+def _places(increment):
+    """Return the number of decimal places in an increment string.
+
+    :param str increment: An increment like '0.01' or '1'.
+
+    :returns int: The number of digits after the decimal point, ignoring
+        trailing zeros.
+    """
+    text = _plain(increment)
+    return len(text.partition('.')[2].rstrip('0'))
+
+
+def _plain(value):
+    """Return value as a plain (non-exponent) decimal string.
+
+    :param value: A str, int or float.
+
+    :returns str: The decimal representation of value.
+    """
+    text = value if isinstance(value, str) else repr(value)
+    if 'e' in text or 'E' in text:
+        # Slow path for exponent notation, e.g. repr(0.00001) == '1e-05'.
+        text = format(Decimal(text), 'f')
+    return text
+
+
+def _scale(value, places):
+    """Scale a decimal value to an integer number of 10**-places units.
+
+    :param value: A str, int or float.
+
+    :param int places: The number of decimal places to scale by.
+
+    :returns: A 2-tuple: (units, exact). units is the value scaled and
+        truncated toward zero. exact is False if truncation discarded non-zero
+        digits.
+
+    :raises ValueError: value is not a number.
+    """
+    text = _plain(value).strip()
+    whole, _, frac = text.partition('.')
+    frac = frac.rstrip('0')
+    if whole in ('', '-', '+'):
+        whole += '0'
+    if not (whole.lstrip('+-').isdigit() and (not frac or frac.isdigit())):
+        raise ValueError('Invalid number: {}'.format(value))
+    units = int(whole + frac[:places].ljust(places, '0'))
+    return units, len(frac) <= places
+
+
+def _unscale(units, places):
+    """Format an integer number of 10**-places units as a decimal string.
+
+    :param int units: The scaled value.
+
+    :param int places: The number of decimal places.
+
+    :returns str: The decimal string, e.g. _unscale(350012, 2) == '3500.12'
+    """
+    if not places:
+        return str(units)
+    sign = '-' if units < 0 else ''
+    digits = str(abs(units)).rjust(places + 1, '0')
+    return '{}{}.{}'.format(sign, digits[:-places], digits[-places:])
+
+
+class ProductRules:
+    """The trading rules of a single product.
+
+    :ivar str product_id: The product id.
+    """
+
+    def __init__(self, product):
+        """
+
+        :param dict product: A product as returned by
+            :meth:`copra.rest.Client.products`.
+        """
+        self.product_id = product['id']
+        self.status = product.get('status', 'online')
+        self.post_only = product.get('post_only', False)
+        self.limit_only = product.get('limit_only', False)
+        self.cancel_only = product.get('cancel_only', False)
+
+        self.price_places = _places(product['quote_increment'])
+        self.price_increment = _scale(product['quote_increment'],
+                                      self.price_places)[0]
+
+        # base_increment is not present in older product listings. Sizes then
+        # have the 8 decimal places the exchange supports.
+        base_increment = product.get('base_increment') or '0.00000001'
+        self.size_places = max(_places(base_increment),
+                               _places(product['base_min_size']))
+        self.size_increment = _scale(base_increment, self.size_places)[0]
+        self.min_size = _scale(product['base_min_size'], self.size_places)[0]
+        self.max_size = _scale(product['base_max_size'], self.size_places)[0]
+
+        self.min_funds = self.max_funds = None
+        if product.get('min_market_funds'):
+            self.min_funds = _scale(product['min_market_funds'],
+                                    self.price_places)[0]
+        if product.get('max_market_funds'):
+            self.max_funds = _scale(product['max_market_funds'],
+                                    self.price_places)[0]
+
+    def _check_increment(self, name, value, places, increment, round_to=None):
+        """Check, or round, a value to a multiple of an increment.
+
+        :param str name: The parameter name, for error messages.
+
+        :param value: The value to check.
+
+        :param int places: The decimal places increment is scaled by.
+
+        :param int increment: The scaled increment.
+
+        :param str round_to: (optional) None to raise if value isn't a
+            multiple of increment, otherwise up or down to round it to one.
+
+        :returns: A 2-tuple: (scaled value, decimal string).
+
+        :raises ValueError: value is not positive or, if round_to is None, not
+            a multiple of the increment.
+        """
+        units, exact = _scale(value, places)
+        # Truncation turns a small negative value into 0, which rounding up
+        # would then make positive.
+        if units <= 0 and (exact or _plain(value).lstrip().startswith('-')):
+            raise ValueError('{} must be greater than 0.'.format(name))
+
+        remainder = units % increment
+        if exact and not remainder:
+            return units, _unscale(units, places)
+
+        if round_to is None:
+            raise ValueError('Invalid {}: {}. Must be a multiple of '
+                             '{}.'.format(name, value,
+                                          _unscale(increment, places)))
+
+        units -= remainder
+        if round_to == 'up':
+            units += increment
+        if units <= 0:
+            raise ValueError('{} must be greater than 0.'.format(name))
+        return units, _unscale(units, places)
+
+    def _check_status(self):
+        if self.status != 'online' or self.cancel_only:
+            raise ValueError('{} is not accepting new orders.'.format(
+                self.product_id))
+
+    def _check_size(self, size, round_values):
+        units, size = self._check_increment(
+            'size', size, self.size_places, self.size_increment,
+            'down' if round_values else None)
+        if units < self.min_size:
+            raise ValueError('size must be at least {}.'.format(
+                _unscale(self.min_size, self.size_places)))
+        if units > self.max_size:
+            raise ValueError('size must be at most {}.'.format(
+                _unscale(self.max_size, self.size_places)))
+        return size
+
+    def _check_price(self, name, price, side, round_values):
+        # Round buys down and sells up so that rounding never makes a price
+        # more aggressive than the one requested.
+        round_to = None
+        if round_values:
+            round_to = 'down' if side == 'buy' else 'up'
+        return self._check_increment(name, price, self.price_places,
+                                     self.price_increment, round_to)[1]
+
+    def check_limit(self, side, price, size, post_only=False, stop_price=None,
+                    round_values=False):
+        """Check the parameters of a limit order.
+
+        :param str side: Either buy or sell.
+
+        :param price: The limit price.
+        :type price: str or float
+
+        :param size: The order size.
+        :type size: str or float
+
+        :param bool post_only: (optional) Whether the order is post only.
+            The default is False.
+
+        :param stop_price: (optional) The stop price of a stop order.
+        :type stop_price: str or float
+
+        :param bool round_values: (optional) If True, round the prices to the
+            quote_increment (buys down, sells up) and the size down to the
+            base_increment instead of raising. The default is False.
+
+        :returns: A 3-tuple of decimal strings: (price, size, stop_price).
+            stop_price is None if it was not provided.
+
+        :raises ValueError: The order breaks one of the product's rules.
+        """
+        self._check_status()
+        if self.post_only and not post_only:
+            raise ValueError('{} only accepts post_only orders.'.format(
+                self.product_id))
+
+        price = self._check_price('price', price, side, round_values)
+        size = self._check_size(size, round_values)
+        if stop_price:
+            stop_price = self._check_price('stop_price', stop_price, side,
+                                           round_values)
+        return price, size, stop_price
+
+    def check_market(self, side, size=None, funds=None, stop_price=None,
+                     round_values=False):
+        """Check the parameters of a market order.
+
+        :param str side: Either buy or sell.
+
+        :param size: (optional) The order size.
+        :type size: str or float
+
+        :param funds: (optional) The amount of quote currency to use.
+        :type funds: str or float
+
+        :param stop_price: (optional) The stop price of a stop order.
+        :type stop_price: str or float
+
+        :param bool round_values: (optional) If True, round size and funds down
+            and stop_price to the quote_increment instead of raising. The
+            default is False.
+
+        :returns: A 3-tuple of decimal strings: (size, funds, stop_price). Any
+            value that was not provided is None.
+
+        :raises ValueError: The order breaks one of the product's rules.
+        """
+        self._check_status()
+        if self.post_only or self.limit_only:
+            raise ValueError('{} only accepts limit orders.'.format(
+                self.product_id))
+
+        if size:
+            size = self._check_size(size, round_values)
+
+        if funds:
+            units, funds = self._check_increment(
+                'funds', funds, self.price_places, self.price_increment,
+                'down' if round_values else None)
+            if self.min_funds is not None and units < self.min_funds:
+                raise ValueError('funds must be at least {}.'.format(
+                    _unscale(self.min_funds, self.price_places)))
+            if self.max_funds is not None and units > self.max_funds:
+                raise ValueError('funds must be at most {}.'.format(
+                    _unscale(self.max_funds, self.price_places)))
+
+        if stop_price:
+            stop_price = self._check_price('stop_price', stop_price, side,
+                                           round_values)
+        return size, funds, stop_price
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""Client side rate limiting for the copra REST client.
+
+Coinbase Pro limits requests per second by IP address for public endpoints and
+by user for private ones, and answers requests over the limit with a 429
+error. The client's bulk operations acquire a token from a RateLimiter before
+each request so that they stay under the limit rather than finding it.
+
+"""
+
+import asyncio
+import collections
+
+# (requests per second, burst) as documented by Coinbase Pro.
+PUBLIC_RATE_LIMIT = (3, 6)
+PRIVATE_RATE_LIMIT = (5, 10)
+
+
+class RateLimiter:
+    """A token bucket shared by the requests it governs.
+
+    The bucket holds up to burst tokens and refills at rate tokens per second.
+    Each request takes one token, waiting for one if the bucket is empty.
+    Waiters are served in order, except that priority waiters are always
+    served before the rest.
+    """
+
+    def __init__(self, loop, rate, burst):
+        """
+
+        :param loop: The asyncio loop that the limiter runs in.
+        :type loop: asyncio loop
+
+        :param float rate: The sustained number of requests per second.
+
+        :param int burst: The maximum number of requests that can be made at
+            once after a quiet period.
+
+        :raises ValueError: rate or burst is less than or equal to 0.
+        """
+        if rate <= 0 or burst <= 0:
+            raise ValueError('rate and burst must be greater than 0.')
+
+        self.loop = loop
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = loop.time()
+        self._waiters = (collections.deque(), collections.deque())
+        self._handle = None
+
+    def _refill(self):
+        now = self.loop.time()
+        self._tokens = min(self.burst,
+                           self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _schedule(self):
+        if self._handle is None and any(self._waiters):
+            delay = max(0.0, (1 - self._tokens) / self.rate)
+            self._handle = self.loop.call_later(delay, self._wake)
+
+    def _wake(self):
+        self._handle = None
+        self._refill()
+        for waiters in self._waiters:
+            while waiters and self._tokens >= 1:
+                waiter = waiters.popleft()
+                if not waiter.done():
+                    self._tokens -= 1
+                    waiter.set_result(None)
+        self._schedule()
+
+    @property
+    def waiting(self):
+        """The number of requests waiting for a token.
+        """
+        return sum(len(waiters) for waiters in self._waiters)
+
+    def try_acquire(self):
+        """Take a token only if one is available without waiting.
+
+        :returns: True if a token was taken, False otherwise.
+        """
+        if any(self._waiters):
+            return False
+        self._refill()
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+    async def acquire(self, priority=False):
+        """Take a token, waiting until one is available.
+
+        :param bool priority: (optional) If True, the request is served before
+            any waiting request that is not a priority request. The default is
+            False.
+        """
+        if priority:
+            waiters = self._waiters[0]
+            queued = bool(waiters)
+        else:
+            waiters = self._waiters[1]
+            queued = any(self._waiters)
+
+        if not queued:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+
+        waiter = self.loop.create_future()
+        waiters.append(waiter)
+        self._schedule()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter in waiters:
+                waiters.remove(waiter)
+            elif waiter.done() and not waiter.cancelled():
+                # The token was granted as we were cancelled; hand it back.
+                self._tokens += 1
+                self._schedule()
+            raise
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""Compact record types for REST results.
+
+By default the REST client returns results as decoded JSON: a dict per trade,
+fill or ledger entry, with prices and sizes as strings. The record types
+here are an opt-in alternative. They use __slots__, so there is no per-record
+__dict__, and they convert numeric fields to int and float once, when the
+record is built.
+
+"""
+
+
+class Record:
+    """Base class for the record types.
+
+    Subclasses list their fields in __slots__.
+    """
+
+    __slots__ = ()
+
+    def _asdict(self):
+        """Return the record's fields as a dict.
+        """
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name)
+                   for name in self.__slots__)
+
+    def __repr__(self):
+        return '{}({})'.format(type(self).__name__, ', '.join(
+            '{}={!r}'.format(name, getattr(self, name))
+            for name in self.__slots__))
+
+    def __getstate__(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __setstate__(self, state):
+        for name, value in zip(self.__slots__, state):
+            setattr(self, name, value)
+
+
+class Trade(Record):
+    """A trade as returned by :meth:`copra.rest.Client.trades`.
+
+    :ivar str time: The ISO 8601 time of the trade.
+    :ivar int trade_id: The trade id.
+    :ivar float price: The trade price.
+    :ivar float size: The trade size.
+    :ivar str side: The maker order's side, buy or sell.
+    """
+
+    __slots__ = ('time', 'trade_id', 'price', 'size', 'side')
+
+    def __init__(self, time, trade_id, price, size, side):
+        self.time = time
+        self.trade_id = trade_id
+        self.price = price
+        self.size = size
+        self.side = side
+
+    @classmethod
+    def from_dict(cls, trade):
+        """Build a Trade from a decoded API result.
+
+        :param dict trade: The trade as decoded from the API response.
+
+        :returns: A Trade.
+        """
+        return cls(trade['time'], int(trade['trade_id']),
+                   float(trade['price']), float(trade['size']), trade['side'])
+
+
+class Fill(Record):
+    """A fill as returned by :meth:`copra.rest.Client.fills`.
+
+    :ivar int trade_id: The trade id.
+    :ivar str product_id: The product id.
+    :ivar float price: The fill price.
+    :ivar float size: The fill size.
+    :ivar str order_id: The id of the order that was filled.
+    :ivar str created_at: The ISO 8601 time of the fill.
+    :ivar str liquidity: M if the order was the maker, T if it was the taker.
+    :ivar float fee: The fee charged.
+    :ivar bool settled: Whether or not the fill has settled.
+    :ivar str side: The order's side, buy or sell.
+    """
+
+    __slots__ = ('trade_id', 'product_id', 'price', 'size', 'order_id',
+                 'created_at', 'liquidity', 'fee', 'settled', 'side')
+
+    def __init__(self, trade_id, product_id, price, size, order_id,
+                 created_at, liquidity, fee, settled, side):
+        self.trade_id = trade_id
+        self.product_id = product_id
+        self.price = price
+        self.size = size
+        self.order_id = order_id
+        self.created_at = created_at
+        self.liquidity = liquidity
+        self.fee = fee
+        self.settled = settled
+        self.side = side
+
+    @classmethod
+    def from_dict(cls, fill):
+        """Build a Fill from a decoded API result.
+
+        :param dict fill: The fill as decoded from the API response.
+
+        :returns: A Fill.
+        """
+        return cls(int(fill['trade_id']), fill['product_id'],
+                   float(fill['price']), float(fill['size']),
+                   fill['order_id'], fill['created_at'], fill.get('liquidity'),
+                   float(fill.get('fee', 0)), fill.get('settled', False),
+                   fill['side'])
+
+
+class Candle(Record):
+    """A historic rate bucket as returned by
+    :meth:`copra.rest.Client.historic_rates`.
+
+    :ivar int time: The UNIX time of the start of the bucket.
+    :ivar float low: The lowest price during the bucket.
+    :ivar float high: The highest price during the bucket.
+    :ivar float open: The first trade price in the bucket.
+    :ivar float close: The last trade price in the bucket.
+    :ivar float volume: The volume of trading activity during the bucket.
+    """
+
+    __slots__ = ('time', 'low', 'high', 'open', 'close', 'volume')
+
+    def __init__(self, time, low, high, open, close, volume):
+        self.time = time
+        self.low = low
+        self.high = high
+        self.open = open
+        self.close = close
+        self.volume = volume
+
+    @classmethod
+    def from_list(cls, candle):
+        """Build a Candle from a decoded API result.
+
+        :param list candle: [time, low, high, open, close, volume]
+
+        :returns: A Candle.
+        """
+        return cls(int(candle[0]), float(candle[1]), float(candle[2]),
+                   float(candle[3]), float(candle[4]), float(candle[5]))
+
+
+class LedgerEntry(Record):
+    """An account history entry as returned by
+    :meth:`copra.rest.Client.account_history`.
+
+    :ivar int id: The entry id.
+    :ivar str created_at: The ISO 8601 time of the entry.
+    :ivar float amount: The amount by which the balance changed.
+    :ivar float balance: The balance after the entry.
+    :ivar str type: The entry type: transfer, match, fee, rebate or
+        conversion.
+    :ivar dict details: Further details, depending on the type.
+    """
+
+    __slots__ = ('id', 'created_at', 'amount', 'balance', 'type', 'details')
+
+    def __init__(self, id, created_at, amount, balance, type, details):
+        self.id = id
+        self.created_at = created_at
+        self.amount = amount
+        self.balance = balance
+        self.type = type
+        self.details = details
+
+    @classmethod
+    def from_dict(cls, entry):
+        """Build a LedgerEntry from a decoded API result.
+
+        :param dict entry: The entry as decoded from the API response.
+
+        :returns: A LedgerEntry.
+        """
+        return cls(int(entry['id']), entry['created_at'],
+                   float(entry['amount']), float(entry['balance']),
+                   entry['type'], entry.get('details', {}))
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""Streaming download and incremental CSV parsing of Coinbase Pro reports.
+
+A finished report is a file at a (pre-signed) file_url. Fills and account
+reports can be very large, so these helpers never hold more than one chunk of
+the file in memory: download_report copies it to disk chunk by chunk, and
+ReportRows parses CSV rows out of each chunk as it arrives.
+
+"""
+
+import codecs
+import collections
+import csv
+
+
+async def download_report(loop, session, url, path, chunk_size=65536,
+                          timeout=None):
+    """Stream a report file to disk.
+
+    File writes run in the loop's default executor so that a slow disk doesn't
+    stall the loop.
+
+    :param loop: The asyncio loop.
+
+    :param aiohttp.ClientSession session: The session to download with.
+
+    :param str url: The report's file_url.
+
+    :param str path: The file to write.
+
+    :param int chunk_size: (optional) The maximum number of bytes read and
+        written at a time. The default is 65536.
+
+    :param aiohttp.ClientTimeout timeout: (optional) The timeout of the
+        download. None uses the session's. The default is None.
+
+    :returns int: The number of bytes written.
+
+    :raises aiohttp.ClientResponseError: The download failed.
+    """
+    kwargs = {'timeout': timeout} if timeout else {}
+    response = await session.get(url, **kwargs)
+    written = 0
+    try:
+        response.raise_for_status()
+        with open(path, 'wb') as f:
+            while True:
+                chunk = await response.content.read(chunk_size)
+                if not chunk:
+                    break
+                await loop.run_in_executor(None, f.write, chunk)
+                written += len(chunk)
+    finally:
+        response.release()
+    return written
+
+
+class ReportRows:
+    """An asynchronous iterator over the rows of a CSV report.
+
+    The report is downloaded a chunk at a time and each row is yielded as a
+    dict keyed by the CSV header as soon as it has been received in full.
+    Quoted fields may contain newlines.
+
+    Example::
+
+        async for row in ReportRows(loop, session, report['file_url']):
+            print(row['trade id'], row['price'])
+
+    :ivar list fieldnames: The CSV header, or None before the first row.
+    :ivar int bytes_read: The number of bytes received so far.
+    """
+
+    def __init__(self, loop, session, url, path=None, chunk_size=65536,
+                 timeout=None):
+        """
+
+        :param loop: The asyncio loop.
+
+        :param aiohttp.ClientSession session: The session to download with.
+
+        :param str url: The report's file_url.
+
+        :param str path: (optional) If provided, the report is also written to
+            this file as it is downloaded. The default is None.
+
+        :param int chunk_size: (optional) The maximum number of bytes read at
+            a time. The default is 65536.
+
+        :param aiohttp.ClientTimeout timeout: (optional) The timeout of the
+            download. None uses the session's. The default is None.
+        """
+        self.loop = loop
+        self.session = session
+        self.url = url
+        self.path = path
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self.fieldnames = None
+        self.bytes_read = 0
+
+        self._response = None
+        self._file = None
+        self._done = False
+        self._rows = collections.deque()
+        self._decoder = codecs.getincrementaldecoder('utf-8-sig')()
+        self._partial = ''
+        self._record = []
+        self._quotes = 0
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while not self._rows:
+            if self._done:
+                raise StopAsyncIteration
+            try:
+                await self._read()
+            except BaseException:
+                await self.close()
+                raise
+        return self._rows.popleft()
+
+    async def _read(self):
+        if self._response is None:
+            kwargs = {'timeout': self.timeout} if self.timeout else {}
+            self._response = await self.session.get(self.url, **kwargs)
+            self._response.raise_for_status()
+            if self.path:
+                self._file = open(self.path, 'wb')
+
+        chunk = await self._response.content.read(self.chunk_size)
+        if chunk:
+            self.bytes_read += len(chunk)
+            if self._file:
+                await self.loop.run_in_executor(None, self._file.write, chunk)
+            self._feed(self._decoder.decode(chunk))
+        else:
+            self._feed(self._decoder.decode(b'', final=True), final=True)
+            await self.close()
+
+    def _feed(self, text, final=False):
+        """Parse the complete records in a piece of decoded text.
+
+        A newline ends a record only if it falls outside quotes, i.e. when the
+        record so far holds an even number of quote characters.
+        """
+        lines = (self._partial + text).split('\n')
+        self._partial = '' if final else lines.pop()
+        if final and not lines[-1]:
+            lines.pop()
+
+        records = []
+        for line in lines:
+            self._record.append(line)
+            self._quotes += line.count('"')
+            if self._quotes % 2 == 0:
+                records.append('\n'.join(self._record))
+                self._record = []
+                self._quotes = 0
+        if final and self._record:
+            records.append('\n'.join(self._record))
+            self._record = []
+
+        for row in csv.reader(records):
+            if not row:
+                continue
+            if self.fieldnames is None:
+                self.fieldnames = row
+            else:
+                self._rows.append(dict(zip(self.fieldnames, row)))
+
+    async def close(self):
+        """Stop the download and close the output file, if any.
+
+        This is called automatically once the last row has been read or an
+        error is raised. Call it when abandoning iteration early.
+        """
+        self._done = True
+        if self._response is not None:
+            self._response.release()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""Request deadlines for the copra REST client.
+
+A Deadline is a time budget shared by every request made against it. Each
+request is given whatever is left of the budget, so a caller that retries, or
+a client method that makes several requests, can't overrun it. Within the
+remaining budget, connecting (including waiting for a pooled connection) and
+each read from the socket can be given budgets of their own.
+
+"""
+
+import asyncio
+
+import aiohttp
+
+
+class Deadline:
+    """A time budget for one or more requests.
+
+    Typically created with :meth:`copra.rest.Client.deadline`.
+
+    :ivar float expires: The loop time at which the budget runs out, or None
+        if only connect and read are limited.
+    """
+
+    def __init__(self, loop, timeout=None, connect=None, read=None):
+        """
+
+        :param loop: The asyncio loop that the requests run in.
+        :type loop: asyncio loop
+
+        :param float timeout: (optional) The total budget in seconds, from
+            now. The default is None which sets no total limit.
+
+        :param float connect: (optional) The budget in seconds of each
+            request for getting a connection. The default is None.
+
+        :param float read: (optional) The budget in seconds of each read from
+            the socket. The default is None.
+
+        :raises ValueError: timeout, connect or read is not greater than 0.
+        """
+        for value in (timeout, connect, read):
+            if value is not None and value <= 0:
+                raise ValueError('timeouts must be greater than 0.')
+
+        self.loop = loop
+        self.expires = None if timeout is None else loop.time() + timeout
+        self.connect = connect
+        self.read = read
+
+    def remaining(self):
+        """Return the seconds left in the budget, or None if it is unlimited.
+        """
+        if self.expires is None:
+            return None
+        return max(0.0, self.expires - self.loop.time())
+
+    @property
+    def expired(self):
+        """True once the budget has run out.
+        """
+        return self.remaining() == 0
+
+    def client_timeout(self):
+        """Return the aiohttp timeout for a request made now.
+
+        :returns: An aiohttp.ClientTimeout whose connect and read limits are
+            capped by the remaining budget.
+
+        :raises asyncio.TimeoutError: The budget has run out.
+        """
+        remaining = self.remaining()
+        if remaining == 0:
+            raise asyncio.TimeoutError()
+
+        def cap(limit):
+            if remaining is None or limit is None:
+                return limit
+            return min(limit, remaining)
+
+        return aiohttp.ClientTimeout(total=remaining,
+                                     connect=cap(self.connect),
+                                     sock_read=cap(self.read))
@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+"""Request tracing for the copra REST client.
+
+A traced request is timed phase by phase, from aiohttp's trace signals:
+
+* **queue** - Waiting in the lane's pool for a free connection.
+* **dns** - Resolving the host, when it wasn't cached.
+* **connect** - Opening a new connection, including the TLS handshake.
+  aiohttp has no signal between the two, so they are timed together.
+* **send** - Writing the request body, for requests that have one.
+* **wait** - From the request being sent until the response headers arrive:
+  the server's time plus the network round trip.
+* **read** - Reading and decoding the response body.
+* **total** - From the request starting to its body being read.
+
+Phases that a request didn't go through, like connect for a request that
+reused a pooled connection, are left out of its timings. Only a sample of
+requests is traced. The rest pay for a single check per signal.
+
+"""
+
+import random
+import time
+
+from copra.metrics import BUCKETS, Histogram
+from copra.rest.breaker import endpoint
+
+PHASES = ('queue', 'dns', 'connect', 'send', 'wait', 'read', 'total')
+
+
+class RequestTrace:
+    """The timings of a single traced request.
+
+    :ivar str method: The HTTP method.
+    :ivar str path: The request path.
+    :ivar str endpoint: The method and path template, see
+        :func:`copra.rest.breaker.endpoint`.
+    :ivar int status: The response status, or None if there was no response.
+    :ivar error: The exception the request raised, or None.
+    :ivar dict marks: The name: time.monotonic() time of each event seen.
+    """
+
+    def __init__(self, method, path):
+        self.method = method
+        self.path = path
+        self.endpoint = endpoint(method, path)
+        self.status = None
+        self.error = None
+        self.marks = {'start': time.monotonic()}
+
+    def mark(self, name):
+        """Record the time of an event.
+
+        :param str name: The event.
+        """
+        self.marks[name] = time.monotonic()
+
+    def _span(self, start, end):
+        if start in self.marks and end in self.marks:
+            return max(0.0, self.marks[end] - self.marks[start])
+        return None
+
+    def phases(self):
+        """Return the time spent in each phase.
+
+        :returns: A dict of phase: seconds, for the phases the request went
+            through. See the module documentation for the phases.
+        """
+        marks = self.marks
+        phases = {
+            'queue': self._span('queue_start', 'queue_end'),
+            'dns': self._span('dns_start', 'dns_end'),
+            'connect': self._span('connect_start', 'connect_end'),
+            'send': None,
+            'wait': None,
+            'read': self._span('headers', 'end'),
+            'total': self._span('start', 'end'),
+        }
+        if phases['connect'] is not None and phases['dns'] is not None:
+            phases['connect'] = max(0.0, phases['connect'] - phases['dns'])
+
+        # The connection is ready once it is created or taken from the pool.
+        connected = 'connect_end' if 'connect_end' in marks else 'reuse'
+        if connected in marks:
+            if 'sent' in marks:
+                phases['send'] = self._span(connected, 'sent')
+            phases['wait'] = self._span('sent' if 'sent' in marks else
+                                        connected, 'headers')
+        return {phase: seconds for phase, seconds in phases.items()
+                if seconds is not None}
+
+
+class Tracer:
+    """Traces a sample of a client's requests.
+
+    Typically created by :meth:`copra.rest.Client.enable_tracing`.
+
+    :ivar int requests: The number of requests seen.
+    :ivar int traced: The number of those that were traced.
+    """
+
+    def __init__(self, sample_rate=0.01, callback=None, buckets=BUCKETS):
+        """
+
+        :param float sample_rate: (optional) The fraction of requests, greater
+            than 0 and at most 1, that are traced. The default is 0.01.
+
+        :param callback: (optional) A function called with the
+            :class:`RequestTrace` of each traced request once it has
+            finished. It is called in the event loop and should be quick. The
+            default is None.
+
+        :param tuple buckets: (optional) The histogram bucket upper bounds,
+            in seconds. The default is BUCKETS.
+
+        :raises ValueError: sample_rate is out of range.
+        """
+        if not 0 < sample_rate <= 1:
+            raise ValueError('sample_rate must be greater than 0 and at '
+                             'most 1.')
+
+        self.sample_rate = sample_rate
+        self.callback = callback
+        self.buckets = buckets
+        self.requests = 0
+        self.traced = 0
+        self.histograms = {}
+
+    def start(self, method, path):
+        """Decide whether to trace a request that is about to be sent.
+
+        :param str method: The HTTP method.
+
+        :param str path: The request path.
+
+        :returns: A :class:`RequestTrace` to pass to aiohttp as the request's
+            trace_request_ctx, or None if the request isn't sampled.
+        """
+        self.requests += 1
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return None
+        return RequestTrace(method, path)
+
+    def finish(self, trace, response=None, error=None):
+        """Record a traced request once its response has been read.
+
+        :param RequestTrace trace: The request's trace.
+
+        :param response: (optional) The aiohttp.ClientResponse, if there was
+            one. The default is None.
+
+        :param error: (optional) The exception the request raised, if any.
+            The default is None.
+        """
+        trace.mark('end')
+        trace.status = None if response is None else int(response.status)
+        trace.error = error
+        self.traced += 1
+
+        histograms = self.histograms.get(trace.endpoint)
+        if histograms is None:
+            histograms = self.histograms[trace.endpoint] = {}
+        for phase, seconds in trace.phases().items():
+            histogram = histograms.get(phase)
+            if histogram is None:
+                histogram = histograms[phase] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+        if self.callback:
+            self.callback(trace)
+
+    def snapshot(self):
+        """Return the phase histograms of every endpoint traced.
+
+        :returns: A dict of endpoint: dict of phase: :meth:`Histogram.snapshot`
+            dict.
+        """
+        return {key: {phase: histogram.snapshot()
+                      for phase, histogram in histograms.items()}
+                for key, histograms in self.histograms.items()}
+
+    def reset(self):
+        """Forget every histogram and count.
+        """
+        self.requests = 0
+        self.traced = 0
+        self.histograms.clear()
+
+
+# aiohttp trace signal: RequestTrace event.
+SIGNALS = (
+    ('on_request_start', 'start'),
+    ('on_connection_queued_start', 'queue_start'),
+    ('on_connection_queued_end', 'queue_end'),
+    ('on_dns_resolvehost_start', 'dns_start'),
+    ('on_dns_resolvehost_end', 'dns_end'),
+    ('on_connection_create_start', 'connect_start'),
+    ('on_connection_create_end', 'connect_end'),
+    ('on_connection_reuseconn', 'reuse'),
+    ('on_request_chunk_sent', 'sent'),
+    ('on_request_end', 'headers'),
+)
+
+
+def _marker(name):
+
+    async def mark(session, ctx, params):
+        trace = ctx.trace_request_ctx
+        if isinstance(trace, RequestTrace):
+            trace.mark(name)
+
+    return mark
+
+
+def install(trace_config):
+    """Add the signal handlers that fill in RequestTraces to an aiohttp
+    TraceConfig.
+
+    Requests sent with a :class:`RequestTrace` as their trace_request_ctx are
+    timed. Other requests are ignored.
+
+    :param aiohttp.TraceConfig trace_config: The trace config, which must not
+        yet be in use by a session.
+    """
+    for signal, name in SIGNALS:
+        getattr(trace_config, signal).append(_marker(name))
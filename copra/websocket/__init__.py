@@ -1,2 +1,3 @@
 from copra.websocket.channel import Channel
-from copra.websocket.client import Client, FEED_URL, SANDBOX_FEED_URL
\ No newline at end of file
+from copra.websocket.client import Client, FEED_URL, SANDBOX_FEED_URL
+from copra.websocket.tape import TradeTape
@@ -14,70 +14,95 @@ from urllib.parse import urlparse
 
 from autobahn.asyncio.websocket import WebSocketClientFactory
 from autobahn.asyncio.websocket import WebSocketClientProtocol
+from autobahn.websocket.compress import PerMessageDeflateOffer
+from autobahn.websocket.compress import PerMessageDeflateResponse
+from autobahn.websocket.compress import PerMessageDeflateResponseAccept
+
+from copra.metrics import WebSocketMetrics
+from copra.websocket.dispatch import ThreadedDispatcher
+from copra.websocket.profiler import Profiler
+from copra.websocket.transport import BaseProtocol, TRANSPORTS
 
 logger = logging.getLogger(__name__)
 
 FEED_URL = 'wss://ws-feed.pro.coinbase.com:443'
 SANDBOX_FEED_URL = 'wss://ws-feed-public.sandbox.pro.coinbase.com:443'
 
-
-class ClientProtocol(WebSocketClientProtocol):
+# Named sets of autobahn protocol options. Both skip UTF-8 validation of
+# incoming frames since every message is decoded (and so validated) by
+# json.loads anyway, and both lift the payload size limits since a level2 or
+# full channel snapshot can be large. low_latency disables Nagle's algorithm
+# and pings aggressively so that a stalled connection is detected (and
+# reconnected) quickly. high_throughput lets the kernel coalesce small writes
+# and pings rarely.
+PROFILES = {
+    'low_latency': {
+        'utf8validateIncoming': False,
+        'maxFramePayloadSize': 0,
+        'maxMessagePayloadSize': 0,
+        'autoFragmentSize': 0,
+        'tcpNoDelay': True,
+        'openHandshakeTimeout': 5,
+        'closeHandshakeTimeout': 1,
+        'autoPingInterval': 5,
+        'autoPingTimeout': 3,
+    },
+    'high_throughput': {
+        'utf8validateIncoming': False,
+        'maxFramePayloadSize': 0,
+        'maxMessagePayloadSize': 0,
+        'autoFragmentSize': 0,
+        'tcpNoDelay': False,
+        'autoPingInterval': 30,
+        'autoPingTimeout': 10,
+    },
+}
+
+
+class ClientProtocol(BaseProtocol, WebSocketClientProtocol):
     """Websocket client protocol.
 
     This is a subclass of autobahn.asyncio.WebSocket.WebSocketClientProtocol.
     In most cases this should not need to be subclassed or even accessed
-    directly.
+    directly. The onOpen, onClose and onMessage callbacks are inherited from
+    copra.websocket.transport.BaseProtocol.
     """
 
     def __call__(self):
         return self
 
-    def onOpen(self):
-        """Callback fired on initial WebSocket opening handshake completion.
-
-        You now can send and receive WebSocket messages.
+    def pause_reading(self):
+        """Stop reading from the connection until :meth:`resume_reading`.
         """
-        self.factory.on_open()
-
-    def onClose(self, wasClean, code, reason):
-        """Callback fired when the WebSocket connection has been closed.
-
-        (WebSocket closing handshake has been finished or the connection was
-        closed uncleanly).
-
-        Args:
-          wasClean (bool): True iff the WebSocket connection closed cleanly.
-          code (int or None): Close status code as sent by the WebSocket peer.
-          reason (str or None): Close reason as sent by the WebSocket peer.
-        """
-        self.factory.on_close(wasClean, code, reason)
-
-    def onMessage(self, payload, isBinary):
-        """Callback fired when a complete WebSocket message was received.
-
-        Call its factory's (the client's) on_message method with a
-        dict representing the JSON message receieved.
-
-        Args:
-            payload (bytes): The WebSocket message received.
-            isBinary (bool): Flag indicating whether payload is binary or UTF-8
-            encoded text.
+        transport = getattr(self, 'transport', None)
+        if transport is not None and not getattr(self, '_reading_paused',
+                                                 False):
+            self._reading_paused = True
+            transport.pause_reading()
+
+    def resume_reading(self):
+        """Start reading from the connection again.
         """
-        msg = json.loads(payload.decode('utf8'))
-        if msg['type'] == 'error':
-            self.factory.on_error(msg['message'], msg.get('reason', ''))
-        else:
-            self.factory.on_message(msg)
+        transport = getattr(self, 'transport', None)
+        if transport is not None and getattr(self, '_reading_paused', False):
+            self._reading_paused = False
+            transport.resume_reading()
 
 
 class Client(WebSocketClientFactory):
     """Asyncronous WebSocket client for Coinbase Pro.
     """
 
+    # The callback that enable_threaded_dispatch moves to worker threads.
+    threaded_handler = 'on_message'
+
     def __init__(self, loop, channels, feed_url=FEED_URL,
                  auth=False, key='', secret='', passphrase='',
                  auto_connect=True, auto_reconnect=True,
-                 name='WebSocket Client'):
+                 name='WebSocket Client', compress=False,
+                 compress_window_bits=None, compress_mem_level=None,
+                 profile=None, protocol_options=None, transport='autobahn',
+                 session=None, clock=None, metrics=None):
         """
         
         :param loop: The asyncio loop that the client runs in.
@@ -113,9 +138,73 @@ class Client(WebSocketClientFactory):
             way but by the Client explicitly itself. The default is True.
                 
         :param str name: A name to identify this client in logging, etc.
-        
+
+        :param bool compress: If True, the Client offers the permessage-deflate
+            extension during the opening handshake so that the server may
+            compress the messages it sends. This trades CPU time spent
+            inflating messages for (much) less bandwidth. The default is False.
+
+        :param int compress_window_bits: (optional) The maximum size of the
+            LZ77 sliding window, as a base 2 logarithm, that the server is
+            asked to use when compressing messages. Must be between 9 and 15;
+            autobahn rejects 8. Smaller windows use less memory but compress
+            less. Not supported by the websockets transport. The default is
+            None which lets the server choose.
+
+        :param int compress_mem_level: (optional) The zlib memory level, 1
+            through 9, used by the client when compressing the messages it
+            sends. Only supported by the autobahn transport. The default is
+            None which uses zlib's default.
+
+        :param str profile: (optional) The name of a set of autobahn protocol
+            options to apply, either low_latency or high_throughput. See
+            copra.websocket.client.PROFILES for the exact values. The default
+            is None which keeps the autobahn defaults.
+
+        :param dict protocol_options: (optional) Keyword arguments passed to
+            autobahn's WebSocketClientFactory.setProtocolOptions. These
+            override any option set by profile. The default is None.
+
+        :param str transport: (optional) The WebSocket library the client
+            runs on: autobahn, aiohttp or websockets. The websockets package
+            is not a copra requirement and must be installed separately to use
+            it. profile, protocol_options and compress_mem_level are only
+            supported by autobahn. The default is autobahn.
+
+        :param session: (optional) An existing session, for example that of a
+            copra.rest.Client, to open the connection on when transport is
+            aiohttp. The default is None which creates a new session for each
+            connection.
+        :type session: aiohttp.ClientSession
+
+        :param clock: (optional) A server clock estimate, for example the one
+            started by copra.rest.Client.sync_clock, used to timestamp the
+            authenticated subscription message. The default is None which uses
+            the local time.
+        :type clock: copra.rest.clock.ClockSync
+
+        :param metrics: (optional) A registry, which may be shared with other
+            clients, to record the messages received, reconnections and the
+            time spent in callbacks in. See
+            copra.metrics.WebSocketMetrics for the metrics. The default is
+            None which records nothing.
+        :type metrics: copra.metrics.Registry
+
         :raises ValueError: If auth is True and key, secret, and passphrase are
             not provided.
+
+        :raises ValueError: If compress_window_bits or compress_mem_level are
+            out of range.
+
+        :raises ValueError: If profile is not a known profile name.
+
+        :raises ValueError: If transport is not autobahn, aiohttp or
+            websockets, profile, protocol_options or compress_mem_level are
+            used with a transport other than autobahn, or
+            compress_window_bits is used with websockets.
+
+        :raises ImportError: If the library transport requires is not
+            installed.
         """
 
         self.loop = loop
@@ -141,16 +230,101 @@ class Client(WebSocketClientFactory):
         self.key = key
         self.secret = secret
         self.passphrase = passphrase
+        self.clock = clock
 
         self.auto_connect = auto_connect
         self.auto_reconnect = auto_reconnect
         self.name = name
+        self.metrics = (None if metrics is None else
+                        WebSocketMetrics(metrics, name))
+        # A Profiler, set by enable_profiling, that times the callbacks.
+        self.profiler = None
+        # A ThreadedDispatcher, set by enable_threaded_dispatch.
+        self.dispatcher = None
 
         super().__init__(self.feed_url)
-        
+
+        if transport != 'autobahn' and transport not in TRANSPORTS:
+            raise ValueError(
+                'Invalid transport: {}. Must be autobahn, {}.'.format(
+                    transport, ', '.join(sorted(TRANSPORTS))))
+
+        if transport != 'autobahn' and (profile or protocol_options or
+                                        compress_mem_level is not None):
+            raise ValueError('profile, protocol_options and compress_mem_level '
+                             'require the autobahn transport')
+
+        if transport == 'websockets' and compress_window_bits is not None:
+            raise ValueError('compress_window_bits is not supported by the '
+                             'websockets transport')
+
+        if transport != 'autobahn':
+            TRANSPORTS[transport].check()
+
+        self.transport = transport
+        self.session = session
+
+        if profile is not None and profile not in PROFILES:
+            raise ValueError('Invalid profile: {}. Must be one of {}.'.format(
+                profile, ', '.join(sorted(PROFILES))))
+
+        self.profile = profile
+        options = dict(PROFILES[profile]) if profile else {}
+        options.update(protocol_options or {})
+        if options:
+            self.setProtocolOptions(**options)
+
+        self.compress = compress
+        self.compress_window_bits = compress_window_bits
+        if self.compress:
+            self._set_compression_options(compress_window_bits,
+                                          compress_mem_level)
+
         if self.auto_connect:
             self.add_as_task_to_loop()
 
+    def _set_compression_options(self, window_bits=None, mem_level=None):
+        """Configure the permessage-deflate offer and accept hooks.
+
+        :param int window_bits: (optional) The maximum window size, as a base 2
+            logarithm between 9 and 15, requested for server-to-client
+            compression. The default is None.
+
+        :param int mem_level: (optional) The zlib memory level used for
+            client-to-server compression. The default is None.
+
+        :raises ValueError: If window_bits or mem_level are out of range.
+        """
+        if window_bits is not None and window_bits not in range(9, 16):
+            raise ValueError(
+                'Invalid compress_window_bits: {}. Must be 9 - 15.'.format(
+                    window_bits))
+
+        if mem_level is not None and mem_level not in range(1, 10):
+            raise ValueError(
+                'Invalid compress_mem_level: {}. Must be 1 - 9.'.format(
+                    mem_level))
+
+        offer = PerMessageDeflateOffer(accept_no_context_takeover=True,
+                                       accept_max_window_bits=True,
+                                       request_max_window_bits=window_bits or 0)
+
+        def accept(response):
+            if not isinstance(response, PerMessageDeflateResponse):
+                return None
+            client_bits = None
+            if window_bits is not None:
+                client_bits = window_bits
+                if response.client_max_window_bits:
+                    client_bits = min(client_bits,
+                                      response.client_max_window_bits)
+            return PerMessageDeflateResponseAccept(response,
+                                                   window_bits=client_bits,
+                                                   mem_level=mem_level)
+
+        self.setProtocolOptions(perMessageCompressionOffers=[offer],
+                                perMessageCompressionAccept=accept)
+
     def _get_subscribe_message(self, channels, unsubscribe=False, timestamp=None):
         """Create and return the subscription message for the provided channels.
         
@@ -169,7 +343,7 @@ class Client(WebSocketClientFactory):
 
         if self.auth:
             if not timestamp:
-                timestamp = str(time.time())
+                timestamp = str(self.clock.time() if self.clock else time.time())
             message = timestamp + 'GET' + '/users/self/verify'
             message = message.encode('ascii')
             hmac_key = base64.b64decode(self.secret)
@@ -229,12 +403,108 @@ class Client(WebSocketClientFactory):
             msg = self._get_subscribe_message(channels, unsubscribe=True)
             self.protocol.sendMessage(msg)
 
+    def enable_profiling(self, budget=0.01, lag_threshold=0.1,
+                         lag_interval=0.5, capture_stacks=False):
+        """Time the client's callbacks and watch the event loop's lag.
+
+        Once enabled, on_message and on_error, and the callbacks of
+        subclasses like TradeTape's on_trade, are timed. When one takes
+        longer than budget seconds on_slow_handler is called, and when the
+        event loop is more than lag_threshold seconds late in waking a
+        sleeping task on_loop_lag is called. Both log a warning unless
+        overridden.
+
+        :param float budget: (optional) The time in seconds a callback may
+            take. The default is 0.01.
+
+        :param float lag_threshold: (optional) The event loop lag in seconds
+            that is reported. The default is 0.1.
+
+        :param float lag_interval: (optional) How often, in seconds, the lag
+            is measured. The default is 0.5.
+
+        :param bool capture_stacks: (optional) If True, a watchdog thread
+            samples the event loop thread's stack while a callback is over
+            budget, and on_slow_handler is passed it. The default is False.
+
+        :returns: The copra.websocket.profiler.Profiler. Its snapshot method
+            returns the statistics of each callback and of the lag.
+
+        :raises ValueError: An argument is not greater than 0.
+        """
+        if self.profiler is not None:
+            self.loop.create_task(self.profiler.stop())
+        self.profiler = Profiler(self.loop, budget, lag_threshold,
+                                 lag_interval, capture_stacks,
+                                 self.on_slow_handler, self.on_loop_lag)
+        self.profiler.start()
+        return self.profiler
+
+    def enable_threaded_dispatch(self, workers=4, queue_size=1000,
+                                 overflow='block'):
+        """Run on_message on a pool of worker threads.
+
+        Use this when on_message blocks, for example on synchronous database
+        writes, so that the event loop only receives and decodes messages.
+        Each message is handed to a worker chosen by its product id, so the
+        messages of a product are handled one at a time and in order. Those
+        of different products may be handled at the same time, so on_message
+        must be safe to call from several threads. TradeTape runs on_trade
+        on the workers instead, and keeps on_message on the event loop.
+
+        Each worker has a queue of queue_size messages. If a queue fills up
+        the message is either held and the client stops reading from its
+        connection until the worker makes room (block), which slows
+        receiving to the handler's pace without blocking the event loop, or
+        the message is dropped (drop). Messages already queued or held are
+        handled before :meth:`close` returns.
+
+        Must be called before messages are received, and only once.
+
+        :param int workers: (optional) The number of worker threads. The
+            default is 4.
+
+        :param int queue_size: (optional) The number of messages each
+            worker's queue holds. The default is 1000.
+
+        :param str overflow: (optional) block or drop. The default is block.
+
+        :returns: The copra.websocket.dispatch.ThreadedDispatcher. Its
+            snapshot method returns the queue and handler statistics.
+
+        :raises ValueError: An argument is out of range, or threaded dispatch
+            is already enabled.
+        """
+        if self.dispatcher is not None:
+            raise ValueError('threaded dispatch is already enabled.')
+        handler = getattr(self, self.threaded_handler)
+        self.dispatcher = ThreadedDispatcher(
+            self.loop, handler, workers, queue_size, overflow, self.name,
+            on_pause=self._pause_reading, on_resume=self._resume_reading)
+        setattr(self, self.threaded_handler, self.dispatcher.submit)
+        return self.dispatcher
+
+    # Until the first connection, protocol is autobahn's protocol class.
+    def _pause_reading(self):
+        if isinstance(self.protocol, BaseProtocol):
+            self.protocol.pause_reading()
+
+    def _resume_reading(self):
+        if isinstance(self.protocol, BaseProtocol):
+            self.protocol.resume_reading()
+
     def add_as_task_to_loop(self):
         """Add the client to the asyncio loop.
 
         Creates a coroutine for making a connection to the WebSocket server and
         adds it as a task to the asyncio loop.
         """
+        if self.transport != 'autobahn':
+            self.protocol = TRANSPORTS[self.transport](self)
+            self.coro = self.protocol.run()
+            self.protocol.task = self.loop.create_task(self.coro)
+            return
+
         self.protocol = ClientProtocol()
         url = urlparse(self.url)
         self.coro = self.loop.create_connection(self, url.hostname, url.port,
@@ -279,6 +549,8 @@ class Client(WebSocketClientFactory):
         if not self.closing and self.auto_reconnect:
             msg = '{} attempting to reconnect to {}.'
             logger.info(msg.format(self.name, self.url))
+            if self.metrics is not None:
+                self.metrics.reconnects.inc(self.name)
 
             self.add_as_task_to_loop()
 
@@ -300,12 +572,41 @@ class Client(WebSocketClientFactory):
         """
         print(message)
 
+    def on_slow_handler(self, handler, seconds, stack=None):
+        """Callback fired, once profiling is enabled, when a callback took
+        longer than its budget.
+
+        :param str handler: The callback's name, for example on_message.
+
+        :param float seconds: The time it took.
+
+        :param str stack: (optional) The event loop thread's stack sampled
+            while the callback was over budget, if stacks are captured.
+        """
+        msg = '{} {} took {:.3f}s, over its {:.3f}s budget.'.format(
+            self.name, handler, seconds, self.profiler.budget)
+        if stack:
+            msg += ' Stack while over budget:\n' + stack
+        logger.warning(msg)
+
+    def on_loop_lag(self, lag):
+        """Callback fired, once profiling is enabled, when the event loop
+        is slow to run tasks.
+
+        :param float lag: How late, in seconds, a sleeping task was woken.
+        """
+        logger.warning('{} event loop lag of {:.3f}s.'.format(self.name, lag))
+
     async def close(self):
         """Close the WebSocket connection.
         """
+        if self.profiler is not None:
+            await self.profiler.stop()
         self.closing = True
         self.protocol.sendClose()
         await self.disconnected.wait()
+        if self.dispatcher is not None:
+            await self.dispatcher.stop()
 
 if __name__ == '__main__':
     # A sanity check.
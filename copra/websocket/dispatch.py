@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+"""Running a WebSocket client's message handler on worker threads.
+
+A handler that blocks, for example one that writes each message to a
+database, holds up the event loop and so every message behind it. A
+ThreadedDispatcher runs the handler on a pool of worker threads instead,
+leaving the event loop to receive and decode messages.
+
+Each message is handed to a worker chosen by its product id, so the messages
+of any one product are handled in the order they were received, one at a
+time. Each worker has a bounded queue. When a queue is full the message is
+either dropped or, to block, held in a backlog on the event loop while the
+client stops reading from its connection until the worker catches up. The
+event loop itself never waits on a worker, so other connections, pings and
+REST requests carry on.
+
+"""
+
+import asyncio
+import collections
+import logging
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+OVERFLOWS = ('block', 'drop')
+
+_STOP = object()
+
+
+class _Worker:
+    """A worker thread and its queue.
+
+    The counts are only changed by the worker's thread.
+    """
+
+    def __init__(self, dispatcher, index, queue_size):
+        self.dispatcher = dispatcher
+        self.queue = queue.Queue(queue_size)
+        # Messages waiting for room in the queue, only used by the event
+        # loop's thread. waiting tells the worker to report when it makes
+        # room.
+        self.backlog = collections.deque()
+        self.waiting = False
+        self.handled = 0
+        self.errors = 0
+        self.busy = 0.0
+        self.max = 0.0
+        self.thread = threading.Thread(
+            target=self.run, daemon=True,
+            name='{} worker {}'.format(dispatcher.name, index))
+
+    def run(self):
+        dispatcher = self.dispatcher
+        handler = dispatcher.handler
+        while True:
+            message = self.queue.get()
+            if self.waiting:
+                dispatcher.loop.call_soon_threadsafe(dispatcher._refill, self)
+            if message is _STOP:
+                return
+            start = time.monotonic()
+            try:
+                handler(message)
+            except Exception:
+                self.errors += 1
+                logger.exception('{} handler failed on {}'.format(
+                    self.dispatcher.name, message))
+            seconds = time.monotonic() - start
+            self.handled += 1
+            self.busy += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+
+class ThreadedDispatcher:
+    """Runs a handler on worker threads, in order per product.
+
+    Typically created by
+    :meth:`copra.websocket.Client.enable_threaded_dispatch`.
+
+    :ivar int submitted: The number of messages queued.
+    :ivar int dropped: The number of messages dropped because their queue
+        was full.
+    :ivar int pauses: The number of times reading was paused because a queue
+        was full.
+    """
+
+    def __init__(self, loop, handler, workers=4, queue_size=1000,
+                 overflow='block', name='copra dispatch', on_pause=None,
+                 on_resume=None):
+        """
+
+        :param loop: The asyncio loop that messages are submitted from.
+        :type loop: asyncio loop
+
+        :param handler: The function called, on a worker thread, with each
+            message.
+
+        :param int workers: (optional) The number of worker threads. The
+            default is 4.
+
+        :param int queue_size: (optional) The number of messages each
+            worker's queue holds. The default is 1000.
+
+        :param str overflow: (optional) What to do with a message whose queue
+            is full: block holds it until there is room and calls on_pause,
+            drop drops it. The default is block.
+
+        :param str name: (optional) A name for the worker threads and log
+            messages. The default is copra dispatch.
+
+        :param on_pause: (optional) A function called, with overflow block,
+            each time a message is held because its queue is full. It should
+            stop messages being received. The default is None.
+
+        :param on_resume: (optional) A function called once every held
+            message has been queued. The default is None.
+
+        :raises ValueError: workers or queue_size is less than 1, or overflow
+            is not block or drop.
+        """
+        if workers < 1 or queue_size < 1:
+            raise ValueError('workers and queue_size must be at least 1.')
+        if overflow not in OVERFLOWS:
+            raise ValueError('Invalid overflow: {}. Must be block or '
+                             'drop.'.format(overflow))
+
+        self.loop = loop
+        self.handler = handler
+        self.overflow = overflow
+        self.name = name
+        self.on_pause = on_pause
+        self.on_resume = on_resume
+        self.submitted = 0
+        self.dropped = 0
+        self.pauses = 0
+        self.paused = False
+        self.workers = [_Worker(self, index, queue_size)
+                        for index in range(workers)]
+        for worker in self.workers:
+            worker.thread.start()
+
+    def submit(self, message):
+        """Queue a message for its product's worker, without blocking.
+
+        Must be called from the event loop's thread.
+
+        :param dict message: The message. Messages without a product_id all
+            go to the same worker.
+        """
+        worker = self.workers[hash(message.get('product_id')) %
+                              len(self.workers)]
+        if not worker.backlog:
+            try:
+                worker.queue.put_nowait(message)
+                self.submitted += 1
+                return
+            except queue.Full:
+                if self.overflow == 'drop':
+                    self.dropped += 1
+                    return
+
+        # Hold the message, in order, until the worker makes room.
+        worker.backlog.append(message)
+        worker.waiting = True
+        self.submitted += 1
+        if not self.paused:
+            self.paused = True
+            self.pauses += 1
+        if self.on_pause:
+            self.on_pause()
+        # The worker may have made room before it could see waiting.
+        self._refill(worker)
+
+    def _refill(self, worker):
+        """Move a worker's backlog into its queue, as far as it fits, and
+        resume once every backlog is empty.
+        """
+        backlog = worker.backlog
+        while backlog:
+            try:
+                worker.queue.put_nowait(backlog[0])
+            except queue.Full:
+                return
+            backlog.popleft()
+        worker.waiting = False
+
+        if self.paused and not any(w.backlog for w in self.workers):
+            self.paused = False
+            if self.on_resume:
+                self.on_resume()
+
+    def _drain(self, worker, messages):
+        for message in messages:
+            worker.queue.put(message)
+        worker.queue.put(_STOP)
+        worker.thread.join()
+
+    async def stop(self):
+        """Let the workers handle the messages already queued or held, then
+        stop them.
+
+        The workers are waited for on the loop's default executor, so the
+        loop isn't blocked.
+        """
+        drains = []
+        for worker in self.workers:
+            messages = list(worker.backlog)
+            worker.backlog.clear()
+            worker.waiting = False
+            drains.append(self.loop.run_in_executor(None, self._drain, worker,
+                                                    messages))
+        await asyncio.gather(*drains)
+
+    def snapshot(self):
+        """Return the dispatcher's statistics.
+
+        :returns: A dict with the number of messages submitted and dropped,
+            the number of times reading was paused, and workers, a list with
+            a dict for each worker: the number of messages queued, held in
+            its backlog, handled and that raised an exception, and the total
+            and maximum time in seconds spent handling them.
+        """
+        return {
+            'submitted': self.submitted,
+            'dropped': self.dropped,
+            'pauses': self.pauses,
+            'workers': [{'queued': worker.queue.qsize(),
+                         'backlog': len(worker.backlog),
+                         'handled': worker.handled,
+                         'errors': worker.errors,
+                         'busy': worker.busy,
+                         'max': worker.max} for worker in self.workers],
+        }
@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+"""Callback profiling for the copra WebSocket client.
+
+Messages are passed to the client's callbacks one at a time on the event
+loop, so a callback that is slow holds up everything behind it: the
+transport's receive buffer grows and every later message arrives late. The
+Profiler times each callback against a budget and watches the event loop's
+lag, the delay in waking a task that asked to sleep, and reports both through
+hooks.
+
+A slow callback has already returned by the time it is found to be slow. To
+show where it spent its time, the profiler can run a watchdog thread that,
+while a callback is over budget, samples the event loop thread's stack.
+
+"""
+
+import asyncio
+import sys
+import threading
+import time
+import traceback
+
+
+def call_handler(client, name, handler, *args):
+    """Call one of a client's callbacks, timing it for the client's metrics
+    and profiler.
+
+    :param client: The client.
+    :type client: copra.websocket.Client
+
+    :param str name: The callback's name, for example on_message.
+
+    :param handler: The callback.
+
+    :param args: The arguments to call it with.
+
+    :returns: What the callback returns.
+    """
+    metrics = client.metrics
+    profiler = client.profiler
+    if profiler is not None:
+        profiler.enter(name)
+    start = time.monotonic()
+    try:
+        return handler(*args)
+    finally:
+        seconds = time.monotonic() - start
+        if metrics is not None:
+            metrics.handled(name, seconds)
+        if profiler is not None:
+            profiler.exit(name, seconds)
+
+
+class Profiler:
+    """Times a client's callbacks and the event loop's lag.
+
+    Typically created by :meth:`copra.websocket.Client.enable_profiling`.
+
+    :ivar dict handlers: Callback name: dict with the number of calls, the
+        total and maximum time and the number of calls over budget.
+    :ivar dict lag: The last and maximum event loop lag measured, in
+        seconds, and the number of times it was over lag_threshold.
+    """
+
+    def __init__(self, loop, budget=0.01, lag_threshold=0.1, lag_interval=0.5,
+                 capture_stacks=False, on_slow_handler=None, on_loop_lag=None):
+        """
+
+        :param loop: The asyncio loop that the client runs in.
+        :type loop: asyncio loop
+
+        :param float budget: (optional) The time in seconds a callback may
+            take before it is reported. The default is 0.01.
+
+        :param float lag_threshold: (optional) The event loop lag in seconds
+            that is reported. The default is 0.1.
+
+        :param float lag_interval: (optional) How often, in seconds, the lag
+            is measured. The default is 0.5.
+
+        :param bool capture_stacks: (optional) If True, a watchdog thread
+            samples the event loop thread's stack while a callback is over
+            budget. The default is False.
+
+        :param on_slow_handler: (optional) A function called with the name
+            of a callback, the seconds it took, and the sampled stack, a
+            str, or None, each time a callback is over budget. The default is
+            None.
+
+        :param on_loop_lag: (optional) A function called with the lag in
+            seconds each time it is over lag_threshold. The default is None.
+
+        :raises ValueError: budget, lag_threshold or lag_interval is not
+            greater than 0.
+        """
+        if budget <= 0 or lag_threshold <= 0 or lag_interval <= 0:
+            raise ValueError('budget, lag_threshold and lag_interval must be '
+                             'greater than 0.')
+
+        self.loop = loop
+        self.budget = budget
+        self.lag_threshold = lag_threshold
+        self.lag_interval = lag_interval
+        self.capture_stacks = capture_stacks
+        self.on_slow_handler = on_slow_handler
+        self.on_loop_lag = on_loop_lag
+        self.handlers = {}
+        self.lag = {'last': 0.0, 'max': 0.0, 'slow': 0}
+
+        # The outermost callback running: (call number, start time).
+        self._running = None
+        self._calls = 0
+        self._depth = 0
+        # The stack sampled by the watchdog: (call number, stack).
+        self._stack = None
+
+        self._task = None
+        self._thread = None
+        self._thread_id = None
+        self._stopped = threading.Event()
+
+    def enter(self, handler):
+        """Note that a callback is starting.
+
+        :param str handler: The callback's name.
+        """
+        if self._depth == 0:
+            self._calls += 1
+            self._running = (self._calls, time.monotonic())
+        self._depth += 1
+
+    def exit(self, handler, seconds):
+        """Record a callback that has returned, and report it if it was over
+        budget.
+
+        :param str handler: The callback's name.
+
+        :param float seconds: The time it took.
+        """
+        stats = self.handlers.get(handler)
+        if stats is None:
+            stats = self.handlers[handler] = {'count': 0, 'total': 0.0,
+                                              'max': 0.0, 'slow': 0}
+        stats['count'] += 1
+        stats['total'] += seconds
+        if seconds > stats['max']:
+            stats['max'] = seconds
+
+        stack = None
+        self._depth -= 1
+        if self._depth == 0:
+            sampled = self._stack
+            if sampled is not None and sampled[0] == self._running[0]:
+                stack = sampled[1]
+            self._running = None
+
+        if seconds > self.budget:
+            stats['slow'] += 1
+            if self.on_slow_handler:
+                self.on_slow_handler(handler, seconds, stack)
+
+    def start(self):
+        """Start measuring the event loop's lag and, if capture_stacks is
+        set, the watchdog thread.
+
+        Must be called from the event loop's thread.
+        """
+        self._stopped.clear()
+        self._task = self.loop.create_task(self._measure_lag())
+        if self.capture_stacks:
+            self._thread_id = threading.get_ident()
+            self._thread = threading.Thread(target=self._watch,
+                                            name='copra profiler',
+                                            daemon=True)
+            self._thread.start()
+
+    async def stop(self):
+        """Stop measuring the lag and stop the watchdog thread.
+        """
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _measure_lag(self):
+        while True:
+            start = self.loop.time()
+            await asyncio.sleep(self.lag_interval)
+            lag = max(0.0, self.loop.time() - start - self.lag_interval)
+            self.lag['last'] = lag
+            self.lag['max'] = max(lag, self.lag['max'])
+            if lag > self.lag_threshold:
+                self.lag['slow'] += 1
+                if self.on_loop_lag:
+                    self.on_loop_lag(lag)
+
+    def _watch(self):
+        # Each check reads _running once; the loop thread replaces it rather
+        # than changing it, so no lock is needed.
+        while not self._stopped.wait(self.budget / 2):
+            running = self._running
+            if running is None or time.monotonic() - running[1] < self.budget:
+                continue
+            sampled = self._stack
+            if sampled is not None and sampled[0] == running[0]:
+                continue
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is not None:
+                self._stack = (running[0],
+                               ''.join(traceback.format_stack(frame)))
+
+    def snapshot(self):
+        """Return the callback and lag statistics.
+
+        :returns: A dict with handlers, a dict of callback name: dict with
+            the count of calls, their total, mean and maximum time, and the
+            number over budget, and lag, the lag statistics.
+
+            Example::
+
+                {
+                  'handlers': {
+                    'on_message': {
+                      'count': 52011,
+                      'total': 3.92,
+                      'mean': 0.0000754,
+                      'max': 0.0412,
+                      'slow': 3
+                    }
+                  },
+                  'lag': {'last': 0.0004, 'max': 0.051, 'slow': 0}
+                }
+        """
+        handlers = {}
+        for name, stats in self.handlers.items():
+            handlers[name] = dict(stats, mean=stats['total'] / stats['count'])
+        return {'handlers': handlers, 'lag': dict(self.lag)}
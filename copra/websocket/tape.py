@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+"""A gap-free trade tape for the copra WebSocket client.
+
+Matches that happen while the client is disconnected are never sent once it
+reconnects. TradeTape subscribes to the matches and heartbeat channels and
+tracks the last trade id it has passed on for each product. A match whose
+trade_id skips ahead of that, or a heartbeat whose last_trade_id does, marks a
+gap. The missing trades are then fetched from the REST API and passed on
+before any match received in the meantime, so that each product's trades are
+passed on exactly once and in trade id order.
+
+"""
+
+import logging
+
+from copra.rest.backfill import TradeBackfill
+from copra.websocket.channel import Channel
+from copra.websocket.client import Client, FEED_URL
+from copra.websocket.profiler import call_handler
+
+logger = logging.getLogger(__name__)
+
+
+class _ProductTape:
+    """The tape state of a single product.
+
+    :ivar int last_id: The last trade id passed on, or None before the first.
+    :ivar int target: The highest trade id known to exist, from matches and
+        heartbeats.
+    :ivar dict pending: Matches waiting for a backfill, keyed by trade id.
+    :ivar backfill: The backfill task in progress, or None.
+    """
+
+    def __init__(self):
+        self.last_id = None
+        self.target = None
+        self.pending = {}
+        self.backfill = None
+
+
+class TradeTape(Client):
+    """A WebSocket client that passes on every trade of its products in order.
+
+    Override on_trade to consume the tape.
+    """
+
+    threaded_handler = 'on_trade'
+
+    def __init__(self, loop, product_ids, rest_client, feed_url=FEED_URL,
+                 concurrency=2, **kwargs):
+        """
+
+        :param loop: The asyncio loop that the client runs in.
+        :type loop: asyncio loop
+
+        :param product_ids: A single product id or a list of product ids.
+        :type product_ids: str or list of str
+
+        :param rest_client: The REST client used to fetch missing trades.
+        :type rest_client: copra.rest.Client
+
+        :param str feed_url: The url of the WebSocket server. The default is
+            copra.websocket.FEED_URL.
+
+        :param int concurrency: (optional) The number of segments of a long
+            gap that are fetched at once. See
+            :meth:`copra.rest.Client.backfill_trades`. The default is 2.
+
+        Any other keyword argument is passed to copra.websocket.Client.
+        """
+        if not isinstance(product_ids, list):
+            product_ids = [product_ids]
+        self.rest_client = rest_client
+        self.concurrency = concurrency
+        self.tapes = {product_id: _ProductTape() for product_id in product_ids}
+        self.stats = {'trades': 0, 'backfilled': 0, 'duplicates': 0,
+                      'gaps': 0, 'reconnects': 0, 'recovery_time': None,
+                      'max_recovery_time': 0.0}
+        self._disconnected_at = None
+        self._recovering = set()
+        channels = [Channel('matches', product_ids),
+                    Channel('heartbeat', product_ids)]
+        super().__init__(loop, channels, feed_url, **kwargs)
+
+    def on_trade(self, trade):
+        """Callback fired for each trade, in trade id order per product.
+
+        You will want to override this method.
+
+        :param dict trade: The trade. Live trades are the match message as
+            received. Backfilled trades are the REST API result, with the
+            product_id added.
+        """
+        print(trade)
+
+    def on_open(self):
+        """Start timing the recovery if this is a reconnection.
+        """
+        if self._disconnected_at is not None:
+            self.stats['reconnects'] += 1
+            self._recovering = set(self.tapes)
+        super().on_open()
+
+    def on_close(self, was_clean, code, reason):
+        """Note when the connection was lost.
+        """
+        if self._disconnected_at is None and not self.closing:
+            self._disconnected_at = self.loop.time()
+        super().on_close(was_clean, code, reason)
+
+    def on_message(self, message):
+        """Route match and heartbeat messages to the product's tape.
+
+        :param dict message: Dictionary representing the message.
+        """
+        tape = self.tapes.get(message.get('product_id'))
+        if tape is None:
+            return
+        if message['type'] in ('match', 'last_match'):
+            trade_id = message['trade_id']
+            if tape.last_id is not None and trade_id <= tape.last_id:
+                self.stats['duplicates'] += 1
+                return
+            tape.pending[trade_id] = message
+            self._advance(message['product_id'], trade_id)
+        elif message['type'] == 'heartbeat':
+            self._advance(message['product_id'], message['last_trade_id'])
+
+    def _advance(self, product_id, trade_id):
+        """Pass on every pending trade up to the next gap.
+
+        A gap starts a backfill, unless one is already running.
+
+        :param str product_id: The product.
+
+        :param int trade_id: A trade id that is known to exist.
+        """
+        tape = self.tapes[product_id]
+        if tape.target is None or trade_id > tape.target:
+            tape.target = trade_id
+        if tape.backfill is not None:
+            return
+
+        while tape.pending:
+            first = min(tape.pending)
+            if tape.last_id is not None and first > tape.last_id + 1:
+                self._start_backfill(product_id, tape.last_id + 1, first - 1)
+                return
+            self._emit(product_id, tape.pending.pop(first))
+
+        # Before the first trade there is nothing to measure a gap against.
+        if tape.last_id is not None and tape.target > tape.last_id:
+            self._start_backfill(product_id, tape.last_id + 1, tape.target)
+        elif product_id in self._recovering:
+            self._recovered(product_id)
+
+    def _emit(self, product_id, trade):
+        tape = self.tapes[product_id]
+        if tape.last_id is not None and trade['trade_id'] <= tape.last_id:
+            self.stats['duplicates'] += 1
+            return
+        tape.last_id = trade['trade_id']
+        self.stats['trades'] += 1
+        if self.metrics is None and self.profiler is None:
+            self.on_trade(trade)
+        else:
+            call_handler(self, 'on_trade', self.on_trade, trade)
+
+    def _recovered(self, product_id):
+        self._recovering.discard(product_id)
+        if self._recovering or self._disconnected_at is None:
+            return
+        elapsed = self.loop.time() - self._disconnected_at
+        self._disconnected_at = None
+        self.stats['recovery_time'] = elapsed
+        self.stats['max_recovery_time'] = max(elapsed,
+                                              self.stats['max_recovery_time'])
+        logger.info('{} recovered in {:.3f}s'.format(self.name, elapsed))
+
+    def _start_backfill(self, product_id, first, last):
+        self.stats['gaps'] += 1
+        if self.metrics is not None:
+            self.metrics.gaps.inc(self.name, product_id)
+        logger.info('{} backfilling {} trades {} to {}'.format(
+            self.name, product_id, first, last))
+        tape = self.tapes[product_id]
+        tape.backfill = self.loop.create_task(
+            self._backfill(product_id, first, last))
+
+    async def _backfill(self, product_id, first, last):
+        """Fetch the trades from first to last and pass them on.
+
+        If the fetch fails the gap stays open and the next match or heartbeat
+        for the product retries it.
+        """
+        tape = self.tapes[product_id]
+        trades = []
+        backfill = TradeBackfill(self.rest_client, product_id, first, last,
+                                 trades.extend,
+                                 segment_size=max(100, (last - first + 1) //
+                                                  self.concurrency + 1),
+                                 concurrency=self.concurrency)
+        try:
+            await backfill.run()
+        except Exception as e:
+            tape.backfill = None
+            self.on_error('{} backfill of {} failed'.format(self.name,
+                                                            product_id),
+                          str(e))
+            return
+
+        tape.backfill = None
+        emitted = self.stats['trades']
+        for trade in trades:
+            trade['product_id'] = product_id
+            self._emit(product_id, trade)
+        self.stats['backfilled'] += self.stats['trades'] - emitted
+        # Trades missing from the REST result as well are given up on.
+        tape.last_id = max(tape.last_id, last)
+        self._advance(product_id, tape.target)
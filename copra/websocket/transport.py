@@ -0,0 +1,331 @@
+# -*- coding: utf-8 -*-
+"""WebSocket transport backends for the copra WebSocket client.
+
+By default copra.websocket.Client speaks WebSocket through autobahn. The
+protocol classes in this module let the same client run on aiohttp's WebSocket
+client or the websockets library instead. Each mimics the small part of
+autobahn's WebSocketClientProtocol that the client relies on: sendMessage and
+sendClose going out, and onOpen, onClose and onMessage coming in.
+
+"""
+
+import abc
+import asyncio
+import json
+import logging
+
+import aiohttp
+
+from copra.websocket.profiler import call_handler
+
+logger = logging.getLogger(__name__)
+
+
+class BaseProtocol:
+    """Callbacks shared by every copra client protocol.
+
+    Each callback hands off to the protocol's factory, the
+    copra.websocket.Client that created it.
+    """
+
+    def onOpen(self):
+        """Callback fired on initial WebSocket opening handshake completion.
+
+        You now can send and receive WebSocket messages.
+        """
+        self.factory.on_open()
+
+    def onClose(self, wasClean, code, reason):
+        """Callback fired when the WebSocket connection has been closed.
+
+        (WebSocket closing handshake has been finished or the connection was
+        closed uncleanly).
+
+        Args:
+          wasClean (bool): True iff the WebSocket connection closed cleanly.
+          code (int or None): Close status code as sent by the WebSocket peer.
+          reason (str or None): Close reason as sent by the WebSocket peer.
+        """
+        self.factory.on_close(wasClean, code, reason)
+
+    def onMessage(self, payload, isBinary):
+        """Callback fired when a complete WebSocket message was received.
+
+        Call its factory's (the client's) on_message method with a
+        dict representing the JSON message receieved.
+
+        Args:
+            payload (bytes): The WebSocket message received.
+            isBinary (bool): Flag indicating whether payload is binary or UTF-8
+            encoded text.
+        """
+        self._dispatch(json.loads(payload.decode('utf8')), len(payload))
+
+    def _dispatch(self, msg, size=None):
+        """Pass a decoded message to the factory's on_error or on_message,
+        recording it and timing the callback if the factory has metrics or a
+        profiler.
+
+        :param dict msg: The decoded message.
+
+        :param int size: (optional) The size of the message as received. The
+            default is None.
+        """
+        factory = self.factory
+        if factory.metrics is None and factory.profiler is None:
+            if msg['type'] == 'error':
+                factory.on_error(msg['message'], msg.get('reason', ''))
+            else:
+                factory.on_message(msg)
+            return
+
+        if factory.metrics is not None:
+            factory.metrics.message(msg, size)
+        if msg['type'] == 'error':
+            call_handler(factory, 'on_error', factory.on_error,
+                         msg['message'], msg.get('reason', ''))
+        else:
+            call_handler(factory, 'on_message', factory.on_message, msg)
+
+
+class AsyncProtocol(BaseProtocol, metaclass=abc.ABCMeta):
+    """Base class for protocols driven by a coroutine rather than autobahn.
+
+    Subclasses implement _connect, _receive, _send and _close for their
+    library, and may override _cleanup. run() is the coroutine scheduled on
+    the client's loop; it connects, calls onOpen, feeds every message
+    received to the client and calls onClose when the connection ends for any
+    reason.
+    """
+
+    def __init__(self, factory):
+        """
+
+        :param factory: The client that owns this protocol.
+        :type factory: copra.websocket.Client
+        """
+        self.factory = factory
+        self.loop = factory.loop
+        self.task = None
+        self.ws = None
+        # Cleared while the client asks for reading to be paused.
+        self.reading = asyncio.Event()
+        self.reading.set()
+
+    @classmethod
+    def check(cls):
+        """Check that the library the protocol uses is installed.
+
+        :raises ImportError: It isn't.
+        """
+
+    async def run(self):
+        """Connect, receive messages until the connection closes, and clean up.
+
+        As with autobahn, a failure to connect is raised rather than reported
+        through onClose so that it does not trigger a reconnect. An exception
+        once connected, for example from one of the client's callbacks or a
+        message that isn't JSON, is logged and drops the connection, which is
+        reported through onClose.
+        """
+        try:
+            self.ws = await self._connect()
+        except asyncio.CancelledError:
+            await self._cleanup()
+            self.onClose(False, None, 'connection cancelled')
+            return
+        except Exception:
+            await self._cleanup()
+            raise
+
+        self.onOpen()
+        try:
+            was_clean, code, reason = await self._receive()
+        except asyncio.CancelledError:
+            was_clean, code, reason = False, None, 'connection cancelled'
+        except Exception as e:
+            logger.exception('Dropping the connection to {}'.format(
+                self.factory.url))
+            was_clean, code, reason = False, None, str(e)
+            try:
+                await self._close()
+            except Exception:
+                pass
+        finally:
+            await self._cleanup()
+        self.onClose(was_clean, code, reason)
+
+    def pause_reading(self):
+        """Stop taking messages from the connection until
+        :meth:`resume_reading`. The library's own flow control then stops
+        reading from the socket once its buffer is full.
+        """
+        self.reading.clear()
+
+    def resume_reading(self):
+        """Start taking messages from the connection again.
+        """
+        self.reading.set()
+
+    def _dispatch_text(self, data):
+        """Decode a text message and pass it to the client.
+
+        :param str data: The message. Its size, for the client's metrics, is
+            counted in UTF-8 bytes as on the wire.
+        """
+        size = None
+        if self.factory.metrics is not None:
+            size = len(data.encode('utf8'))
+        self._dispatch(json.loads(data), size)
+
+    def sendMessage(self, payload, isBinary=False):
+        """Send a message to the server.
+
+        The send is scheduled on the client's loop so, like autobahn's
+        sendMessage, this can be called from synchronous code.
+
+        :param bytes payload: The UTF-8 encoded message.
+        """
+        return asyncio.ensure_future(self._send(payload.decode('utf8')),
+                                     loop=self.loop)
+
+    def sendClose(self, code=None, reason=None):
+        """Start the closing handshake, or abandon a connection in progress.
+        """
+        if self.ws is None:
+            if self.task:
+                self.task.cancel()
+            return
+        asyncio.ensure_future(self._close(), loop=self.loop)
+
+    @abc.abstractmethod
+    async def _connect(self):
+        """Open the connection.
+
+        :returns: The library's connection object, stored as ws.
+        """
+
+    @abc.abstractmethod
+    async def _receive(self):
+        """Pass every message received on ws to the client until the
+        connection closes.
+
+        :returns: A 3-tuple (was clean, close code, close reason) for onClose.
+        """
+
+    @abc.abstractmethod
+    async def _send(self, data):
+        """Send a message on ws.
+
+        :param str data: The message.
+        """
+
+    @abc.abstractmethod
+    async def _close(self):
+        """Start closing ws. _receive returns once it is closed.
+        """
+
+    async def _cleanup(self):
+        """Release anything _connect opened besides ws, whether or not it
+        connected.
+        """
+
+
+class AiohttpProtocol(AsyncProtocol):
+    """Client protocol backed by aiohttp's WebSocket client.
+
+    If the client was given an aiohttp.ClientSession, for example the session
+    of a copra.rest.Client, the connection is opened on it. Otherwise a
+    session is created for the connection and closed with it.
+    """
+
+    def __init__(self, factory):
+        super().__init__(factory)
+        self.session = None
+        self._own_session = False
+
+    async def _connect(self):
+        session = self.factory.session
+        if session is None:
+            session = aiohttp.ClientSession(loop=self.loop)
+            self._own_session = True
+        self.session = session
+        compress = 0
+        if self.factory.compress:
+            compress = self.factory.compress_window_bits or 15
+        return await session.ws_connect(self.factory.url, compress=compress,
+                                        max_msg_size=0)
+
+    async def _receive(self):
+        async for msg in self.ws:
+            if not self.reading.is_set():
+                await self.reading.wait()
+            if msg.type == aiohttp.WSMsgType.TEXT:
+                self._dispatch_text(msg.data)
+            elif msg.type == aiohttp.WSMsgType.BINARY:
+                self.onMessage(msg.data, True)
+            elif msg.type == aiohttp.WSMsgType.ERROR:
+                break
+        return (self.ws.exception() is None, self.ws.close_code, None)
+
+    async def _send(self, data):
+        await self.ws.send_str(data)
+
+    async def _close(self):
+        await self.ws.close()
+
+    async def _cleanup(self):
+        if self._own_session and self.session is not None:
+            await self.session.close()
+
+
+class WebsocketsProtocol(AsyncProtocol):
+    """Client protocol backed by the websockets library.
+
+    websockets is not a copra requirement; install the copra[websockets]
+    extra. copra.websocket.Client checks that it is installed when it is
+    created.
+    """
+
+    @classmethod
+    def check(cls):
+        try:
+            import websockets  # noqa: F401
+        except ImportError:
+            raise ImportError('the websockets transport requires the '
+                              'websockets package') from None
+
+    async def _connect(self):
+        import websockets
+        self._closed_error = websockets.ConnectionClosed
+        compression = 'deflate' if self.factory.compress else None
+        return await websockets.connect(self.factory.url,
+                                        compression=compression,
+                                        max_size=None)
+
+    async def _receive(self):
+        while True:
+            if not self.reading.is_set():
+                await self.reading.wait()
+            try:
+                data = await self.ws.recv()
+            except self._closed_error:
+                break
+            if isinstance(data, str):
+                self._dispatch_text(data)
+            else:
+                self.onMessage(data, True)
+        return (self.ws.close_code == 1000, self.ws.close_code,
+                self.ws.close_reason)
+
+    async def _send(self, data):
+        await self.ws.send(data)
+
+    async def _close(self):
+        await self.ws.close()
+
+
+TRANSPORTS = {
+    'aiohttp': AiohttpProtocol,
+    'websockets': WebsocketsProtocol,
+}
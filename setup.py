@@ -13,6 +13,9 @@ with open('HISTORY.rst') as history_file:
 
 requirements = ['autobahn>=18.8.1', 'aiohttp>=3.4.4', 'python-dateutil', 'python-dotenv', 'asynctest']
 
+extra_requirements = {'websockets': ['websockets>=7,<10'],
+                      'numpy': ['numpy>=1.13,<2']}
+
 setup_requirements = [ ]
 
 test_requirements = [ ]
@@ -31,6 +34,7 @@ setup(
     ],
     description="Asyncronous Python REST and WebSocket Clients for the Coinbase Pro virtual currency trading platform.",
     install_requires=requirements,
+    extras_require=extra_requirements,
     license="MIT license",
     long_description=readme + '\n\n' + history,
     include_package_data=True,
@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Unit tests for `copra.rest.backfill` module.
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+
+from asynctest import TestCase, CoroutineMock
+
+from copra.rest import APIRequestError, Client
+from copra.rest.backfill import JSONLinesSink, TradeBackfill
+from copra.rest.ratelimit import RateLimiter
+from copra.rest.timeouts import Deadline
+
+LATEST = 1050
+
+
+class TestTradeBackfill(TestCase):
+
+    def setUp(self):
+        self.client = Client(self.loop)
+        self.client.public_limiter = RateLimiter(self.loop, 10000, 10000)
+        self.client.get = CoroutineMock(side_effect=self.get)
+        self.fail_from = None
+        self.dir = tempfile.TemporaryDirectory()
+        self.checkpoint = os.path.join(self.dir.name, 'checkpoint.json')
+        self.written = []
+
+    async def tearDown(self):
+        await self.client.close()
+        self.dir.cleanup()
+
+    async def get(self, path, params=None, auth=False, lane=None, raw=None,
+                  timeout=None):
+        self.assertEqual(path, '/products/BTC-USD/trades')
+        top = min(params.get('after', LATEST + 1) - 1, LATEST)
+        if self.fail_from is not None and top >= self.fail_from:
+            raise APIRequestError('Rate limit exceeded', None)
+        limit = params['limit']
+        # Overlap the previous page by one trade, as a moving tape can.
+        return {}, [{'trade_id': i, 'price': '3500.00', 'side': 'buy'}
+                    for i in range(min(top + 1, LATEST), max(top - limit, 0),
+                                   -1)]
+
+    def sink(self, trades):
+        self.written.append(trades)
+
+    def test__init__(self):
+        with self.assertRaises(ValueError):
+            TradeBackfill(self.client, 'BTC-USD', 10, 9, self.sink)
+        with self.assertRaises(ValueError):
+            TradeBackfill(self.client, 'BTC-USD', 1, 9, self.sink,
+                          segment_size=0)
+        with self.assertRaises(ValueError):
+            TradeBackfill(self.client, 'BTC-USD', 1, 9, self.sink,
+                          concurrency=0)
+
+        backfill = TradeBackfill(self.client, 'BTC-USD', 1, 25, self.sink,
+                                 segment_size=10)
+        self.assertEqual(backfill.segments(), [(1, 10), (11, 20), (21, 25)])
+        self.assertFalse(backfill.done)
+
+    async def test_run(self):
+        backfill = TradeBackfill(self.client, 'BTC-USD', 101, 1000, self.sink,
+                                 self.checkpoint, segment_size=250,
+                                 concurrency=3)
+        stats = await backfill.run()
+
+        self.assertTrue(backfill.done)
+        self.assertEqual([len(trades) for trades in self.written],
+                         [250, 250, 250, 150])
+        ids = [trade['trade_id'] for trades in self.written
+               for trade in trades]
+        self.assertEqual(ids, list(range(101, 1001)))
+        self.assertEqual(stats['trades'], 900)
+        self.assertEqual(stats['pages'], 11)
+        with open(self.checkpoint) as f:
+            self.assertEqual(json.load(f), {'product_id': 'BTC-USD',
+                                            'start_id': 101, 'end_id': 1000,
+                                            'next_id': 1001})
+
+    async def test_run_async_sink(self):
+        async def sink(trades):
+            self.written.append(trades)
+
+        backfill = TradeBackfill(self.client, 'BTC-USD', 1, 300, sink,
+                                 segment_size=100)
+        await backfill.run()
+        self.assertEqual(len(self.written), 3)
+        self.assertEqual(self.written[0][0]['trade_id'], 1)
+        self.assertEqual(self.written[2][-1]['trade_id'], 300)
+
+    async def test_resume(self):
+        self.fail_from = 0
+        backfill = TradeBackfill(self.client, 'BTC-USD', 501, 1000, self.sink,
+                                 self.checkpoint, segment_size=100,
+                                 concurrency=1)
+        with self.assertRaises(APIRequestError):
+            await backfill.run()
+        self.assertEqual(backfill.next_id, 501)
+
+        self.fail_from = 701
+        backfill = TradeBackfill(self.client, 'BTC-USD', 501, 1000, self.sink,
+                                 self.checkpoint, segment_size=100,
+                                 concurrency=2)
+        with self.assertRaises(APIRequestError):
+            await backfill.run()
+        self.assertEqual(backfill.next_id, 701)
+
+        self.fail_from = None
+        backfill = TradeBackfill(self.client, 'BTC-USD', 501, 1000, self.sink,
+                                 self.checkpoint, segment_size=100)
+        self.assertEqual(backfill.next_id, 701)
+        await backfill.run()
+        ids = [trade['trade_id'] for trades in self.written
+               for trade in trades]
+        self.assertEqual(ids, list(range(501, 1001)))
+
+        # A different range starts afresh.
+        backfill = TradeBackfill(self.client, 'BTC-USD', 501, 900, self.sink,
+                                 self.checkpoint, segment_size=100)
+        self.assertEqual(backfill.next_id, 501)
+
+    async def test_run_bounded(self):
+        # Later segments are held while the first is slow, but only so many.
+        release = asyncio.Event()
+        started = set()
+        get = self.get
+
+        async def slow_get(path, params=None, **kwargs):
+            top = params['after'] - 1
+            started.add(top // 10)
+            if top <= 10:
+                await release.wait()
+            return await get(path, params, **kwargs)
+
+        self.client.get = CoroutineMock(side_effect=slow_get)
+        backfill = TradeBackfill(self.client, 'BTC-USD', 1, 200, self.sink,
+                                 segment_size=10, concurrency=2)
+        task = self.loop.create_task(backfill.run())
+        await asyncio.sleep(0.05)
+        self.assertEqual(len(started), 4)
+        self.assertEqual(self.written, [])
+
+        release.set()
+        await task
+        ids = [trade['trade_id'] for trades in self.written
+               for trade in trades]
+        self.assertEqual(ids, list(range(1, 201)))
+
+    async def test_backfill_trades(self):
+        path = os.path.join(self.dir.name, 'trades.jsonl')
+        stats = await self.client.backfill_trades('BTC-USD', 901,
+                                                  JSONLinesSink(path),
+                                                  segment_size=40)
+        self.assertEqual(stats['trades'], 150)
+        with open(path) as f:
+            ids = [json.loads(line)['trade_id'] for line in f]
+        self.assertEqual(ids, list(range(901, LATEST + 1)))
+
+        stats = await self.client.backfill_trades('BTC-USD', LATEST + 1,
+                                                  self.sink)
+        self.assertEqual(stats['trades'], 0)
+        self.assertEqual(self.written, [])
+
+    async def test_backfill_trades_timeout(self):
+        # Every request shares the one deadline.
+        await self.client.backfill_trades('BTC-USD', 1001, self.sink,
+                                          segment_size=20, timeout=5)
+        deadlines = {call[1]['timeout']
+                     for call in self.client.get.call_args_list}
+        self.assertEqual(len(deadlines), 1)
+        self.assertIsInstance(deadlines.pop(), Deadline)
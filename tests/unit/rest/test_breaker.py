@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Unit tests for `copra.rest.breaker` module.
+"""
+
+from asynctest import TestCase, MagicMock
+
+from copra.rest.breaker import CircuitBreakers, endpoint
+
+
+class TestCircuitBreakers(TestCase):
+
+    def setUp(self):
+        self.now = 100.0
+        loop = MagicMock()
+        loop.time = lambda: self.now
+        self.breakers = CircuitBreakers(loop, failure_rate=0.5,
+                                        min_requests=4, window=10,
+                                        reset_timeout=5, probes=1)
+        self.circuit = self.breakers.circuit('GET', '/fills')
+
+    def send(self, failed, circuit=None):
+        circuit = circuit or self.circuit
+        self.assertTrue(circuit.allow())
+        circuit.record(failed)
+
+    def test_endpoint(self):
+        self.assertEqual(endpoint('GET', '/products/BTC-USD/book'),
+                         'GET /products/{}/book')
+        order_id = 'd50ec984-77a8-460a-b958-66f114b0de9b'
+        self.assertEqual(endpoint('DELETE', '/orders/{}'.format(order_id)),
+                         'DELETE /orders/{}')
+        self.assertEqual(endpoint('GET', '/accounts/e316cb9a-0808-4fd7-8914-'
+                                         '97829c1925de/ledger'),
+                         'GET /accounts/{}/ledger')
+        self.assertEqual(endpoint('GET', '/payment-methods'),
+                         'GET /payment-methods')
+        self.assertEqual(endpoint('POST', '/orders'), 'POST /orders')
+        self.assertEqual(endpoint('GET', '/reports/0428b97b-bec1-429e-a94c-'
+                                         '59232926778d'), 'GET /reports/{}')
+
+    def test__init__(self):
+        loop = MagicMock()
+        with self.assertRaises(ValueError):
+            CircuitBreakers(loop, failure_rate=0)
+        with self.assertRaises(ValueError):
+            CircuitBreakers(loop, min_requests=0)
+        with self.assertRaises(ValueError):
+            CircuitBreakers(loop, window=0)
+        with self.assertRaises(ValueError):
+            CircuitBreakers(loop, reset_timeout=0)
+        with self.assertRaises(ValueError):
+            CircuitBreakers(loop, probes=0)
+
+    def test_open(self):
+        self.assertIs(self.breakers.circuit('GET', '/fills'), self.circuit)
+
+        # Too few requests to act on.
+        for _ in range(3):
+            self.send(True)
+        self.assertEqual(self.circuit.state, 'closed')
+
+        self.send(False)
+        self.assertEqual(self.circuit.state, 'open')
+        self.assertFalse(self.circuit.allow())
+        self.assertEqual(self.breakers.status()['GET /fills'],
+                         {'state': 'open', 'requests': 0, 'failures': 0,
+                          'retry_in': 5.0})
+
+        # Other endpoints are unaffected.
+        book = self.breakers.circuit('GET', '/products/BTC-USD/book')
+        self.assertTrue(book.allow())
+        self.assertEqual(self.breakers.status()['GET /products/{}/book'],
+                         {'state': 'closed', 'requests': 0, 'failures': 0,
+                          'retry_in': None})
+
+    def test_window(self):
+        self.send(True)
+        self.send(True)
+        self.now += 11
+        self.send(True)
+        self.send(False)
+        self.send(False)
+        self.assertEqual(self.circuit.status()['requests'], 3)
+        self.assertEqual(self.circuit.state, 'closed')
+        self.send(False)
+        self.assertEqual(self.circuit.state, 'closed')
+
+    def test_half_open(self):
+        for _ in range(4):
+            self.send(True)
+        self.now += 5
+
+        # One probe at a time.
+        self.assertTrue(self.circuit.allow())
+        self.assertEqual(self.circuit.state, 'half_open')
+        self.assertFalse(self.circuit.allow())
+        self.circuit.record(True)
+        self.assertEqual(self.circuit.state, 'open')
+        self.assertFalse(self.circuit.allow())
+
+        self.now += 5
+        self.assertTrue(self.circuit.allow())
+        self.circuit.release()
+        self.send(False)
+        self.assertEqual(self.circuit.state, 'closed')
+        self.assertEqual(self.circuit.status()['requests'], 0)
+
+    def test_reset(self):
+        for _ in range(4):
+            self.send(True)
+        self.breakers.reset()
+        self.assertEqual(self.breakers.status(), {})
+        self.assertTrue(self.breakers.circuit('GET', '/fills').allow())
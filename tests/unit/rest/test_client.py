@@ -10,11 +10,16 @@ import time
 import urllib.parse
 
 import aiohttp
-from asynctest import CoroutineMock
+from asynctest import CoroutineMock, patch
 from multidict import MultiDict
 
+from copra.metrics import Registry
 from copra.rest import APIRequestError, Client, URL
 from copra.rest.client import HEADERS
+from copra.rest.timeouts import Deadline
+from tests.unit.rest.test_orderbook import BOOK, MockResponse
+from tests.unit.rest.test_products import BTC_USD
+from tests.unit.rest.test_records import CANDLE, ENTRY, FILL, TRADE
 from tests.unit.rest.util import MockTestCase
 
 # These are made up
@@ -97,6 +102,96 @@ class TestRest(MockTestCase):
         self.assertEqual(self.auth_client.passphrase, TEST_PASSPHRASE)
         
         
+    async def test__init__connector(self):
+        # aiohttp defaults
+        self.assertIsInstance(self.client.connector, aiohttp.TCPConnector)
+        self.assertIs(self.client.session.connector, self.client.connector)
+        self.assertEqual(self.client.connector.limit, 100)
+        self.assertEqual(self.client.connector.limit_per_host, 0)
+        
+        async with Client(self.loop, limit=10, limit_per_host=5, 
+                          keepalive_timeout=60, dns_cache_ttl=300) as client:
+            self.assertEqual(client.connector.limit, 10)
+            self.assertEqual(client.connector.limit_per_host, 5)
+            self.assertEqual(client.connector._keepalive_timeout, 60)
+            
+            
+    async def test_warmup(self):
+        with patch('aiohttp.ClientSession.head', new=CoroutineMock()) as mock_head:
+            opened = await self.client.warmup(4)
+            self.assertEqual(opened, 4)
+            self.assertEqual(mock_head.call_count, 4)
+            mock_head.assert_called_with(URL + '/time', headers=UNAUTH_HEADERS)
+            mock_head.return_value.release.assert_called_with()
+            
+        with patch('aiohttp.ClientSession.head', 
+                   new=CoroutineMock(side_effect=aiohttp.ClientError)):
+            self.assertEqual(await self.client.warmup(2), 0)
+            
+        with patch('aiohttp.ClientSession.head', new=CoroutineMock()) as mock_head:
+            self.assertEqual(await self.client.warmup(2, timeout=5), 2)
+            timeout = mock_head.call_args[1]['timeout']
+            self.assertAlmostEqual(timeout.total, 5, delta=0.5)
+            
+            # An expired budget opens nothing
+            mock_head.reset_mock()
+            deadline = self.client.deadline(0.01)
+            await asyncio.sleep(0.02)
+            self.assertEqual(await self.client.warmup(2, timeout=deadline), 0)
+            mock_head.assert_not_called()
+            
+            
+    async def test_lanes(self):
+        self.assertEqual(set(self.client.lanes), {'default', 'priority'})
+        self.assertIs(self.client.session, self.client.lanes['default'].session)
+        self.assertEqual(self.client.lanes['priority'].connector.limit, 10)
+        self.assertEqual(set(self.client.queue_delay()), {'default', 'priority'})
+        
+        async with Client(self.loop, priority_limit=3) as client:
+            self.assertEqual(client.lanes['priority'].connector.limit, 3)
+        self.assertTrue(client.lanes['priority'].session.closed)
+        
+        # Order entry uses the priority lane
+        with patch.object(self.auth_client, 'post', 
+                          new=CoroutineMock(return_value=({}, {}))) as mock_post:
+            await self.auth_client.limit_order('buy', 'BTC-USD', 100, 1)
+            self.assertEqual(mock_post.call_args[1]['lane'], 'priority')
+            await self.auth_client.market_order('buy', 'BTC-USD', size=1)
+            self.assertEqual(mock_post.call_args[1]['lane'], 'priority')
+        
+        with patch.object(self.auth_client, 'delete', 
+                          new=CoroutineMock(return_value=({}, []))) as mock_del:
+            await self.auth_client.cancel('order-id')
+            self.assertEqual(mock_del.call_args[1]['lane'], 'priority')
+            await self.auth_client.cancel_all()
+            self.assertEqual(mock_del.call_args[1]['lane'], 'priority')
+            
+        # Market data doesn't
+        with patch.object(self.client, 'get', 
+                          new=CoroutineMock(return_value=({}, {}))) as mock_get:
+            await self.client.order_book('BTC-USD')
+            self.assertNotIn('lane', mock_get.call_args[1])
+            
+            
+    async def test_release(self):
+        await self.client.get('/mypath')
+        self.mock_get.return_value.release.assert_called_with()
+        
+        await self.client.post('/mypath')
+        self.mock_post.return_value.release.assert_called_with()
+        
+        await self.client.delete('/mypath')
+        self.mock_del.return_value.release.assert_called_with()
+        
+        # Released on error as well
+        self.mock_get.return_value.release.reset_mock()
+        self.mock_get.return_value.status = 500
+        self.mock_get.return_value.json.return_value = {'message': 'ERROR'}
+        with self.assertRaises(APIRequestError):
+            await self.client.get('/mypath')
+        self.mock_get.return_value.release.assert_called_with()
+        
+        
     async def test_close(self):
         client = Client(self.loop)
         self.assertFalse(client.session.closed)
@@ -164,6 +259,14 @@ class TestRest(MockTestCase):
         self.assertEqual(headers['CB-ACCESS-KEY'], TEST_KEY)
         self.assertEqual(headers['CB-ACCESS-PASSPHRASE'], TEST_PASSPHRASE)
         
+        # Bytes and str bodies are signed the same
+        body = '{"type": "limit"}'
+        headers = self.auth_client._get_auth_headers(path, 'POST', body, timestamp)
+        bytes_headers = self.auth_client._get_auth_headers(path, 'POST', 
+                                                           body.encode('ascii'),
+                                                           timestamp)
+        self.assertEqual(headers, bytes_headers)
+        
     
     async def test__handle_error(self):
         self.mock_get.return_value.status = 404
@@ -177,6 +280,115 @@ class TestRest(MockTestCase):
         self.assertEqual(err.response, self.mock_get.return_value)
         
     
+    async def test_enable_circuit_breakers(self):
+        circuits = self.client.enable_circuit_breakers(min_requests=2, 
+                                                       reset_timeout=60)
+        self.assertIs(self.client.circuits, circuits)
+        
+        self.mock_get.return_value.status = 404
+        self.mock_get.return_value.json.return_value = {'message': 'NotFound'}
+        for _ in range(2):
+            with self.assertRaises(APIRequestError):
+                await self.client.get('/products/BTC-USD/book')
+        self.assertEqual(circuits.status()['GET /products/{}/book']['state'], 'closed')
+        
+        self.mock_get.return_value.status = 503
+        self.mock_get.return_value.json.return_value = {'message': 'Unavailable'}
+        for _ in range(2):
+            with self.assertRaises(APIRequestError):
+                await self.client.get('/fills')
+        self.assertEqual(circuits.status()['GET /fills']['state'], 'open')
+        
+        self.mock_get.reset_mock()
+        with self.assertRaises(APIRequestError) as cm:
+            await self.client.get('/fills')
+        self.assertEqual(str(cm.exception), 'Circuit open for GET /fills')
+        self.assertIsNone(cm.exception.response)
+        self.mock_get.assert_not_called()
+        
+        self.mock_get.return_value.status = 200
+        self.mock_get.side_effect = aiohttp.ClientConnectionError()
+        for _ in range(2):
+            with self.assertRaises(aiohttp.ClientConnectionError):
+                await self.client.get('/products/BTC-USD/book')
+        self.assertEqual(circuits.status()['GET /products/{}/book']['state'], 'open')
+        
+        
+    async def test_timeout(self):
+        # No timeout leaves the session's default alone
+        await self.client.get('/time')
+        self.assertNotIn('timeout', self.mock_get.call_args[1])
+        
+        await self.client.get('/time', timeout=5)
+        timeout = self.mock_get.call_args[1]['timeout']
+        self.assertIsInstance(timeout, aiohttp.ClientTimeout)
+        self.assertAlmostEqual(timeout.total, 5, delta=0.5)
+        self.assertIsNone(timeout.sock_read)
+        
+        await self.client.post('/orders', timeout=5)
+        self.assertIsInstance(self.mock_post.call_args[1]['timeout'], 
+                              aiohttp.ClientTimeout)
+        await self.client.delete('/orders', timeout=5)
+        self.assertIsInstance(self.mock_del.call_args[1]['timeout'], 
+                              aiohttp.ClientTimeout)
+        
+        # Client defaults
+        async with Client(self.loop, timeout=10, connect_timeout=1, 
+                          read_timeout=2) as client:
+            await client.get('/time')
+            timeout = self.mock_get.call_args[1]['timeout']
+            self.assertAlmostEqual(timeout.total, 10, delta=0.5)
+            self.assertEqual(timeout.connect, 1)
+            self.assertEqual(timeout.sock_read, 2)
+            
+            # A shared deadline caps every request by what is left of it
+            deadline = client.deadline(1.5)
+            await client.get('/time', timeout=deadline)
+            timeout = self.mock_get.call_args[1]['timeout']
+            self.assertLessEqual(timeout.total, 1.5)
+            self.assertEqual(timeout.sock_read, timeout.total)
+            
+            deadline.expires = self.loop.time()
+            self.mock_get.reset_mock()
+            with self.assertRaises(asyncio.TimeoutError):
+                await client.ticker('BTC-USD', timeout=deadline)
+            self.mock_get.assert_not_called()
+            
+        with self.assertRaises(ValueError):
+            Client(self.loop, timeout=0)
+            
+            
+    async def test_metrics(self):
+        registry = Registry()
+        async with Client(self.loop, metrics=registry) as client:
+            await client.get('/products/BTC-USD/ticker')
+            self.mock_get.return_value.status = 404
+            self.mock_get.return_value.json.return_value = {'message': 'NotFound'}
+            with self.assertRaises(APIRequestError):
+                await client.get('/products/BTC-USD/ticker')
+            self.mock_post.side_effect = asyncio.TimeoutError()
+            with self.assertRaises(asyncio.TimeoutError):
+                await client.post('/orders')
+                
+            client.enable_circuit_breakers(min_requests=1)
+            with self.assertRaises(asyncio.TimeoutError):
+                await client.post('/orders')
+            with self.assertRaises(APIRequestError):
+                await client.post('/orders')
+                    
+        snapshot = registry.snapshot()
+        self.assertEqual(snapshot['copra_rest_requests'], 
+                         {('GET /products/{}/ticker', '200'): 1,
+                          ('GET /products/{}/ticker', '404'): 1,
+                          ('POST /orders', 'none'): 2})
+        self.assertEqual(snapshot['copra_rest_errors'], 
+                         {('GET /products/{}/ticker', 'http'): 1,
+                          ('POST /orders', 'timeout'): 2,
+                          ('POST /orders', 'circuit_open'): 1})
+        latency = snapshot['copra_rest_request_seconds']
+        self.assertEqual(latency[('GET /products/{}/ticker',)]['count'], 2)
+        
+        
     async def test_delete(self):
         path = '/mypath'
         query = {'key1': 'item1', 'key2': 'item2'}
@@ -235,6 +447,27 @@ class TestRest(MockTestCase):
         self.assertEqual(self.mock_get.headers['CB-ACCESS-SIGN'], expected_headers['CB-ACCESS-SIGN'])
 
 
+    async def test_enable_hedging(self):
+        hedger = self.auth_client.enable_hedging(percentile=99, budget=0.1)
+        self.assertIs(self.auth_client.hedger, hedger)
+        self.assertEqual(hedger.percentile, 99)
+        self.assertEqual(hedger.budget, 0.1)
+        
+        await self.auth_client.get('/mypath')
+        self.check_req(self.mock_get, '{}/mypath'.format(URL), headers=UNAUTH_HEADERS)
+        self.assertEqual(hedger.stats['requests'], 1)
+        self.assertEqual(len(hedger.latencies), 1)
+        
+        with patch.object(hedger, 'request', new=CoroutineMock(side_effect=hedger.request)) as request:
+            await self.auth_client.get('/mypath', auth=True)
+            self.assertIs(request.call_args[0][1], self.auth_client.private_limiter)
+            await self.auth_client.get('/mypath', hedge=False)
+            self.assertEqual(request.call_count, 1)
+        
+        with self.assertRaises(ValueError):
+            self.auth_client.enable_hedging(budget=2)
+            
+            
     async def test_post(self):
         path = '/mypath'
         data = {'key1': 'item1', 'key2': 'item2'}
@@ -264,6 +497,94 @@ class TestRest(MockTestCase):
         self.assertEqual(self.mock_post.headers['CB-ACCESS-SIGN'], expected_headers['CB-ACCESS-SIGN'])
         
 
+    async def test_records(self):
+        self.mock_get.return_value.headers = {'cb-before': '1', 'cb-after': '2'}
+        
+        self.mock_get.return_value.json.return_value = [TRADE]
+        trades, before, after = await self.client.trades('BTC-USD', records=True)
+        self.assertEqual(trades[0].price, 6681.01)
+        self.assertEqual((before, after), ('1', '2'))
+        
+        self.mock_get.return_value.json.return_value = [CANDLE]
+        candles = await self.client.historic_rates('BTC-USD', records=True)
+        self.assertEqual(candles[0].time, 1538179200)
+        
+        self.mock_get.return_value.json.return_value = [FILL]
+        fills, before, after = await self.auth_client.fills(product_id='BTC-USD', 
+                                                            records=True)
+        self.assertEqual(fills[0].fee, 0.00025)
+        
+        self.mock_get.return_value.json.return_value = [ENTRY]
+        entries, before, after = await self.auth_client.account_history(
+            'account', records=True)
+        self.assertEqual(entries[0].balance, 0.0000005931528)
+        
+        # Records need the decoded body, even on a raw client
+        async with Client(self.loop, raw=True) as client:
+            self.mock_get.return_value.json.return_value = [TRADE]
+            trades, before, after = await client.trades('BTC-USD', records=True)
+            self.assertEqual(trades[0].trade_id, 51584925)
+        
+        
+    async def test_as_array(self):
+        self.mock_get.return_value.headers = {'cb-before': '1', 'cb-after': '2'}
+        
+        self.mock_get.return_value.json.return_value = [TRADE]
+        trades, before, after = await self.client.trades('BTC-USD', as_array=True)
+        self.assertEqual(list(trades['price']), [6681.01])
+        
+        self.mock_get.return_value.json.return_value = [CANDLE]
+        candles = await self.client.historic_rates('BTC-USD', as_array=True)
+        self.assertEqual(list(candles['time']), [1538179200])
+        
+        self.mock_get.return_value.json.return_value = {
+            'sequence': 7, 'bids': [['482.98', '54.49144003', 18]], 
+            'asks': [['482.99', '4.57036219', 10]]}
+        book = await self.client.order_book('BTC-USD', 2, as_array=True)
+        self.assertEqual(book['sequence'], 7)
+        self.assertEqual(list(book['bids']['num_orders']), [18])
+        self.assertEqual(list(book['asks']['price']), [482.99])
+        
+        
+    async def test_raw(self):
+        self.mock_get.return_value.read = CoroutineMock(return_value=b'{"iso": ""}')
+        self.mock_get.return_value.headers = {'cb-before': '1'}
+        self.mock_get.return_value.json.return_value = {'iso': ''}
+        
+        # Per call
+        headers, body = await self.client.get('/time', raw=True)
+        self.assertEqual(body, b'{"iso": ""}')
+        self.assertIs(headers, self.mock_get.return_value.headers)
+        self.mock_get.return_value.json.assert_not_called()
+        self.mock_get.return_value.release.assert_called_with()
+        
+        headers, body = await self.client.get('/time')
+        self.assertEqual(body, {'iso': ''})
+        self.assertIsNot(headers, self.mock_get.return_value.headers)
+        
+        # Per client, and passed through by the endpoint methods
+        async with Client(self.loop, raw=True) as client:
+            self.assertTrue(client.raw)
+            self.assertEqual(await client.server_time(), b'{"iso": ""}')
+            headers, body = await client.get('/time', raw=False)
+            self.assertEqual(body, {'iso': ''})
+            
+            # Methods that need the decoded body still get it
+            self.mock_get.return_value.json.return_value = [BTC_USD]
+            rules = await client.load_products()
+            self.assertIn('BTC-USD', rules)
+            
+        self.assertFalse(self.client.raw)
+        
+        self.mock_post.return_value.read = CoroutineMock(return_value=b'{}')
+        headers, body = await self.client.post('/orders', raw=True)
+        self.assertEqual(body, b'{}')
+        
+        self.mock_del.return_value.read = CoroutineMock(return_value=b'[]')
+        headers, body = await self.client.delete('/orders', raw=True)
+        self.assertEqual(body, b'[]')
+        
+        
     async def test_products(self):
         
         products = await self.client.products()
@@ -299,6 +620,40 @@ class TestRest(MockTestCase):
                       query={'level': '3'}, headers=UNAUTH_HEADERS)
 
 
+    async def test_order_book_stream(self):
+        
+        # Invalid level
+        with self.assertRaises(ValueError):
+            await self.client.order_book_stream('BTC-USD', 4)
+            
+        resp = MockResponse(json.dumps(BOOK).encode('utf8'))
+        resp.status = 200
+        
+        with patch.object(self.client, '_get_response', 
+                          new=CoroutineMock(return_value=resp)) as get:
+            book = await self.client.order_book_array('BTC-USD')
+        get.assert_called_with('/products/BTC-USD/book', {'level': 3})
+        self.assertEqual(book.sequence, BOOK['sequence'])
+        self.assertEqual(len(book), 5)
+        
+        # Errors are raised before any level is read
+        self.mock_get.return_value.status = 404
+        self.mock_get.return_value.json.return_value = {'message': 'NotFound'}
+        with self.assertRaises(APIRequestError):
+            await self.client.order_book_stream('XYZ-USD', 2)
+        self.check_req(self.mock_get, '{}/products/XYZ-USD/book'.format(URL),
+                       query={'level': '2'}, headers=UNAUTH_HEADERS)
+        self.mock_get.return_value.release.assert_called_with()
+        
+        # Streams are recorded in the metrics like other requests
+        registry = Registry()
+        async with Client(self.loop, metrics=registry) as client:
+            with self.assertRaises(APIRequestError):
+                await client.order_book_stream('XYZ-USD', 2)
+        self.assertEqual(registry.snapshot()['copra_rest_requests'],
+                         {('GET /products/{}/book', '404'): 1})
+        
+        
     async def test_ticker(self):
         
         # No product_id
@@ -403,6 +758,28 @@ class TestRest(MockTestCase):
         self.check_req(self.mock_get, '{}/time'.format(URL), headers=UNAUTH_HEADERS)
 
 
+    async def test_sync_clock(self):
+        
+        async def get(path, params=None, auth=False, lane=None, raw=None, timeout=None):
+            return {}, {'iso': '', 'epoch': time.time() + 100}
+        
+        with patch.object(self.auth_client, 'get', new=CoroutineMock(side_effect=get)):
+            clock = await self.auth_client.sync_clock(interval=30, samples=2)
+        
+        self.assertIs(self.auth_client.clock, clock)
+        self.assertEqual(clock.interval, 30)
+        self.assertEqual(clock.syncs, 1)
+        self.assertAlmostEqual(clock.offset, 100, delta=1)
+        self.assertFalse(clock._task.done())
+        
+        headers = self.auth_client._get_auth_headers('/accounts')
+        self.assertAlmostEqual(float(headers['CB-ACCESS-TIMESTAMP']), 
+                               time.time() + 100, delta=1)
+        
+        await self.auth_client.close()
+        self.assertIsNone(clock._task)
+
+
     async def test_accounts(self):
         
         # Unauthorized client
@@ -630,6 +1007,136 @@ class TestRest(MockTestCase):
                       headers=AUTH_HEADERS)
 
     
+    async def test_load_products(self):
+        self.mock_get.return_value.json.return_value = [BTC_USD]
+        rules = await self.client.load_products()
+        self.assertEqual(list(rules), ['BTC-USD'])
+        self.assertIs(self.client.product_rules, rules)
+        self.assertEqual(rules['BTC-USD'].min_size, 100000)
+        
+        
+    async def test_limit_order_validate(self):
+        self.mock_get.return_value.json.return_value = [BTC_USD]
+        
+        # Products are loaded once, on first use
+        await self.auth_client.limit_order('buy', 'BTC-USD', '3500.12', '0.01', 
+                                           validate=True)
+        self.assertEqual(self.mock_get.call_count, 1)
+        self.assertEqual(self.mock_post.data['price'], '3500.12')
+        
+        await self.auth_client.limit_order('buy', 'BTC-USD', '3500.12', '0.01', 
+                                           validate=True)
+        self.assertEqual(self.mock_get.call_count, 1)
+        
+        self.mock_post.reset_mock()
+        with self.assertRaises(ValueError):
+            await self.auth_client.limit_order('buy', 'BTC-USD', '3500.125', 
+                                               '0.01', validate=True)
+        with self.assertRaises(ValueError):
+            await self.auth_client.limit_order('buy', 'BTC-USD', '3500.12', 
+                                               '0.0001', validate=True)
+        with self.assertRaises(ValueError):
+            await self.auth_client.limit_order('buy', 'BTC-USD', '3500.12', 
+                                               '0.01', validate='maybe')
+        self.mock_post.assert_not_called()
+        
+        await self.auth_client.limit_order('sell', 'BTC-USD', '3500.121', 
+                                           '0.123456789', stop='loss', 
+                                           stop_price='3400.001', validate='round')
+        self.assertEqual(self.mock_post.data['price'], '3500.13')
+        self.assertEqual(self.mock_post.data['size'], '0.12345678')
+        self.assertEqual(self.mock_post.data['stop_price'], '3400.01')
+        
+        # Unknown products are reloaded and then rejected
+        with self.assertRaises(ValueError):
+            await self.auth_client.limit_order('buy', 'XYZ-USD', '1', '1', 
+                                               validate=True)
+        self.assertEqual(self.mock_get.call_count, 2)
+        
+        
+    async def test_market_order_validate(self):
+        self.mock_get.return_value.json.return_value = [BTC_USD]
+        
+        await self.auth_client.market_order('buy', 'BTC-USD', funds='100.009', 
+                                            validate='round')
+        self.assertEqual(self.mock_post.data['funds'], '100.00')
+        self.assertNotIn('size', self.mock_post.data)
+        
+        self.mock_post.reset_mock()
+        with self.assertRaises(ValueError):
+            await self.auth_client.market_order('buy', 'BTC-USD', funds='1', 
+                                                validate=True)
+        self.mock_post.assert_not_called()
+        
+        
+    async def test_order_template(self):
+        
+        # Parameters are checked when the template is created
+        with self.assertRaises(ValueError):
+            await self.auth_client.order_template('right', 'BTC-USD')
+        with self.assertRaises(ValueError):
+            await self.auth_client.order_template('buy', 'BTC-USD', 
+                                                  time_in_force='IOC', 
+                                                  post_only=True)
+        with self.assertRaises(ValueError):
+            await self.auth_client.order_template('buy', 'BTC-USD', 
+                                                  validate='maybe')
+        
+        template = await self.auth_client.order_template('buy', 'BTC-USD', 
+                                                         post_only=True)
+        self.mock_get.assert_not_called()
+        
+        await template.place('3500.12', 0.01)
+        self.check_req(self.mock_post, '{}/orders'.format(URL),
+                       data={'type': 'limit', 'side': 'buy', 
+                             'product_id': 'BTC-USD', 'price': '3500.12', 
+                             'size': '0.01', 'time_in_force': 'GTC', 
+                             'post_only': True, 'stp': 'dc'},
+                       headers=AUTH_HEADERS)
+        
+        # The body is signed as sent
+        headers = self.mock_post.headers
+        expected = self.auth_client._get_auth_headers(
+            '/orders', 'POST', self.mock_post.kwargs['data'], 
+            headers['CB-ACCESS-TIMESTAMP'])
+        self.assertEqual(headers['CB-ACCESS-SIGN'], expected['CB-ACCESS-SIGN'])
+        
+        await template.place(3500, '1', client_oid='b0eef3aa-7d21-4f23-ac2e-0b1a3d3d2a4f')
+        self.assertEqual(self.mock_post.data['price'], '3500')
+        self.assertEqual(self.mock_post.data['client_oid'], 
+                         'b0eef3aa-7d21-4f23-ac2e-0b1a3d3d2a4f')
+        
+        # Small and large floats aren't sent in exponent notation
+        await template.place(1e22, 0.00001)
+        self.assertEqual(self.mock_post.data['price'], '10000000000000000000000')
+        self.assertEqual(self.mock_post.data['size'], '0.00001')
+        self.assertNotIn('timeout', self.mock_post.call_args[1])
+        
+        await template.place(3500, 1, timeout=5)
+        timeout = self.mock_post.call_args[1]['timeout']
+        self.assertAlmostEqual(timeout.total, 5, delta=0.5)
+        
+        # Validating templates load the product rules once
+        self.mock_get.return_value.json.return_value = [BTC_USD]
+        template = await self.auth_client.order_template('sell', 'BTC-USD', 
+                                                         time_in_force='GTT',
+                                                         cancel_after='min',
+                                                         validate='round')
+        self.assertEqual(self.mock_get.call_count, 1)
+        await template.place('3500.121', '0.123456789')
+        self.assertEqual(self.mock_post.data['price'], '3500.13')
+        self.assertEqual(self.mock_post.data['size'], '0.12345678')
+        self.assertEqual(self.mock_post.data['cancel_after'], 'min')
+        
+        template = await self.auth_client.order_template('sell', 'BTC-USD', 
+                                                         validate=True)
+        self.mock_post.reset_mock()
+        with self.assertRaises(ValueError):
+            await template.place('3500.121', '1')
+        self.mock_post.assert_not_called()
+        self.assertEqual(self.mock_get.call_count, 1)
+        
+        
     async def test_market_order(self):
         
         # Unauthorized client
@@ -723,6 +1230,153 @@ class TestRest(MockTestCase):
                       headers=AUTH_HEADERS)       
                                                        
 
+    async def test_place_orders(self):
+        orders = [
+            {'side': 'buy', 'product_id': 'BTC-USD', 'price': '100.00', 
+             'size': '0.1', 'post_only': True},
+            {'type': 'limit', 'side': 'sell', 'product_id': 'BTC-USD', 
+             'price': '200.00', 'size': '0.1', 'client_oid': 'my-oid'},
+            {'type': 'market', 'side': 'buy', 'product_id': 'BTC-USD', 
+             'funds': '10.00'}
+        ]
+        
+        # Unauthorized client
+        with self.assertRaises(ValueError):
+            await self.client.place_orders(orders)
+            
+        # Any invalid order stops the whole batch before anything is sent
+        for bad in ({'side': 'up', 'product_id': 'BTC-USD', 'price': 1, 'size': 1},
+                    {'type': 'stop', 'side': 'buy', 'product_id': 'BTC-USD'},
+                    {'type': 'market', 'side': 'buy', 'product_id': 'BTC-USD'},
+                    {'side': 'buy', 'product_id': 'BTC-USD', 'price': 1}):
+            with self.assertRaises(ValueError):
+                await self.auth_client.place_orders(orders + [bad])
+        self.mock_post.assert_not_called()
+        
+        sent = []
+        
+        async def post(path, data=None, auth=False, lane='default', timeout=None):
+            sent.append(data)
+            if data['side'] == 'sell':
+                raise APIRequestError('Insufficient funds [400]', None)
+            return ({}, {'id': 'order-{}'.format(len(sent))})
+            
+        with patch.object(self.auth_client, 'post', new=CoroutineMock(side_effect=post)) as mock_post:
+            results, elapsed = await self.auth_client.place_orders(orders)
+            
+        self.assertEqual(len(results), 3)
+        self.assertGreater(elapsed, 0)
+        self.assertEqual(mock_post.call_args[1]['lane'], 'priority')
+        
+        self.assertEqual(sent[0], {'type': 'limit', 'side': 'buy', 
+                                   'product_id': 'BTC-USD', 'price': '100.00', 
+                                   'size': '0.1', 'time_in_force': 'GTC', 
+                                   'post_only': True, 'stp': 'dc',
+                                   'client_oid': results[0]['client_oid']})
+        self.assertEqual(len(results[0]['client_oid']), 36)
+        self.assertIsNotNone(results[0]['order'])
+        self.assertIsNone(results[0]['error'])
+        
+        self.assertEqual(results[1]['client_oid'], 'my-oid')
+        self.assertIsNone(results[1]['order'])
+        self.assertIsInstance(results[1]['error'], APIRequestError)
+        
+        self.assertEqual(sent[2]['type'], 'market')
+        self.assertIsNotNone(results[2]['order'])
+        
+        for result in results:
+            self.assertGreaterEqual(result['wait'], 0)
+            self.assertGreaterEqual(result['latency'], 0)
+            
+            
+    async def test_replace_order(self):
+        order = {'side': 'buy', 'product_id': 'BTC-USD', 'price': '100.00', 
+                 'size': '0.1', 'post_only': True}
+        
+        # Unauthorized client
+        with self.assertRaises(ValueError):
+            await self.client.replace_order('old-id', order)
+            
+        # Invalid mode
+        with self.assertRaises(ValueError):
+            await self.auth_client.replace_order('old-id', order, mode='yolo')
+            
+        # Invalid order, nothing is sent
+        with self.assertRaises(ValueError):
+            await self.auth_client.replace_order('old-id', dict(order, side='up'))
+        self.mock_post.assert_not_called()
+        self.mock_del.assert_not_called()
+        
+        events = []
+        failures = set()
+        
+        async def post(path, data=None, auth=False, lane='default', timeout=None):
+            self.assertEqual(lane, 'priority')
+            events.append('post')
+            await asyncio.sleep(0.01)
+            events.append('posted')
+            if 'post' in failures:
+                raise APIRequestError('Insufficient funds [400]', None)
+            return ({}, {'id': 'new-id', 'client_oid': data['client_oid']})
+            
+        async def delete(path, params=None, auth=False, lane='default', timeout=None):
+            self.assertEqual(path, '/orders/old-id')
+            self.assertEqual(lane, 'priority')
+            events.append('delete')
+            await asyncio.sleep(0.01)
+            events.append('deleted')
+            if 'delete' in failures:
+                raise APIRequestError('Order already done [400]', None)
+            return ({}, ['old-id'])
+            
+        async def replace(mode):
+            del events[:]
+            with patch.object(self.auth_client, 'post', new=CoroutineMock(side_effect=post)), \
+                 patch.object(self.auth_client, 'delete', new=CoroutineMock(side_effect=delete)):
+                return await self.auth_client.replace_order('old-id', order, mode)
+                
+        # cancel_first is the default
+        result = await replace('cancel_first')
+        self.assertEqual(events, ['delete', 'deleted', 'post', 'posted'])
+        self.assertEqual(result['mode'], 'cancel_first')
+        self.assertEqual(result['cancel']['result'], ['old-id'])
+        self.assertEqual(result['order']['result']['id'], 'new-id')
+        self.assertEqual(result['order']['result']['client_oid'], 
+                         result['order']['client_oid'])
+        for leg in ('cancel', 'order'):
+            self.assertTrue(result[leg]['sent'])
+            self.assertIsNone(result[leg]['error'])
+            self.assertGreater(result[leg]['latency'], 0)
+        self.assertGreater(result['elapsed'], 0.02)
+        
+        result = await replace('new_first')
+        self.assertEqual(events, ['post', 'posted', 'delete', 'deleted'])
+        
+        result = await replace('overlap')
+        self.assertEqual(events[:2], ['delete', 'post'])
+        self.assertLess(result['elapsed'], 0.02)
+        self.assertTrue(result['cancel']['sent'] and result['order']['sent'])
+        
+        # A failed cancel stops cancel_first
+        failures = {'delete'}
+        result = await replace('cancel_first')
+        self.assertEqual(events, ['delete', 'deleted'])
+        self.assertIsInstance(result['cancel']['error'], APIRequestError)
+        self.assertFalse(result['order']['sent'])
+        self.assertIsNone(result['order']['result'])
+        
+        result = await replace('overlap')
+        self.assertIsInstance(result['cancel']['error'], APIRequestError)
+        self.assertEqual(result['order']['result']['id'], 'new-id')
+        
+        # A rejected new order stops new_first
+        failures = {'post'}
+        result = await replace('new_first')
+        self.assertEqual(events, ['post', 'posted'])
+        self.assertIsInstance(result['order']['error'], APIRequestError)
+        self.assertFalse(result['cancel']['sent'])
+        
+        
     async def test_cancel(self):
         
         with self.assertRaises(TypeError):
@@ -750,6 +1404,103 @@ class TestRest(MockTestCase):
         resp = await self.auth_client.cancel_all('BTC-USD')
         self.check_req(self.mock_del, '{}/orders'.format(URL), 
                       query={'product_id': 'BTC-USD'}, headers=AUTH_HEADERS)
+        
+        # timing
+        resp, timing = await self.auth_client.cancel_all(timing=True)
+        self.assertEqual(timing['pages'], 0)
+        self.assertGreaterEqual(timing['elapsed'], timing['bulk'])
+        
+        
+    async def test_cancel_all_stop(self):
+        # 250 active/open/pending orders over 3 pages, the first 2 of which 
+        # the bulk cancel already took care of.
+        order_ids = ['order-{}'.format(i) for i in range(250)]
+        pages = [order_ids[i:i + 100] for i in range(0, 250, 100)]
+        requested = []
+        
+        async def get(path, params=None, auth=False, lane='default', raw=None, timeout=None):
+            requested.append(params)
+            page = len(requested) - 1
+            headers = {'cb-after': 'cursor-{}'.format(page)}
+            return (headers, [{'id': order_id, 'product_id': 'BTC-USD'} 
+                              for order_id in pages[page]])
+                              
+        async def delete(path, params=None, auth=False, lane='default', raw=None, timeout=None):
+            if path == '/orders':
+                return ({}, order_ids[:2])
+            if path == '/orders/order-7':
+                raise APIRequestError('Order already done [404]', None)
+            return ({}, [path.split('/')[-1]])
+        
+        self.auth_client.private_limiter.rate = 1000
+        self.auth_client.private_limiter.burst = 1000
+        
+        with patch.object(self.auth_client, 'get', new=CoroutineMock(side_effect=get)), \
+             patch.object(self.auth_client, 'delete', new=CoroutineMock(side_effect=delete)) as mock_del:
+            cancelled, timing = await self.auth_client.cancel_all('BTC-USD', 
+                                                                  stop=True, 
+                                                                  timing=True)
+            
+        self.assertEqual(len(requested), 3)
+        self.assertEqual(requested[0].getall('status'), ['active', 'open', 'pending'])
+        self.assertEqual(requested[0]['product_id'], 'BTC-USD')
+        self.assertNotIn('after', requested[0])
+        self.assertEqual(requested[1]['after'], 'cursor-0')
+        self.assertEqual(requested[2]['after'], 'cursor-1')
+        
+        # The 2 bulk cancelled orders aren't cancelled again.
+        self.assertEqual(mock_del.call_count, 1 + 248)
+        self.assertEqual(len(cancelled), 249)
+        self.assertEqual(len(set(cancelled)), 249)
+        self.assertNotIn('order-7', cancelled)
+        self.assertEqual(timing['pages'], 3)
+        self.assertEqual(timing['found'], 248)
+        self.assertEqual(timing['cancelled'], 247)
+
+
+    async def test_cancel_all_stop_errors(self):
+        # One cancel fails with a connection error, another times out, and
+        # fetching the second page fails.
+        size = 100
+
+        async def get(path, params=None, auth=False, lane='default', raw=None, timeout=None):
+            if 'after' in params:
+                raise aiohttp.ServerDisconnectedError()
+            return ({'cb-after': 'cursor'}, [{'id': 'order-{}'.format(i)}
+                                             for i in range(size)])
+
+        async def delete(path, params=None, auth=False, lane='default', raw=None, timeout=None):
+            if path == '/orders':
+                return ({}, [])
+            if path == '/orders/order-3':
+                raise aiohttp.ClientConnectionError()
+            if path == '/orders/order-5':
+                raise asyncio.TimeoutError()
+            return ({}, [path.split('/')[-1]])
+
+        self.auth_client.private_limiter.rate = 1000
+        self.auth_client.private_limiter.burst = 1000
+
+        with patch.object(self.auth_client, 'get', new=CoroutineMock(side_effect=get)), \
+             patch.object(self.auth_client, 'delete', new=CoroutineMock(side_effect=delete)) as mock_del:
+            with self.assertRaises(aiohttp.ServerDisconnectedError):
+                await self.auth_client.cancel_all(stop=True)
+
+        # The first page's cancels were all finished.
+        self.assertEqual(mock_del.call_count, 1 + 100)
+
+        # A single page.
+        size = 10
+        with patch.object(self.auth_client, 'get', new=CoroutineMock(side_effect=get)), \
+             patch.object(self.auth_client, 'delete', new=CoroutineMock(side_effect=delete)):
+            cancelled, timing = await self.auth_client.cancel_all(stop=True,
+                                                                  timing=True)
+
+        self.assertEqual(len(cancelled), 8)
+        self.assertNotIn('order-3', cancelled)
+        self.assertNotIn('order-5', cancelled)
+        self.assertEqual(timing['found'], 10)
+        self.assertEqual(timing['cancelled'], 8)
 
 
     async def test_orders(self):
@@ -1055,6 +1806,97 @@ class TestRest(MockTestCase):
                       headers=AUTH_HEADERS)
                        
                        
+    async def test_wait_for_report(self):
+        statuses = ['pending', 'pending', 'pending', 'creating', 'ready']
+        
+        async def report_status(path, params=None, auth=False, lane='default',
+                                raw=None, timeout=None):
+            self.assertEqual(path, '/reports/abc')
+            self.assertIs(raw, False)
+            return ({}, {'id': 'abc', 'status': statuses.pop(0), 
+                         'file_url': 'https://example.com/fills.csv'})
+        
+        sleep = CoroutineMock()
+        with patch.object(self.auth_client, 'get', new=report_status), \
+             patch('asyncio.sleep', new=sleep):
+            report = await self.auth_client.wait_for_report('abc', poll_interval=2,
+                                                            max_poll_interval=4)
+        self.assertEqual(report['status'], 'ready')
+        # Backs off while pending, capped, and speeds up once creating
+        self.assertEqual([call[0][0] for call in sleep.call_args_list], 
+                         [2, 3, 4, 2])
+                         
+        # Unexpected status
+        statuses = ['pending', 'failed']
+        with patch.object(self.auth_client, 'get', new=report_status), \
+             patch('asyncio.sleep', new=CoroutineMock()):
+            with self.assertRaises(APIRequestError):
+                await self.auth_client.wait_for_report('abc')
+        
+        # Timeout
+        statuses = ['pending'] * 100
+        with patch.object(self.auth_client, 'get', new=report_status):
+            with self.assertRaises(asyncio.TimeoutError):
+                await self.auth_client.wait_for_report('abc', poll_interval=0.01,
+                                                       timeout=0.03)
+                                                       
+                                                       
+    async def test_generate_report(self):
+        report = {'id': 'abc', 'status': 'ready', 
+                  'file_url': 'https://example.com/fills.csv'}
+        
+        with patch.object(self.auth_client, 'post', 
+                          new=CoroutineMock(return_value=({}, {'id': 'abc'}))) as create, \
+             patch.object(self.auth_client, 'wait_for_report', 
+                          new=CoroutineMock(return_value=dict(report))) as wait, \
+             patch.object(self.auth_client, 'download_report', 
+                          new=CoroutineMock(return_value=1234)) as download:
+            
+            result = await self.auth_client.generate_report(
+                'fills', '2019-01-01', '2019-02-01', product_id='BTC-USD', 
+                report_format='csv', timeout=60)
+            # One deadline is shared by every step.
+            deadline = create.call_args[1]['timeout']
+            self.assertIsInstance(deadline, Deadline)
+            self.assertAlmostEqual(deadline.remaining(), 60, delta=1)
+            create.assert_called_with('/reports', auth=True, raw=False, 
+                                      timeout=deadline,
+                                      data={'type': 'fills', 
+                                            'start_date': '2019-01-01',
+                                            'end_date': '2019-02-01',
+                                            'format': 'csv', 
+                                            'product_id': 'BTC-USD'})
+            wait.assert_called_with('abc', 1, 30, deadline)
+            download.assert_not_called()
+            self.assertEqual(result, report)
+            
+            with self.assertRaises(ValueError):
+                await self.auth_client.generate_report('fills', '2019-01-01', 
+                                                       '2019-02-01')
+                                                       
+            result = await self.auth_client.generate_report(
+                'fills', '2019-01-01', '2019-02-01', product_id='BTC-USD', 
+                path='/tmp/fills.csv')
+            download.assert_called_with(dict(report, path='/tmp/fills.csv', size=1234),
+                                        '/tmp/fills.csv', timeout=None)
+            self.assertEqual(result['path'], '/tmp/fills.csv')
+            self.assertEqual(result['size'], 1234)
+            
+        # Reports that aren't ready have nothing to download
+        with self.assertRaises(ValueError):
+            await self.auth_client.download_report({'id': 'abc'}, '/tmp/x')
+        with self.assertRaises(ValueError):
+            self.auth_client.report_rows({'id': 'abc'})
+            
+        rows = self.auth_client.report_rows(report)
+        self.assertEqual(rows.url, report['file_url'])
+        self.assertIs(rows.session, self.auth_client.session)
+        self.assertIsNone(rows.timeout)
+        
+        rows = self.auth_client.report_rows(report, timeout=5)
+        self.assertAlmostEqual(rows.timeout.total, 5, delta=0.5)
+        
+        
     async def test_trailing_volume(self):
         
         # Unauthorized client
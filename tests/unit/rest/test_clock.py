@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Unit tests for `copra.rest.clock` module.
+"""
+
+import asyncio
+
+from asynctest import TestCase, CoroutineMock, MagicMock, patch
+
+from copra.rest import APIRequestError
+from copra.rest.clock import ClockSync
+
+
+class FakeTime:
+    """A local clock, advanced by the fake server time requests.
+    """
+
+    def __init__(self, now):
+        self.now = now
+        self.elapsed = 0.0
+
+    def time(self):
+        return self.now
+
+    def monotonic(self):
+        return self.elapsed
+
+    def advance(self, seconds):
+        self.now += seconds
+        self.elapsed += seconds
+
+
+class TestClockSync(TestCase):
+
+    def setUp(self):
+        self.clock = FakeTime(1000.0)
+        self.server_offset = 40.0
+        self.rtts = []
+        self.step = 0.0
+        self.client = MagicMock()
+        self.client.loop = self.loop
+        self.client.get = CoroutineMock(side_effect=self.get)
+        patcher = patch('copra.rest.clock.time', self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def get(self, path, params=None, auth=False, lane=None, raw=None,
+                  timeout=None):
+        self.assertEqual(path, '/time')
+        self.assertIs(raw, False)
+        if not self.rtts:
+            raise APIRequestError('Service unavailable', None)
+        rtt, server_delay = self.rtts.pop(0)
+        # The server reads its clock server_delay seconds into the round trip.
+        epoch = self.clock.now + server_delay + self.server_offset
+        self.clock.advance(rtt)
+        # The local clock is stepped while the response is in flight.
+        self.clock.now += self.step
+        return {}, {'iso': '', 'epoch': epoch}
+
+    def test__init__(self):
+        with self.assertRaises(ValueError):
+            ClockSync(self.client, interval=0)
+        with self.assertRaises(ValueError):
+            ClockSync(self.client, samples=0)
+        with self.assertRaises(ValueError):
+            ClockSync(self.client, alpha=0)
+        with self.assertRaises(ValueError):
+            ClockSync(self.client, alpha=1.5)
+
+        sync = ClockSync(self.client)
+        self.assertEqual(sync.offset, 0.0)
+        self.assertEqual(sync.time(), 1000.0)
+        self.assertEqual(sync.metrics(), {'offset': 0.0, 'rtt': None,
+                                          'syncs': 0, 'errors': 0,
+                                          'last_sync': None})
+
+    async def test_sync(self):
+        sync = ClockSync(self.client, samples=3, alpha=0.5)
+
+        # The slow, asymmetric samples are discarded.
+        self.rtts = [(2.0, 1.9), (0.1, 0.05), (1.0, 0.0)]
+        self.assertAlmostEqual(await sync.sync(), 40.0)
+        self.assertAlmostEqual(sync.rtt, 0.1)
+        self.assertAlmostEqual(sync.time(), self.clock.now + 40.0)
+
+        self.server_offset = 44.0
+        self.rtts = [(0.1, 0.05)] * 3
+        self.assertAlmostEqual(await sync.sync(), 42.0)
+        metrics = sync.metrics()
+        self.assertEqual(metrics['syncs'], 2)
+        self.assertEqual(metrics['last_sync'], self.clock.now)
+
+        with self.assertRaises(APIRequestError):
+            await sync.sync()
+        self.assertAlmostEqual(sync.offset, 42.0)
+
+    async def test_sync_clock_step(self):
+        # A step of the local clock mid-request doesn't change the round
+        # trip time, so the sample is still picked and measured correctly.
+        sync = ClockSync(self.client, samples=2)
+        self.step = -5.0
+        self.rtts = [(0.1, 0.05), (0.2, 0.1)]
+        self.assertAlmostEqual(await sync.sync(), 40.0)
+        self.assertAlmostEqual(sync.rtt, 0.1)
+
+    async def test_start_stop(self):
+        sync = ClockSync(self.client, interval=0.01, samples=1)
+        self.rtts = [(0.1, 0.05)]
+        sync.start()
+        await asyncio.sleep(0.05)
+        await sync.stop()
+
+        self.assertEqual(sync.syncs, 1)
+        self.assertGreater(sync.errors, 0)
+        self.assertAlmostEqual(sync.offset, 40.0)
+        self.assertIsNone(sync._task)
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Unit tests for `copra.rest.columns` module.
+"""
+
+from array import array
+from unittest import TestCase, skipIf
+from unittest.mock import patch
+
+from copra.rest import columns
+from copra.rest.columns import (candles_to_columns, levels_to_columns, 
+                                trades_to_columns)
+from tests.unit.rest.test_records import CANDLE, TRADE
+
+LEVEL2 = [['482.98', '54.49144003', 18], ['482.97', '1.5', 2]]
+LEVEL3 = [['468.9', '0.01100413', '48c3ed25-616d-430d-bab4-cb338b489a33']]
+
+
+class TestArrayColumns(TestCase):
+
+    def test_candles(self):
+        result = candles_to_columns([CANDLE, CANDLE], use_numpy=False)
+        self.assertEqual(result['time'], array('q', [1538179200] * 2))
+        self.assertEqual(result['low'], array('d', [61.12] * 2))
+        self.assertEqual(result['volume'],
+                         array('d', [2290.8172972700004] * 2))
+        
+    def test_trades(self):
+        result = trades_to_columns([TRADE], use_numpy=False)
+        self.assertEqual(result['time'], [TRADE['time']])
+        self.assertEqual(result['trade_id'], array('q', [51584925]))
+        self.assertEqual(result['price'], array('d', [6681.01]))
+        self.assertEqual(result['size'], array('d', [0.02350019]))
+        self.assertEqual(result['side'], ['sell'])
+        
+        result = trades_to_columns([], use_numpy=False)
+        self.assertEqual(len(result['price']), 0)
+        
+    def test_levels(self):
+        result = levels_to_columns(LEVEL2, use_numpy=False)
+        self.assertEqual(result['price'], array('d', [482.98, 482.97]))
+        self.assertEqual(result['num_orders'], array('q', [18, 2]))
+        
+        result = levels_to_columns(LEVEL3, 3, use_numpy=False)
+        self.assertEqual(result['order_id'], [LEVEL3[0][2]])
+        
+    def test_no_numpy(self):
+        with patch.object(columns, 'numpy', None):
+            result = candles_to_columns([CANDLE])
+            self.assertIsInstance(result, dict)
+            with self.assertRaises(ImportError):
+                candles_to_columns([CANDLE], use_numpy=True)
+
+
+@skipIf(columns.numpy is None, 'numpy is not installed')
+class TestNumpyColumns(TestCase):
+
+    def test_candles(self):
+        result = candles_to_columns([CANDLE, CANDLE])
+        self.assertEqual(result.shape, (2,))
+        self.assertEqual(result.dtype.names, 
+                         ('time', 'low', 'high', 'open', 'close', 'volume'))
+        self.assertEqual(result['time'][0], 1538179200)
+        self.assertEqual(result['close'][1], 61.18)
+        
+    def test_trades(self):
+        result = trades_to_columns([TRADE])
+        self.assertEqual(str(result['time'][0]), '2018-09-27T22:49:16.105000')
+        self.assertEqual(result['trade_id'][0], 51584925)
+        self.assertEqual(result['price'][0], 6681.01)
+        self.assertEqual(result['side'][0], 'sell')
+        
+    def test_levels(self):
+        result = levels_to_columns(LEVEL2)
+        self.assertEqual(list(result['size']), [54.49144003, 1.5])
+        self.assertEqual(list(result['num_orders']), [18, 2])
+        
+        result = levels_to_columns(LEVEL3, 3)
+        self.assertEqual(result['order_id'][0], LEVEL3[0][2])
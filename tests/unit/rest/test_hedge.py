@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Unit tests for `copra.rest.hedge` module.
+"""
+
+import asyncio
+
+from asynctest import TestCase, MagicMock
+
+from copra.rest.hedge import Hedger
+from copra.rest.ratelimit import RateLimiter
+
+
+class TestHedger(TestCase):
+
+    def setUp(self):
+        self.hedger = Hedger(self.loop, percentile=90, budget=0.5, window=10,
+                             min_samples=5)
+        self.delays = []
+        self.sent = []
+
+    async def send(self):
+        delay = self.delays.pop(0)
+        resp = MagicMock()
+        resp.delay = delay
+        self.sent.append(resp)
+        await asyncio.sleep(delay)
+        if isinstance(delay, float) and delay < 0:
+            raise ValueError('failed')
+        return resp
+
+    async def warm(self, count=10, delay=0.01):
+        self.delays = [delay] * count * 2
+        for _ in range(count):
+            await self.hedger.request(self.send)
+        self.hedger.stats = dict.fromkeys(self.hedger.stats, 0)
+        self.sent = []
+
+    def test__init__(self):
+        with self.assertRaises(ValueError):
+            Hedger(self.loop, percentile=100)
+        with self.assertRaises(ValueError):
+            Hedger(self.loop, budget=0)
+        with self.assertRaises(ValueError):
+            Hedger(self.loop, window=0)
+        self.assertEqual(Hedger(self.loop, window=5).min_samples, 5)
+
+    def test_delay(self):
+        self.assertIsNone(self.hedger.delay())
+        self.hedger.latencies.extend([0.5, 0.1, 0.2, 0.4])
+        self.assertIsNone(self.hedger.delay())
+        self.hedger.latencies.extend([0.3, 0.6, 0.7, 0.8, 0.9, 1.0])
+        self.assertEqual(self.hedger.delay(), 0.9)
+
+    async def test_request(self):
+        # No hedging before min_samples.
+        self.delays = [0.05]
+        resp = await self.hedger.request(self.send)
+        self.assertEqual(resp.delay, 0.05)
+        self.assertEqual(self.hedger.stats['hedges'], 0)
+
+        await self.warm()
+        self.assertAlmostEqual(self.hedger.delay(), 0.01, delta=0.01)
+
+        # The hedge wins and the slow original is cancelled.
+        self.delays = [1.0, 0.01]
+        start = self.loop.time()
+        resp = await self.hedger.request(self.send)
+        self.assertLess(self.loop.time() - start, 0.5)
+        self.assertIs(resp, self.sent[1])
+        await asyncio.sleep(0)
+        resp.release.assert_not_called()
+        self.assertEqual(self.hedger.stats['hedges'], 1)
+        self.assertEqual(self.hedger.stats['wins'], 1)
+
+    async def test_request_original_wins(self):
+        await self.warm()
+        self.delays = [0.05, 0.2]
+        resp = await self.hedger.request(self.send)
+        self.assertIs(resp, self.sent[0])
+        self.assertEqual(self.hedger.stats['hedges'], 1)
+        self.assertEqual(self.hedger.stats['wins'], 0)
+
+    async def test_request_failure(self):
+        await self.warm()
+
+        # A failed hedge leaves the original to answer.
+        self.delays = [0.1, -0.01]
+        resp = await self.hedger.request(self.send)
+        self.assertIs(resp, self.sent[0])
+
+        self.delays = [-0.05, -0.01]
+        with self.assertRaises(ValueError):
+            await self.hedger.request(self.send)
+
+    async def test_budget(self):
+        await self.warm()
+        self.hedger._tokens = 0.0
+        self.hedger.budget = 0.5
+
+        for _ in range(2):
+            self.delays = [0.05, 0.01]
+            await self.hedger.request(self.send)
+        self.assertEqual(self.hedger.stats['hedges'], 1)
+        self.assertEqual(self.hedger.stats['denied'], 1)
+
+    async def test_limiter(self):
+        await self.warm()
+        self.hedger._tokens = 5.0
+        limiter = RateLimiter(self.loop, 0.1, 1)
+        self.delays = [0.05, 0.01]
+        await self.hedger.request(self.send, limiter)
+        self.delays = [0.05, 0.01]
+        await self.hedger.request(self.send, limiter)
+        self.assertEqual(self.hedger.stats['hedges'], 1)
+        self.assertEqual(self.hedger.stats['denied'], 1)
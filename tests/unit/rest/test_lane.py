@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Unit tests for `copra.rest.lane` module.
+"""
+
+import aiohttp
+from asynctest import TestCase
+
+from copra.rest.lane import Lane
+
+
+class TestLane(TestCase):
+
+    def setUp(self):
+        self.lane = Lane('priority', self.loop, limit=5)
+
+    async def tearDown(self):
+        await self.lane.close()
+
+    def test__init__(self):
+        self.assertEqual(self.lane.name, 'priority')
+        self.assertIsInstance(self.lane.connector, aiohttp.TCPConnector)
+        self.assertEqual(self.lane.connector.limit, 5)
+        self.assertIs(self.lane.session.connector, self.lane.connector)
+        self.assertEqual(self.lane.queue_stats(),
+                         {'requests': 0, 'queued': 0, 'total': 0.0,
+                          'mean': 0.0, 'max': 0.0})
+
+    async def test_queue_stats(self):
+        for _ in range(4):
+            ctx = self.lane._trace_context()
+            await self.lane._on_request_start(None, ctx, None)
+
+        for queued_at in (0.5, 0.25):
+            ctx = self.lane._trace_context()
+            await self.lane._on_queued_start(None, ctx, None)
+            ctx.queued_at -= queued_at
+            await self.lane._on_queued_end(None, ctx, None)
+
+        stats = self.lane.queue_stats()
+        self.assertEqual(stats['requests'], 4)
+        self.assertEqual(stats['queued'], 2)
+        self.assertAlmostEqual(stats['total'], 0.75, places=2)
+        self.assertAlmostEqual(stats['mean'], 0.1875, places=2)
+        self.assertAlmostEqual(stats['max'], 0.5, places=2)
+
+    async def test_close(self):
+        await self.lane.close()
+        self.assertTrue(self.lane.session.closed)
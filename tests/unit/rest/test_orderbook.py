@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Unit tests for `copra.rest.orderbook` module.
+"""
+
+import json
+
+from asynctest import TestCase
+
+from copra.rest.orderbook import ArrayBook, OrderBookStream
+
+BOOK = {
+    'sequence': 7072737439,
+    'bids': [['468.9', '0.01100413', '48c3ed25-616d-430d-bab4-cb338b489a33'],
+             ['468.9', '0.224', 'b96424ea-e992-4df5-b503-df50dac1ac50'],
+             ['468.5', '1.5', 'd0a5a7cb-12e9-4c2b-a5b1-7e9df1e2f0f1']],
+    'asks': [['468.91', '5.96606527', 'cc37e457-020c-4843-9a3e-e6164dcf4e60'],
+             ['468.91', '0.00341509', '43e8158a-30c6-437b-9a51-9b9da00e4e22']]
+}
+
+
+class MockContent:
+
+    def __init__(self, body):
+        self.body = body
+
+    async def read(self, n):
+        chunk, self.body = self.body[:n], self.body[n:]
+        return chunk
+
+
+class MockResponse:
+
+    def __init__(self, body):
+        self.content = MockContent(body)
+        self.released = False
+
+    def release(self):
+        self.released = True
+
+
+class TestOrderBookStream(TestCase):
+
+    async def collect(self, body, chunk_size):
+        stream = OrderBookStream(MockResponse(body), chunk_size)
+        levels = []
+        async for side, level in stream:
+            levels.append((side, level))
+        return stream, levels
+
+    async def test_iteration(self):
+        expected = ([('bids', level) for level in BOOK['bids']] +
+                    [('asks', level) for level in BOOK['asks']])
+        bodies = [json.dumps(BOOK), json.dumps(BOOK, indent=2),
+                  json.dumps(BOOK, separators=(',', ':'))]
+        for body in bodies:
+            body = body.encode('utf8')
+            for chunk_size in (1, 2, 7, 50, 65536):
+                stream, levels = await self.collect(body, chunk_size)
+                self.assertEqual(levels, expected)
+                self.assertEqual(stream.sequence, BOOK['sequence'])
+                self.assertEqual(stream.bytes_read, len(body))
+                self.assertTrue(stream.response.released)
+
+    async def test_aggregated(self):
+        book = {'sequence': 5, 'bids': [['482.98', '54.49144003', 18]],
+                'asks': [['482.99', '4.57036219', 10]]}
+        stream, levels = await self.collect(json.dumps(book).encode('utf8'), 3)
+        self.assertEqual(levels, [('bids', ['482.98', '54.49144003', 18]),
+                                  ('asks', ['482.99', '4.57036219', 10])])
+
+    async def test_empty_sides(self):
+        body = b'{"bids": [], "asks": [ ], "sequence": 9}'
+        for chunk_size in (1, 100):
+            stream, levels = await self.collect(body, chunk_size)
+            self.assertEqual(levels, [])
+            self.assertEqual(stream.sequence, 9)
+
+    async def test_read_batch(self):
+        body = json.dumps(BOOK).encode('utf8')
+        stream = OrderBookStream(MockResponse(body))
+        self.assertEqual(await stream.read_batch(), ('bids', BOOK['bids']))
+        self.assertEqual(await stream.read_batch(), ('asks', BOOK['asks']))
+        self.assertIsNone(await stream.read_batch())
+
+    async def test_truncated(self):
+        body = json.dumps(BOOK).encode('utf8')[:-40]
+        with self.assertRaises(ValueError):
+            await self.collect(body, 16)
+
+
+class TestArrayBook(TestCase):
+
+    async def test_fill(self):
+        stream = OrderBookStream(MockResponse(json.dumps(BOOK).encode('utf8')),
+                                 10)
+        book = await ArrayBook().fill(stream)
+        self.assertEqual(book.sequence, BOOK['sequence'])
+        self.assertEqual(len(book), 5)
+        self.assertEqual(list(book.bid_prices), [468.9, 468.9, 468.5])
+        self.assertEqual(list(book.bid_sizes), [0.01100413, 0.224, 1.5])
+        self.assertEqual(book.bid_ids, [level[2] for level in BOOK['bids']])
+        self.assertEqual(list(book.ask_prices), [468.91, 468.91])
+        self.assertEqual(book.ask_ids, [level[2] for level in BOOK['asks']])
+
+        book = ArrayBook(level=2)
+        book.extend('asks', [['482.99', '4.57036219', 10]])
+        self.assertEqual(book.ask_ids.typecode, 'l')
+        self.assertEqual(list(book.ask_ids), [10])
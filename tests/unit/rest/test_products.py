@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Unit tests for `copra.rest.products` module.
+"""
+
+from unittest import TestCase
+
+from copra.rest.products import ProductRules, _places, _scale, _unscale
+
+BTC_USD = {
+    'id': 'BTC-USD', 
+    'base_currency': 'BTC', 
+    'quote_currency': 'USD', 
+    'base_min_size': '0.001', 
+    'base_max_size': '70', 
+    'quote_increment': '0.01', 
+    'display_name': 'BTC/USD', 
+    'status': 'online', 
+    'margin_enabled': False, 
+    'status_message': None, 
+    'min_market_funds': '10', 
+    'max_market_funds': '1000000', 
+    'post_only': False, 
+    'limit_only': False, 
+    'cancel_only': False
+}
+
+
+class TestScaling(TestCase):
+
+    def test__places(self):
+        self.assertEqual(_places('0.01'), 2)
+        self.assertEqual(_places('0.00000001'), 8)
+        self.assertEqual(_places('1'), 0)
+        self.assertEqual(_places('0.0100'), 2)
+        
+    def test__scale(self):
+        self.assertEqual(_scale('3500.12', 2), (350012, True))
+        self.assertEqual(_scale('3500.125', 2), (350012, False))
+        self.assertEqual(_scale('3500.1200', 2), (350012, True))
+        self.assertEqual(_scale('3500', 2), (350000, True))
+        self.assertEqual(_scale('.5', 2), (50, True))
+        self.assertEqual(_scale(3500.12, 2), (350012, True))
+        self.assertEqual(_scale(7, 2), (700, True))
+        self.assertEqual(_scale(0.00001, 8), (1000, True))
+        self.assertEqual(_scale('1E-9', 8), (0, False))
+        self.assertEqual(_scale('-1.5', 1), (-15, True))
+        
+        with self.assertRaises(ValueError):
+            _scale('12a.4', 2)
+            
+    def test__unscale(self):
+        self.assertEqual(_unscale(350012, 2), '3500.12')
+        self.assertEqual(_unscale(5, 3), '0.005')
+        self.assertEqual(_unscale(42, 0), '42')
+
+
+class TestProductRules(TestCase):
+    
+    def setUp(self):
+        self.rules = ProductRules(BTC_USD)
+        
+    def test__init__(self):
+        self.assertEqual(self.rules.product_id, 'BTC-USD')
+        self.assertEqual(self.rules.price_places, 2)
+        self.assertEqual(self.rules.price_increment, 1)
+        self.assertEqual(self.rules.size_places, 8)
+        self.assertEqual(self.rules.min_size, 100000)
+        self.assertEqual(self.rules.max_size, 7000000000)
+        self.assertEqual(self.rules.min_funds, 1000)
+        
+        product = dict(BTC_USD, base_increment='0.0001',
+                       quote_increment='0.05')
+        rules = ProductRules(product)
+        self.assertEqual(rules.size_places, 4)
+        self.assertEqual(rules.size_increment, 1)
+        self.assertEqual(rules.price_increment, 5)
+        
+    def test_check_limit(self):
+        self.assertEqual(self.rules.check_limit('buy', '3500.12', '0.01'),
+                         ('3500.12', '0.01000000', None))
+        self.assertEqual(self.rules.check_limit('buy', 3500.1, 0.01, 
+                                                stop_price=3600),
+                         ('3500.10', '0.01000000', '3600.00'))
+        
+        with self.assertRaises(ValueError):
+            self.rules.check_limit('buy', '3500.125', '0.01')
+        with self.assertRaises(ValueError):
+            self.rules.check_limit('buy', '3500.12', '0.0001')
+        with self.assertRaises(ValueError):
+            self.rules.check_limit('buy', '3500.12', '71')
+        with self.assertRaises(ValueError):
+            self.rules.check_limit('buy', '0', '1')
+        with self.assertRaises(ValueError):
+            self.rules.check_limit('buy', '3500.12', '1',
+                                   stop_price='3600.001')
+        
+        # Rounding
+        self.assertEqual(self.rules.check_limit('buy', '3500.129',
+                                                '0.123456789',
+                                                round_values=True),
+                         ('3500.12', '0.12345678', None))
+        self.assertEqual(self.rules.check_limit('sell', '3500.121', '1',
+                                                round_values=True),
+                         ('3500.13', '1.00000000', None))
+        # Size limits still apply after rounding
+        with self.assertRaises(ValueError):
+            self.rules.check_limit('buy', '3500', '0.0001', round_values=True)
+        with self.assertRaises(ValueError):
+            self.rules.check_limit('buy', '0.001', '1', round_values=True)
+        # Negative values are rejected rather than rounded toward or past 0
+        for price, size in (('-0.001', '1'), (-0.005, 1), ('-3500.121', '1'),
+                            ('3500', '-0.000000001'), ('3500', '-1.5')):
+            with self.assertRaises(ValueError):
+                self.rules.check_limit('sell', price, size, round_values=True)
+            
+    def test_check_limit_product_status(self):
+        rules = ProductRules(dict(BTC_USD, post_only=True))
+        with self.assertRaises(ValueError):
+            rules.check_limit('buy', '3500', '1')
+        self.assertEqual(rules.check_limit('buy', '3500', '1',
+                                           post_only=True)[0], '3500.00')
+        
+        rules = ProductRules(dict(BTC_USD, cancel_only=True))
+        with self.assertRaises(ValueError):
+            rules.check_limit('buy', '3500', '1')
+            
+        rules = ProductRules(dict(BTC_USD, status='offline'))
+        with self.assertRaises(ValueError):
+            rules.check_limit('buy', '3500', '1')
+    
+    def test_check_market(self):
+        self.assertEqual(self.rules.check_market('buy', size='0.5'),
+                         ('0.50000000', None, None))
+        self.assertEqual(self.rules.check_market('buy', funds='100'),
+                         (None, '100.00', None))
+        
+        with self.assertRaises(ValueError):
+            self.rules.check_market('buy', funds='5')
+        with self.assertRaises(ValueError):
+            self.rules.check_market('buy', funds='2000000')
+        with self.assertRaises(ValueError):
+            self.rules.check_market('buy', funds='100.001')
+        with self.assertRaises(ValueError):
+            self.rules.check_market('buy', size='0.0001')
+            
+        self.assertEqual(self.rules.check_market('buy', funds='100.009', 
+                                                 round_values=True),
+                         (None, '100.00', None))
+                         
+        rules = ProductRules(dict(BTC_USD, limit_only=True))
+        with self.assertRaises(ValueError):
+            rules.check_market('buy', size='1')
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Unit tests for `copra.rest.ratelimit` module.
+"""
+
+import asyncio
+
+from asynctest import TestCase
+
+from copra.rest.ratelimit import RateLimiter
+
+
+class TestRateLimiter(TestCase):
+
+    def test__init__(self):
+        limiter = RateLimiter(self.loop, 5, 10)
+        self.assertEqual(limiter.rate, 5)
+        self.assertEqual(limiter.burst, 10)
+        self.assertEqual(limiter.waiting, 0)
+
+        with self.assertRaises(ValueError):
+            RateLimiter(self.loop, 0, 10)
+
+        with self.assertRaises(ValueError):
+            RateLimiter(self.loop, 5, 0)
+
+    async def test_acquire(self):
+        limiter = RateLimiter(self.loop, 50, 3)
+
+        # The burst is available immediately
+        start = self.loop.time()
+        for _ in range(3):
+            await limiter.acquire()
+        self.assertLess(self.loop.time() - start, 0.015)
+
+        # Then requests are paced at rate
+        start = self.loop.time()
+        await asyncio.gather(*[limiter.acquire() for _ in range(3)])
+        self.assertGreaterEqual(self.loop.time() - start, 0.05)
+        self.assertEqual(limiter.waiting, 0)
+
+    async def test_acquire_priority(self):
+        limiter = RateLimiter(self.loop, 50, 1)
+        await limiter.acquire()
+
+        order = []
+
+        async def acquire(name, priority=False):
+            await limiter.acquire(priority)
+            order.append(name)
+
+        tasks = [self.loop.create_task(acquire('normal1')),
+                 self.loop.create_task(acquire('normal2'))]
+        await asyncio.sleep(0)
+        tasks.append(self.loop.create_task(acquire('priority', True)))
+        await asyncio.gather(*tasks)
+        self.assertEqual(order, ['priority', 'normal1', 'normal2'])
+
+    async def test_acquire_cancelled(self):
+        limiter = RateLimiter(self.loop, 50, 1)
+        await limiter.acquire()
+
+        task = self.loop.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        self.assertEqual(limiter.waiting, 1)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        self.assertEqual(limiter.waiting, 0)
+
+        await limiter.acquire()
+
+    async def test_try_acquire(self):
+        limiter = RateLimiter(self.loop, 50, 2)
+        self.assertTrue(limiter.try_acquire())
+        self.assertTrue(limiter.try_acquire())
+        self.assertFalse(limiter.try_acquire())
+
+        # A waiter takes the next token.
+        task = self.loop.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        self.assertFalse(limiter.try_acquire())
+        await task
+        self.assertFalse(limiter.try_acquire())
+
+        await asyncio.sleep(0.03)
+        self.assertTrue(limiter.try_acquire())
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Unit tests for `copra.rest.records` module.
+"""
+
+import pickle
+from unittest import TestCase
+
+from copra.rest.records import Candle, Fill, LedgerEntry, Trade
+
+TRADE = {'time': '2018-09-27T22:49:16.105Z', 'trade_id': 51584925, 
+         'price': '6681.01000000', 'size': '0.02350019', 'side': 'sell'}
+
+FILL = {'trade_id': 74, 'product_id': 'BTC-USD', 'price': '10.00', 
+        'size': '0.01', 'order_id': 'd50ec984-77a8-460a-b958-66f114b0de9b', 
+        'created_at': '2014-11-07T22:19:28.578544Z', 'liquidity': 'T', 
+        'fee': '0.00025', 'settled': True, 'side': 'buy'}
+
+ENTRY = {'created_at': '2018-09-28T19:31:21.211159Z', 'id': 10712040275, 
+         'amount': '-600.9103845810000000', 'balance': '0.0000005931528000', 
+         'type': 'match', 
+         'details': {'order_id': 'd2fadbb5-8769-4b80-91da-be3d9c6bd38d', 
+                     'trade_id': '34209042', 'product_id': 'BTC-USD'}}
+
+CANDLE = [1538179200, 61.12, 61.75, 61.74, 61.18, 2290.8172972700004]
+
+
+class TestRecords(TestCase):
+
+    def test_trade(self):
+        trade = Trade.from_dict(TRADE)
+        self.assertEqual(trade.trade_id, 51584925)
+        self.assertEqual(trade.price, 6681.01)
+        self.assertEqual(trade.size, 0.02350019)
+        self.assertEqual(trade.side, 'sell')
+        self.assertEqual(trade.time, TRADE['time'])
+        self.assertFalse(hasattr(trade, '__dict__'))
+        with self.assertRaises(AttributeError):
+            trade.extra = 1
+        
+    def test_fill(self):
+        fill = Fill.from_dict(FILL)
+        self.assertEqual(fill.trade_id, 74)
+        self.assertEqual(fill.price, 10.0)
+        self.assertEqual(fill.fee, 0.00025)
+        self.assertIs(fill.settled, True)
+        self.assertEqual(fill.liquidity, 'T')
+        
+    def test_candle(self):
+        candle = Candle.from_list(CANDLE)
+        self.assertEqual(candle.time, 1538179200)
+        self.assertEqual(candle.low, 61.12)
+        self.assertEqual(candle.volume, 2290.8172972700004)
+        
+    def test_ledger_entry(self):
+        entry = LedgerEntry.from_dict(ENTRY)
+        self.assertEqual(entry.id, 10712040275)
+        self.assertEqual(entry.amount, -600.910384581)
+        self.assertEqual(entry.details['trade_id'], '34209042')
+        
+    def test_record(self):
+        trade = Trade.from_dict(TRADE)
+        self.assertEqual(trade, Trade.from_dict(TRADE))
+        self.assertNotEqual(trade, Trade.from_dict(dict(TRADE, side='buy')))
+        self.assertNotEqual(trade, TRADE)
+        self.assertEqual(trade._asdict(), 
+                         {'time': TRADE['time'], 'trade_id': 51584925, 
+                          'price': 6681.01, 'size': 0.02350019,
+                          'side': 'sell'})
+        self.assertEqual(repr(trade), 
+                         "Trade(time='2018-09-27T22:49:16.105Z', "
+                         "trade_id=51584925, price=6681.01, size=0.02350019, "
+                         "side='sell')")
+        self.assertEqual(pickle.loads(pickle.dumps(trade)), trade)
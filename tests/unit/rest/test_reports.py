@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Unit tests for `copra.rest.reports` module.
+"""
+
+import os
+import tempfile
+
+import aiohttp
+from aiohttp import web
+from asynctest import TestCase
+
+from copra.rest.reports import ReportRows, download_report
+
+REPORT = ('\ufeffportfolio,trade id,product,side,size,price,note\r\n'
+          'default,1,BTC-USD,BUY,0.01,3500.00,\r\n'
+          'default,2,BTC-USD,SELL,0.02,3501.00,"multi\r\nline, quoted"\r\n'
+          'default,3,BTC-USD,BUY,0.03,3502.00,"say ""hi"""\r\n'
+          'default,4,BTC-USD,SELL,0.04,3503.00,last').encode('utf8')
+
+
+class TestReports(TestCase):
+
+    async def setUp(self):
+        app = web.Application()
+        app.router.add_get('/report.csv', self.report)
+        app.router.add_get('/missing.csv', self.missing)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = 'http://127.0.0.1:{}'.format(port)
+        self.session = aiohttp.ClientSession(loop=self.loop)
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'report.csv')
+
+    async def tearDown(self):
+        await self.session.close()
+        await self.runner.cleanup()
+        self.dir.cleanup()
+
+    async def report(self, request):
+        return web.Response(body=REPORT, content_type='text/csv')
+
+    async def missing(self, request):
+        return web.Response(status=404)
+
+    async def test_download_report(self):
+        written = await download_report(self.loop, self.session,
+                                        self.url + '/report.csv', self.path,
+                                        chunk_size=7)
+        self.assertEqual(written, len(REPORT))
+        with open(self.path, 'rb') as f:
+            self.assertEqual(f.read(), REPORT)
+
+        with self.assertRaises(aiohttp.ClientResponseError):
+            await download_report(self.loop, self.session,
+                                  self.url + '/missing.csv', self.path)
+
+    async def test_report_rows(self):
+        # Small chunks split rows, quoted newlines and the UTF-8 BOM.
+        for chunk_size in (1, 3, 16, 65536):
+            rows = ReportRows(self.loop, self.session,
+                              self.url + '/report.csv', chunk_size=chunk_size)
+            results = []
+            async for row in rows:
+                results.append(row)
+            self.assertEqual(rows.fieldnames, ['portfolio', 'trade id',
+                                               'product', 'side', 'size',
+                                               'price', 'note'])
+            self.assertEqual(rows.bytes_read, len(REPORT))
+            self.assertEqual([row['trade id'] for row in results],
+                             ['1', '2', '3', '4'])
+            self.assertEqual(results[0]['note'], '')
+            self.assertEqual(results[1]['note'], 'multi\r\nline, quoted')
+            self.assertEqual(results[2]['note'], 'say "hi"')
+            self.assertEqual(results[3]['note'], 'last')
+            self.assertEqual(results[3]['price'], '3503.00')
+
+    async def test_report_rows_path(self):
+        rows = ReportRows(self.loop, self.session, self.url + '/report.csv',
+                          self.path, chunk_size=10)
+        count = 0
+        async for row in rows:
+            count += 1
+        self.assertEqual(count, 4)
+        with open(self.path, 'rb') as f:
+            self.assertEqual(f.read(), REPORT)
+
+    async def test_report_rows_error(self):
+        rows = ReportRows(self.loop, self.session, self.url + '/missing.csv')
+        with self.assertRaises(aiohttp.ClientResponseError):
+            async for row in rows:
+                pass
+        with self.assertRaises(StopAsyncIteration):
+            await rows.__anext__()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Unit tests for `copra.rest.timeouts` module.
+"""
+
+import asyncio
+
+import aiohttp
+from aiohttp import web
+from asynctest import TestCase, MagicMock
+
+from copra.rest import Client
+from copra.rest.timeouts import Deadline
+
+
+class TestDeadline(TestCase):
+
+    def setUp(self):
+        self.now = 100.0
+        self.clock = MagicMock()
+        self.clock.time = lambda: self.now
+
+    def test__init__(self):
+        for kwargs in ({'timeout': 0}, {'connect': -1}, {'read': 0}):
+            with self.assertRaises(ValueError):
+                Deadline(self.clock, **kwargs)
+
+        deadline = Deadline(self.clock, 5)
+        self.assertEqual(deadline.expires, 105.0)
+        self.assertIsNone(Deadline(self.clock, read=1).expires)
+
+    def test_remaining(self):
+        deadline = Deadline(self.clock, 5)
+        self.assertEqual(deadline.remaining(), 5.0)
+        self.assertFalse(deadline.expired)
+        self.now += 3
+        self.assertEqual(deadline.remaining(), 2.0)
+        self.now += 3
+        self.assertEqual(deadline.remaining(), 0.0)
+        self.assertTrue(deadline.expired)
+
+        deadline = Deadline(self.clock)
+        self.assertIsNone(deadline.remaining())
+        self.assertFalse(deadline.expired)
+
+    def test_client_timeout(self):
+        deadline = Deadline(self.clock, 5, connect=1, read=3)
+        timeout = deadline.client_timeout()
+        self.assertIsInstance(timeout, aiohttp.ClientTimeout)
+        self.assertEqual((timeout.total, timeout.connect, timeout.sock_read),
+                         (5.0, 1, 3))
+
+        # Connect and read are capped by what is left.
+        self.now += 4.5
+        timeout = deadline.client_timeout()
+        self.assertEqual((timeout.total, timeout.connect, timeout.sock_read),
+                         (0.5, 0.5, 0.5))
+
+        self.now += 1
+        with self.assertRaises(asyncio.TimeoutError):
+            deadline.client_timeout()
+
+        timeout = Deadline(self.clock, read=2).client_timeout()
+        self.assertEqual((timeout.total, timeout.connect, timeout.sock_read),
+                         (None, None, 2))
+
+
+class TestHangingServer(TestCase):
+
+    async def setUp(self):
+        self.hang = asyncio.Event(loop=self.loop)
+        app = web.Application()
+        app.router.add_get('/time', self.time)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.client = Client(self.loop, 'http://127.0.0.1:{}'.format(port),
+                             limit=1)
+
+    async def tearDown(self):
+        self.hang.set()
+        await self.client.close()
+        await self.runner.cleanup()
+
+    async def time(self, request):
+        await self.hang.wait()
+        return web.json_response({'iso': '2019-01-01T00:00:00Z'})
+
+    async def test_timeout(self):
+        start = self.loop.time()
+        with self.assertRaises(asyncio.TimeoutError):
+            await self.client.server_time(timeout=0.2)
+        self.assertLess(self.loop.time() - start, 2)
+
+        # The hung request's connection went back to the single slot pool.
+        self.hang.set()
+        _, body = await self.client.get('/time', timeout=1, raw=False)
+        self.assertEqual(body['iso'], '2019-01-01T00:00:00Z')
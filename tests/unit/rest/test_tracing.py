@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Unit tests for `copra.rest.tracing` module.
+"""
+
+from aiohttp import web
+from asynctest import TestCase, patch
+
+from copra.rest import APIRequestError, Client
+from copra.rest.tracing import RequestTrace, Tracer
+
+
+class TestRequestTrace(TestCase):
+
+    def trace(self, **marks):
+        trace = RequestTrace('GET', '/products/BTC-USD/book')
+        trace.marks = marks
+        return trace
+
+    def test__init__(self):
+        trace = RequestTrace('DELETE', '/orders/abc-123')
+        self.assertEqual(trace.endpoint, 'DELETE /orders/{}')
+        self.assertIn('start', trace.marks)
+
+    def test_phases(self):
+        # A new connection, with a DNS lookup, and a request body.
+        trace = self.trace(start=0.0, queue_start=0.0, queue_end=1.0,
+                           connect_start=1.0, dns_start=1.0, dns_end=1.5,
+                           connect_end=3.0, sent=3.5, headers=5.0, end=5.25)
+        self.assertEqual(trace.phases(),
+                         {'queue': 1.0, 'dns': 0.5, 'connect': 1.5,
+                          'send': 0.5, 'wait': 1.5, 'read': 0.25,
+                          'total': 5.25})
+
+        # A pooled connection and no body.
+        trace = self.trace(start=0.0, reuse=0.25, headers=1.0, end=1.5)
+        self.assertEqual(trace.phases(),
+                         {'wait': 0.75, 'read': 0.5, 'total': 1.5})
+
+        # No response.
+        trace = self.trace(start=0.0, connect_start=0.0, end=2.0)
+        self.assertEqual(trace.phases(), {'total': 2.0})
+
+
+class TestTracer(TestCase):
+
+    def test__init__(self):
+        with self.assertRaises(ValueError):
+            Tracer(0)
+        with self.assertRaises(ValueError):
+            Tracer(1.5)
+
+    def test_start(self):
+        tracer = Tracer(0.25)
+        with patch('random.random', side_effect=[0.1, 0.5, 0.3, 0.2]):
+            traces = [tracer.start('GET', '/time') for _ in range(4)]
+        self.assertEqual([trace is not None for trace in traces],
+                         [True, False, False, True])
+        self.assertEqual(tracer.requests, 4)
+
+    def test_finish(self):
+        traces = []
+        tracer = Tracer(1, callback=traces.append, buckets=(1.0,))
+        for end in (0.5, 2.0):
+            trace = tracer.start('GET', '/products/ETH-USD/ticker')
+            trace.marks = {'start': 0.0, 'reuse': 0.0, 'headers': 0.0}
+            with patch('time.monotonic', return_value=end):
+                tracer.finish(trace, error=ValueError())
+        self.assertEqual(traces[1].marks['end'], 2.0)
+        self.assertIsNone(traces[1].status)
+        self.assertIsInstance(traces[1].error, ValueError)
+        self.assertEqual(tracer.traced, 2)
+
+        snapshot = tracer.snapshot()['GET /products/{}/ticker']
+        self.assertEqual(sorted(snapshot), ['read', 'total', 'wait'])
+        self.assertEqual(snapshot['read'],
+                         {'count': 2, 'sum': 2.5,
+                          'buckets': [(1.0, 1), (float('inf'), 2)]})
+
+        tracer.reset()
+        self.assertEqual(tracer.snapshot(), {})
+        self.assertEqual(tracer.traced, 0)
+
+
+class TestTracedClient(TestCase):
+
+    async def setUp(self):
+        app = web.Application()
+        app.router.add_get('/time', self.time)
+        app.router.add_post('/orders', self.orders)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.client = Client(self.loop, 'http://127.0.0.1:{}'.format(port))
+        self.traces = []
+        self.tracer = self.client.enable_tracing(1, self.traces.append)
+
+    async def tearDown(self):
+        await self.client.close()
+        await self.runner.cleanup()
+
+    async def time(self, request):
+        return web.json_response({'iso': '2019-01-01T00:00:00Z'})
+
+    async def orders(self, request):
+        return web.json_response({'message': 'Invalid size'}, status=400)
+
+    async def test_phases(self):
+        await self.client.get('/time')
+        await self.client.get('/time')
+        with self.assertRaises(APIRequestError):
+            await self.client.post('/orders', data={'size': '1'})
+
+        first, second, order = self.traces
+        self.assertEqual(first.status, 200)
+        self.assertLessEqual({'connect', 'wait', 'read', 'total'},
+                             set(first.phases()))
+        self.assertNotIn('connect', second.phases())
+        self.assertIn('wait', second.phases())
+        self.assertEqual(order.status, 400)
+        self.assertIsNotNone(order.error)
+        self.assertIn('send', order.phases())
+
+        snapshot = self.tracer.snapshot()
+        self.assertEqual(snapshot['GET /time']['total']['count'], 2)
+        self.assertEqual(snapshot['POST /orders']['total']['count'], 1)
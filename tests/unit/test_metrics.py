@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Unit tests for `copra.metrics` module.
+"""
+
+import aiohttp
+from asynctest import TestCase
+
+from copra.metrics import (CONTENT_TYPE, Histogram, Registry, RestMetrics,
+                           WebSocketMetrics, serve)
+
+
+class TestHistogram(TestCase):
+
+    def test_observe(self):
+        histogram = Histogram((0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 2.0):
+            histogram.observe(value)
+        self.assertEqual(histogram.snapshot(),
+                         {'count': 4, 'sum': 2.65,
+                          'buckets': [(0.1, 2), (1.0, 3),
+                                      (float('inf'), 4)]})
+
+
+class TestRegistry(TestCase):
+
+    def setUp(self):
+        self.registry = Registry()
+
+    def test_counter(self):
+        counter = self.registry.counter('requests', 'Requests.', ('status',))
+        self.assertIs(self.registry.counter('requests', 'Requests.',
+                                            ('status',)), counter)
+        counter.inc('200')
+        counter.inc('200', amount=2)
+        counter.inc('404')
+        self.assertEqual(counter.snapshot(), {('200',): 3, ('404',): 1})
+
+        with self.assertRaises(ValueError):
+            counter.inc()
+        with self.assertRaises(ValueError):
+            self.registry.counter('requests', 'Requests.')
+        with self.assertRaises(ValueError):
+            self.registry.histogram('requests', 'Requests.', ('status',))
+
+    def test_histogram(self):
+        latency = self.registry.histogram('latency', 'Latency.', ('endpoint',),
+                                          buckets=(1.0,))
+        latency.observe(0.5, 'GET /time')
+        latency.observe(1.5, 'GET /time')
+        self.assertEqual(self.registry.snapshot(),
+                         {'latency': {('GET /time',): {
+                             'count': 2, 'sum': 2.0,
+                             'buckets': [(1.0, 1), (float('inf'), 2)]}}})
+        with self.assertRaises(ValueError):
+            latency.observe(1.0)
+
+    def test_render(self):
+        self.assertEqual(self.registry.render(), '# EOF\n')
+
+        self.registry.counter('reconnects', 'Reconnections.').inc()
+        counter = self.registry.counter('messages', 'Messages "received".',
+                                        ('type', 'product'))
+        counter.inc('match', 'BTC-USD', amount=3)
+        counter.inc('heartbeat', 'ETH-"USD"\n')
+        latency = self.registry.histogram('latency', 'Latency.',
+                                          ('endpoint',), buckets=(0.5, 1.0))
+        latency.observe(0.25, 'GET /time')
+        self.assertEqual(self.registry.render(), '\n'.join([
+            '# TYPE latency histogram',
+            '# HELP latency Latency.',
+            'latency_bucket{endpoint="GET /time",le="0.5"} 1',
+            'latency_bucket{endpoint="GET /time",le="1.0"} 1',
+            'latency_bucket{endpoint="GET /time",le="+Inf"} 1',
+            'latency_count{endpoint="GET /time"} 1',
+            'latency_sum{endpoint="GET /time"} 0.25',
+            '# TYPE messages counter',
+            '# HELP messages Messages \\"received\\".',
+            'messages_total{type="heartbeat",product="ETH-\\"USD\\"\\n"} 1',
+            'messages_total{type="match",product="BTC-USD"} 3',
+            '# TYPE reconnects counter',
+            '# HELP reconnects Reconnections.',
+            'reconnects_total 1',
+            '# EOF',
+            '']))
+
+    async def test_serve(self):
+        self.registry.counter('reconnects', 'Reconnections.').inc()
+        runner = await serve(self.registry, port=0)
+        port = runner.addresses[0][1]
+        try:
+            async with aiohttp.ClientSession(loop=self.loop) as session:
+                url = 'http://127.0.0.1:{}/metrics'.format(port)
+                async with session.get(url) as resp:
+                    self.assertEqual(resp.status, 200)
+                    self.assertEqual(resp.headers['Content-Type'],
+                                     CONTENT_TYPE)
+                    self.assertEqual(await resp.text(),
+                                     self.registry.render())
+        finally:
+            await runner.cleanup()
+
+
+class TestClientMetrics(TestCase):
+
+    def test_shared(self):
+        registry = Registry()
+        first = RestMetrics(registry)
+        second = RestMetrics(registry)
+        self.assertIs(first.requests, second.requests)
+
+        first.request('GET /time', 200, 0.1)
+        second.request('GET /time', None, 5.0, 'timeout')
+        snapshot = registry.snapshot()
+        self.assertEqual(snapshot['copra_rest_requests'],
+                         {('GET /time', '200'): 1, ('GET /time', 'none'): 1})
+        self.assertEqual(snapshot['copra_rest_errors'],
+                         {('GET /time', 'timeout'): 1})
+        self.assertEqual(
+            snapshot['copra_rest_request_seconds'][('GET /time',)]['count'], 2)
+
+    def test_websocket(self):
+        registry = Registry()
+        metrics = WebSocketMetrics(registry, 'feed')
+        metrics.message({'type': 'match', 'product_id': 'BTC-USD'}, 120)
+        metrics.message({'type': 'subscriptions'})
+        metrics.handled('on_message', 0.002)
+        snapshot = registry.snapshot()
+        self.assertEqual(snapshot['copra_websocket_messages'],
+                         {('feed', 'match', 'BTC-USD'): 1,
+                          ('feed', 'subscriptions', ''): 1})
+        self.assertEqual(snapshot['copra_websocket_received_bytes'],
+                         {('feed',): 120})
+        self.assertEqual(snapshot['copra_websocket_handler_seconds'][
+            ('feed', 'on_message')]['count'], 1)
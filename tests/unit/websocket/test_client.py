@@ -10,8 +10,13 @@ from urllib.parse import urlparse
 
 from asynctest import TestCase, patch, CoroutineMock, MagicMock, skipUnless
 
+from copra.metrics import Registry
 from copra.websocket import Channel, Client, FEED_URL, SANDBOX_FEED_URL
-from copra.websocket.client import ClientProtocol
+from copra.websocket.client import ClientProtocol, PROFILES
+from copra.websocket.transport import AiohttpProtocol
+
+from autobahn.websocket.compress import PerMessageDeflateOffer
+from autobahn.websocket.compress import PerMessageDeflateResponse
 
 # These are made up
 TEST_KEY = 'a035b37f42394a6d343231f7f772b99d'
@@ -52,6 +57,29 @@ class TestClientProtocol(TestCase):
         self.protocol.onMessage(msg, True)
         self.protocol.factory.on_error.called_with(404, 'testing')
         
+    def test_onMessage_metrics(self):
+        self.protocol.factory = Client(self.loop, [], auto_connect=False,
+                                       name='feed', metrics=Registry())
+        self.protocol.factory.on_message = MagicMock()
+        msg = json.dumps({'type': 'match', 'product_id': 'BTC-USD'}).encode('utf8')
+        self.protocol.onMessage(msg, False)
+        self.protocol.factory.on_message.assert_called_with(
+            {'type': 'match', 'product_id': 'BTC-USD'})
+        
+        self.protocol.factory.on_error = MagicMock(side_effect=ValueError)
+        with self.assertRaises(ValueError):
+            self.protocol.onMessage(b'{"type": "error", "message": "Failed"}', False)
+            
+        snapshot = self.protocol.factory.metrics.registry.snapshot()
+        self.assertEqual(snapshot['copra_websocket_messages'],
+                         {('feed', 'match', 'BTC-USD'): 1, 
+                          ('feed', 'error', ''): 1})
+        self.assertEqual(snapshot['copra_websocket_received_bytes'], 
+                         {('feed',): len(msg) + 38})
+        handlers = snapshot['copra_websocket_handler_seconds']
+        self.assertEqual(handlers[('feed', 'on_message')]['count'], 1)
+        self.assertEqual(handlers[('feed', 'on_error')]['count'], 1)
+        
 
 class TestClient(TestCase):
     """Tests for copra.websocket.client.Client"""
@@ -155,7 +183,127 @@ class TestClient(TestCase):
             self.assertFalse(client.closing)
             mock_attl.assert_called_once()
         
-                        
+
+    def test__init__compress(self):
+        channel1 = Channel('heartbeat', ['BTC-USD', 'LTC-USD'])
+
+        # Default, no compression offered
+        client = Client(self.loop, channel1, auto_connect=False)
+        self.assertFalse(client.compress)
+        self.assertEqual(client.perMessageCompressionOffers, [])
+
+        client = Client(self.loop, channel1, auto_connect=False, compress=True)
+        self.assertTrue(client.compress)
+        self.assertEqual(len(client.perMessageCompressionOffers), 1)
+        offer = client.perMessageCompressionOffers[0]
+        self.assertIsInstance(offer, PerMessageDeflateOffer)
+        self.assertEqual(offer.request_max_window_bits, 0)
+
+        client = Client(self.loop, channel1, auto_connect=False, compress=True,
+                        compress_window_bits=10, compress_mem_level=4)
+        offer = client.perMessageCompressionOffers[0]
+        self.assertEqual(offer.request_max_window_bits, 10)
+
+        response = PerMessageDeflateResponse(12, False, 10, False)
+        accept = client.perMessageCompressionAccept(response)
+        self.assertEqual(accept.window_bits, 10)
+        self.assertEqual(accept.mem_level, 4)
+
+        response = PerMessageDeflateResponse(9, False, 10, False)
+        accept = client.perMessageCompressionAccept(response)
+        self.assertEqual(accept.window_bits, 9)
+
+        self.assertIsNone(client.perMessageCompressionAccept(None))
+
+        with self.assertRaises(ValueError):
+            client = Client(self.loop, channel1, auto_connect=False,
+                            compress=True, compress_window_bits=16)
+
+        with self.assertRaises(ValueError):
+            client = Client(self.loop, channel1, auto_connect=False,
+                            compress=True, compress_window_bits=8)
+
+        with self.assertRaises(ValueError):
+            client = Client(self.loop, channel1, auto_connect=False,
+                            compress=True, compress_mem_level=0)
+
+    def test__init__profile(self):
+        channel1 = Channel('heartbeat', ['BTC-USD', 'LTC-USD'])
+
+        # autobahn defaults
+        client = Client(self.loop, channel1, auto_connect=False)
+        self.assertIsNone(client.profile)
+        self.assertTrue(client.utf8validateIncoming)
+
+        for name, options in PROFILES.items():
+            client = Client(self.loop, channel1, auto_connect=False,
+                            profile=name)
+            self.assertEqual(client.profile, name)
+            for key, val in options.items():
+                self.assertEqual(getattr(client, key), val)
+
+        # Overrides
+        client = Client(self.loop, channel1, auto_connect=False,
+                        profile='low_latency',
+                        protocol_options={'autoPingInterval': 60,
+                                          'openHandshakeTimeout': 7})
+        self.assertEqual(client.autoPingInterval, 60)
+        self.assertEqual(client.openHandshakeTimeout, 7)
+        self.assertTrue(client.tcpNoDelay)
+        self.assertFalse(client.utf8validateIncoming)
+
+        # Options without a profile
+        client = Client(self.loop, channel1, auto_connect=False,
+                        protocol_options={'tcpNoDelay': False})
+        self.assertFalse(client.tcpNoDelay)
+        self.assertTrue(client.utf8validateIncoming)
+
+        with self.assertRaises(ValueError):
+            client = Client(self.loop, channel1, auto_connect=False,
+                            profile='warp_speed')
+
+    def test__init__transport(self):
+        channel1 = Channel('heartbeat', ['BTC-USD', 'LTC-USD'])
+
+        client = Client(self.loop, channel1, auto_connect=False)
+        self.assertEqual(client.transport, 'autobahn')
+        self.assertIsNone(client.session)
+
+        session = MagicMock()
+        client = Client(self.loop, channel1, auto_connect=False,
+                        transport='aiohttp', session=session)
+        self.assertEqual(client.transport, 'aiohttp')
+        self.assertIs(client.session, session)
+
+        with self.assertRaises(ValueError):
+            client = Client(self.loop, channel1, auto_connect=False,
+                            transport='carrier_pigeon')
+
+        with self.assertRaises(ValueError):
+            client = Client(self.loop, channel1, auto_connect=False,
+                            transport='websockets', profile='low_latency')
+
+        with self.assertRaises(ValueError):
+            client = Client(self.loop, channel1, auto_connect=False,
+                            transport='aiohttp',
+                            protocol_options={'tcpNoDelay': True})
+
+        with self.assertRaises(ValueError):
+            client = Client(self.loop, channel1, auto_connect=False,
+                            transport='aiohttp', compress=True,
+                            compress_mem_level=4)
+
+        with self.assertRaises(ValueError):
+            client = Client(self.loop, channel1, auto_connect=False,
+                            transport='websockets', compress=True,
+                            compress_window_bits=10)
+
+        # A transport whose library isn't installed is rejected up front.
+        with patch.dict('sys.modules', {'websockets': None}):
+            with self.assertRaises(ImportError):
+                client = Client(self.loop, channel1, auto_connect=False,
+                                transport='websockets')
+
     def test__get_subscribe_message(self):
         channel1 = Channel('heartbeat', ['BTC-USD', 'LTC-USD'])
         channel2 = Channel('level2', ['LTC-USD'])
@@ -189,6 +337,13 @@ class TestClient(TestCase):
         self.assertEqual(msg['timestamp'], '1546384260.0321212')
         self.assertEqual(msg['signature'], 'KQq/poDCHjDDRURkQOc+QZi16c6cio9Yo/nF1+kts84=')
 
+        # Clock corrected timestamp
+        client.clock = MagicMock()
+        client.clock.time.return_value = 1546384260.0321212
+        msg = json.loads(client._get_subscribe_message(client.channels.values()).decode('utf8'))
+        self.assertEqual(msg['timestamp'], '1546384260.0321212')
+        self.assertEqual(msg['signature'], 'KQq/poDCHjDDRURkQOc+QZi16c6cio9Yo/nF1+kts84=')
+
                         
     def test_subscribe(self):
         channel1 = Channel('heartbeat', ['BTC-USD', 'LTC-USD'])
@@ -265,6 +420,19 @@ class TestClient(TestCase):
         url = urlparse(FEED_URL)
         client.loop.create_connection.assert_called_with(client, url.hostname, url.port, ssl=True)
 
+    async def test_add_as_task_to_loop_transport(self):
+        channel1 = Channel('heartbeat', ['BTC-USD', 'LTC-USD'])
+        client = Client(self.loop, channel1, auto_connect=False,
+                        transport='aiohttp')
+
+        with patch('copra.websocket.transport.AiohttpProtocol.run',
+                   new=CoroutineMock()) as mock_run:
+            client.add_as_task_to_loop()
+            self.assertIsInstance(client.protocol, AiohttpProtocol)
+            self.assertIs(client.protocol.factory, client)
+            await client.protocol.task
+            mock_run.assert_called_with()
+
         
     def test_on_open(self):
         channel1 = Channel('heartbeat', ['BTC-USD', 'LTC-USD', 'LTC-EUR'])
@@ -314,6 +482,14 @@ class TestClient(TestCase):
         self.assertFalse(client.closing)
         client.add_as_task_to_loop.assert_called_once()
         
+        registry = Registry()
+        client = Client(self.loop, [channel1], auto_connect=False, 
+                        metrics=registry)
+        client.add_as_task_to_loop = MagicMock()
+        client.on_close(False, None, None)
+        self.assertEqual(registry.snapshot()['copra_websocket_reconnects'],
+                         {('WebSocket Client',): 1})
+        
         
     @skipUnless(sys.version_info >= (3, 6), 'MagicMock.assert_called_once not implemented. ')   
     async def test_close(self):
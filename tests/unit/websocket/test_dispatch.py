@@ -0,0 +1,193 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Unit tests for `copra.websocket.dispatch` module.
+"""
+
+import asyncio
+import json
+import threading
+
+from asynctest import TestCase, MagicMock
+
+from copra.websocket import Client, TradeTape
+from copra.websocket.client import ClientProtocol
+from copra.websocket.dispatch import ThreadedDispatcher
+from copra.websocket.transport import AiohttpProtocol
+
+
+class TestThreadedDispatcher(TestCase):
+
+    def setUp(self):
+        self.handled = []
+        self.lock = threading.Lock()
+
+    def handler(self, message):
+        with self.lock:
+            self.handled.append((message['product_id'], message['sequence'],
+                                 threading.current_thread().name))
+
+    def test__init__(self):
+        with self.assertRaises(ValueError):
+            ThreadedDispatcher(self.loop, self.handler, workers=0)
+        with self.assertRaises(ValueError):
+            ThreadedDispatcher(self.loop, self.handler, queue_size=0)
+        with self.assertRaises(ValueError):
+            ThreadedDispatcher(self.loop, self.handler, overflow='wait')
+
+    async def test_order(self):
+        dispatcher = ThreadedDispatcher(self.loop, self.handler, workers=3,
+                                        queue_size=5)
+        products = ['BTC-USD', 'ETH-USD', 'LTC-USD', 'BCH-USD']
+        for sequence in range(200):
+            dispatcher.submit({'product_id': products[sequence % 4],
+                               'sequence': sequence})
+        await dispatcher.stop()
+
+        self.assertEqual(len(self.handled), 200)
+        for product in products:
+            handled = [(sequence, thread) for product_id, sequence, thread
+                       in self.handled if product_id == product]
+            self.assertEqual([sequence for sequence, _ in handled],
+                             sorted(sequence for sequence, _ in handled))
+            self.assertEqual(len({thread for _, thread in handled}), 1)
+
+        snapshot = dispatcher.snapshot()
+        self.assertEqual(snapshot['submitted'], 200)
+        self.assertEqual(sum(worker['handled']
+                             for worker in snapshot['workers']), 200)
+
+    async def test_drop(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def handler(message):
+            started.set()
+            release.wait()
+            if message.get('fail'):
+                raise ValueError('failed')
+
+        dispatcher = ThreadedDispatcher(self.loop, handler, workers=1,
+                                        queue_size=1, overflow='drop')
+        dispatcher.submit({'product_id': 'BTC-USD'})
+        started.wait(1)
+        dispatcher.submit({'product_id': 'BTC-USD', 'fail': True})
+        dispatcher.submit({'product_id': 'BTC-USD'})
+        with self.assertLogs('copra.websocket.dispatch', 'ERROR'):
+            release.set()
+            await dispatcher.stop()
+
+        snapshot = dispatcher.snapshot()
+        self.assertEqual(snapshot['submitted'], 2)
+        self.assertEqual(snapshot['dropped'], 1)
+        self.assertEqual(snapshot['workers'][0]['handled'], 2)
+        self.assertEqual(snapshot['workers'][0]['errors'], 1)
+
+    async def test_block(self):
+        release = threading.Event()
+        handled = []
+        paused = []
+
+        def handler(message):
+            release.wait()
+            handled.append(message['sequence'])
+
+        dispatcher = ThreadedDispatcher(
+            self.loop, handler, workers=1, queue_size=2,
+            on_pause=lambda: paused.append(True),
+            on_resume=lambda: paused.append(False))
+        for sequence in range(10):
+            dispatcher.submit({'product_id': 'BTC-USD', 'sequence': sequence})
+
+        # The queue is full and the worker is stuck, but submit returned and
+        # the loop still runs other tasks.
+        self.assertTrue(dispatcher.paused)
+        self.assertTrue(paused[0])
+        start = self.loop.time()
+        await asyncio.sleep(0.05)
+        self.assertLess(self.loop.time() - start, 0.5)
+        self.assertGreater(dispatcher.snapshot()['workers'][0]['backlog'], 0)
+
+        release.set()
+        for _ in range(100):
+            if not dispatcher.paused:
+                break
+            await asyncio.sleep(0.01)
+        self.assertFalse(dispatcher.paused)
+        self.assertIs(paused[-1], False)
+        await dispatcher.stop()
+
+        self.assertEqual(handled, list(range(10)))
+        snapshot = dispatcher.snapshot()
+        self.assertEqual(snapshot['submitted'], 10)
+        self.assertEqual(snapshot['pauses'], 1)
+
+    async def test_stop_backlog(self):
+        release = threading.Event()
+        handled = []
+
+        def handler(message):
+            release.wait()
+            handled.append(message['sequence'])
+
+        dispatcher = ThreadedDispatcher(self.loop, handler, workers=1,
+                                        queue_size=1)
+        for sequence in range(5):
+            dispatcher.submit({'product_id': 'BTC-USD', 'sequence': sequence})
+        self.loop.call_later(0.05, release.set)
+        await dispatcher.stop()
+        self.assertEqual(handled, list(range(5)))
+
+
+class TestClientDispatch(TestCase):
+
+    async def test_enable_threaded_dispatch(self):
+        received = []
+        client = Client(self.loop, [], auto_connect=False)
+        client.on_message = lambda message: received.append(
+            (message, threading.current_thread()))
+        dispatcher = client.enable_threaded_dispatch(workers=2)
+        with self.assertRaises(ValueError):
+            client.enable_threaded_dispatch()
+
+        client.protocol = ClientProtocol()
+        client.protocol.factory = client
+        client.protocol.sendClose = MagicMock()
+        client.protocol.onMessage(json.dumps(
+            {'type': 'match', 'product_id': 'BTC-USD'}).encode('utf8'), False)
+        client.disconnected.set()
+        await client.close()
+
+        self.assertEqual(received[0][0], {'type': 'match',
+                                          'product_id': 'BTC-USD'})
+        self.assertIsNot(received[0][1], threading.current_thread())
+        self.assertEqual(dispatcher.snapshot()['submitted'], 1)
+
+    async def test_pause_reading(self):
+        client = Client(self.loop, [], auto_connect=False)
+        # Not connected yet.
+        client._pause_reading()
+
+        client.protocol = ClientProtocol()
+        client.protocol.transport = MagicMock()
+        client._pause_reading()
+        client._pause_reading()
+        client.protocol.transport.pause_reading.assert_called_once_with()
+        client._resume_reading()
+        client.protocol.transport.resume_reading.assert_called_once_with()
+
+        client = Client(self.loop, [], auto_connect=False,
+                        transport='aiohttp')
+        client.protocol = AiohttpProtocol(client)
+        client._pause_reading()
+        self.assertFalse(client.protocol.reading.is_set())
+        client._resume_reading()
+        self.assertTrue(client.protocol.reading.is_set())
+
+    async def test_trade_tape(self):
+        tape = TradeTape(self.loop, 'BTC-USD', MagicMock(), auto_connect=False)
+        on_message = tape.on_message
+        tape.on_trade = MagicMock()
+        dispatcher = tape.enable_threaded_dispatch(workers=1)
+        self.assertEqual(tape.on_trade, dispatcher.submit)
+        self.assertEqual(tape.on_message, on_message)
+        await dispatcher.stop()
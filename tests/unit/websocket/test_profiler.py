@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Unit tests for `copra.websocket.profiler` module.
+"""
+
+import asyncio
+import json
+import time
+
+from asynctest import TestCase, MagicMock
+
+from copra.websocket import Client
+from copra.websocket.client import ClientProtocol
+from copra.websocket.profiler import Profiler, call_handler
+
+
+def busy(seconds):
+    time.sleep(seconds)
+
+
+class TestProfiler(TestCase):
+
+    def setUp(self):
+        self.slow = []
+        self.lags = []
+        self.profiler = Profiler(
+            self.loop, budget=0.05, lag_threshold=0.05, lag_interval=0.02,
+            on_slow_handler=lambda *args: self.slow.append(args),
+            on_loop_lag=self.lags.append)
+
+    async def tearDown(self):
+        await self.profiler.stop()
+
+    def test__init__(self):
+        for kwargs in ({'budget': 0}, {'lag_threshold': 0},
+                       {'lag_interval': -1}):
+            with self.assertRaises(ValueError):
+                Profiler(self.loop, **kwargs)
+
+    def test_exit(self):
+        # A slow on_trade nested in on_message.
+        self.profiler.enter('on_message')
+        self.profiler.enter('on_trade')
+        self.profiler.exit('on_trade', 0.06)
+        self.profiler.exit('on_message', 0.07)
+        self.profiler.enter('on_message')
+        self.profiler.exit('on_message', 0.01)
+
+        self.assertEqual(self.slow, [('on_trade', 0.06, None),
+                                     ('on_message', 0.07, None)])
+        handlers = self.profiler.snapshot()['handlers']
+        self.assertEqual(handlers['on_message'],
+                         {'count': 2, 'total': 0.08, 'mean': 0.04,
+                          'max': 0.07, 'slow': 1})
+        self.assertEqual(handlers['on_trade']['slow'], 1)
+
+    def test_call_handler(self):
+        client = MagicMock(metrics=MagicMock(), profiler=self.profiler)
+        self.assertEqual(call_handler(client, 'on_message', lambda x: x * 2,
+                                      4), 8)
+        with self.assertRaises(ValueError):
+            call_handler(client, 'on_error', MagicMock(side_effect=ValueError))
+        self.assertEqual(self.profiler.handlers['on_error']['count'], 1)
+        self.assertEqual(client.metrics.handled.call_count, 2)
+
+    async def test_lag(self):
+        self.profiler.start()
+        await asyncio.sleep(0.05)
+        busy(0.1)
+        await asyncio.sleep(0.05)
+        self.assertGreater(max(self.lags), 0.05)
+        self.assertEqual(self.profiler.lag['slow'], len(self.lags))
+        self.assertEqual(self.profiler.lag['max'], max(self.lags))
+
+    async def test_capture_stacks(self):
+        self.profiler.capture_stacks = True
+        self.profiler.start()
+        call_handler(MagicMock(metrics=None, profiler=self.profiler),
+                     'on_message', busy, 0.15)
+        handler, seconds, stack = self.slow[0]
+        self.assertEqual(handler, 'on_message')
+        self.assertIn('in busy', stack)
+
+        # Stacks are only kept for the call they were sampled in.
+        call_handler(MagicMock(metrics=None, profiler=self.profiler),
+                     'on_message', lambda: None)
+        self.assertEqual(len(self.slow), 1)
+
+
+class TestClientProfiling(TestCase):
+
+    async def test_enable_profiling(self):
+        client = Client(self.loop, [], auto_connect=False, name='feed')
+        client.protocol = ClientProtocol()
+        client.protocol.factory = client
+        client.protocol.sendClose = MagicMock()
+        client.on_message = lambda message: busy(0.03)
+        profiler = client.enable_profiling(budget=0.02)
+        self.assertIs(client.profiler, profiler)
+
+        with self.assertLogs('copra.websocket.client', 'WARNING') as logs:
+            client.protocol.onMessage(
+                json.dumps({'type': 'match'}).encode('utf8'), False)
+        self.assertIn('feed on_message took', logs.output[0])
+        self.assertEqual(profiler.snapshot()['handlers']['on_message']['slow'],
+                         1)
+
+        client.disconnected.set()
+        await client.close()
+        self.assertIsNone(profiler._task)
@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Unit tests for `copra.websocket.tape` module.
+"""
+
+import asyncio
+
+from asynctest import TestCase, CoroutineMock, MagicMock
+
+from copra.rest import APIRequestError, Client as RestClient
+from copra.rest.ratelimit import RateLimiter
+from copra.websocket import TradeTape
+
+
+def match(trade_id, product_id='BTC-USD', type='match'):
+    return {'type': type, 'trade_id': trade_id, 'product_id': product_id,
+            'sequence': trade_id * 10, 'price': '3500.00', 'size': '0.01',
+            'side': 'buy', 'time': '2019-01-01T00:00:00.000000Z'}
+
+
+def heartbeat(last_trade_id, product_id='BTC-USD'):
+    return {'type': 'heartbeat', 'last_trade_id': last_trade_id,
+            'product_id': product_id, 'sequence': last_trade_id * 10,
+            'time': '2019-01-01T00:00:00.000000Z'}
+
+
+class TestTradeTape(TestCase):
+
+    def setUp(self):
+        self.rest = RestClient(self.loop)
+        self.rest.public_limiter = RateLimiter(self.loop, 10000, 10000)
+        self.rest.get = CoroutineMock(side_effect=self.get)
+        self.fail = False
+        self.tape = TradeTape(self.loop, ['BTC-USD', 'ETH-USD'], self.rest,
+                              auto_connect=False)
+        self.tape.protocol = MagicMock()
+        self.trades = []
+        self.tape.on_trade = self.trades.append
+
+    async def tearDown(self):
+        await self.rest.close()
+
+    async def get(self, path, params=None, auth=False, lane=None, raw=None,
+                  timeout=None):
+        if self.fail:
+            raise APIRequestError('Rate limit exceeded', None)
+        top = params['after'] - 1
+        return {}, [{'trade_id': i, 'price': '3500.00', 'size': '0.01',
+                     'side': 'sell', 'time': '2019-01-01T00:00:00.000Z'}
+                    for i in range(top, max(top - params['limit'], 0), -1)]
+
+    async def settle(self):
+        for _ in range(20):
+            await asyncio.sleep(0)
+        tasks = [tape.backfill for tape in self.tape.tapes.values()
+                 if tape.backfill]
+        if tasks:
+            await asyncio.wait(tasks)
+
+    def ids(self, product_id='BTC-USD'):
+        return [trade['trade_id'] for trade in self.trades
+                if trade['product_id'] == product_id]
+
+    def test__init__(self):
+        self.assertEqual(set(self.tape.channels), {'matches', 'heartbeat'})
+        self.assertEqual(self.tape.channels['matches'].product_ids,
+                         {'BTC-USD', 'ETH-USD'})
+        self.assertEqual(self.tape.stats['trades'], 0)
+
+    async def test_in_order(self):
+        for trade_id in (10, 11, 11, 12):
+            self.tape.on_message(match(trade_id))
+        self.tape.on_message(heartbeat(12))
+        self.tape.on_message(match(5, 'ETH-USD', 'last_match'))
+        self.tape.on_message(match(99, 'LTC-USD'))
+        await self.settle()
+
+        self.assertEqual(self.ids(), [10, 11, 12])
+        self.assertEqual(self.ids('ETH-USD'), [5])
+        self.assertEqual(self.tape.stats['duplicates'], 1)
+        self.assertEqual(self.tape.stats['gaps'], 0)
+        self.rest.get.assert_not_called()
+
+    async def test_match_gap(self):
+        self.tape.on_message(match(100))
+        self.tape.on_message(match(350))
+        # Arrive while the gap is being backfilled.
+        self.tape.on_message(match(352))
+        self.tape.on_message(match(351))
+        await self.settle()
+
+        self.assertEqual(self.ids(), list(range(100, 353)))
+        self.assertEqual(self.tape.stats['gaps'], 1)
+        self.assertEqual(self.tape.stats['backfilled'], 249)
+        self.assertEqual(self.tape.stats['trades'], 253)
+        self.assertEqual(self.trades[1]['product_id'], 'BTC-USD')
+
+    async def test_heartbeat_gap(self):
+        self.tape.on_message(match(100))
+        self.tape.on_message(heartbeat(110))
+        await self.settle()
+        self.assertEqual(self.ids(), list(range(100, 111)))
+
+        # A match the heartbeat got ahead of is a duplicate.
+        self.tape.on_message(match(110))
+        self.assertEqual(self.tape.stats['duplicates'], 1)
+
+    async def test_backfill_error(self):
+        self.tape.on_error = MagicMock()
+        self.fail = True
+        self.tape.on_message(match(100))
+        self.tape.on_message(match(105))
+        await self.settle()
+        self.assertEqual(self.ids(), [100])
+        self.assertEqual(self.tape.on_error.call_count, 1)
+        reason = self.tape.on_error.call_args[0][1]
+        self.assertEqual(reason, str(APIRequestError('Rate limit exceeded',
+                                                     None)))
+
+        self.fail = False
+        self.tape.on_message(heartbeat(105))
+        await self.settle()
+        self.assertEqual(self.ids(), list(range(100, 106)))
+
+    async def test_reconnect(self):
+        self.tape.on_open()
+        self.tape.on_message(match(100))
+        self.tape.on_message(match(1, 'ETH-USD'))
+
+        self.tape.on_close(False, 1006, 'gone')
+        self.tape.on_open()
+        self.assertEqual(self.tape.stats['reconnects'], 1)
+        self.assertEqual(self.tape.stats['recovery_time'], None)
+
+        self.tape.on_message(match(120, type='last_match'))
+        self.tape.on_message(heartbeat(1, 'ETH-USD'))
+        await self.settle()
+
+        self.assertEqual(self.ids(), list(range(100, 121)))
+        self.assertEqual(self.tape.stats['backfilled'], 19)
+        self.assertGreater(self.tape.stats['recovery_time'], 0)
+        self.assertEqual(self.tape.stats['max_recovery_time'],
+                         self.tape.stats['recovery_time'])
@@ -0,0 +1,251 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Unit tests for `copra.websocket.transport` module."""
+
+import asyncio
+import json
+from unittest import skipIf
+
+import aiohttp
+from asynctest import TestCase, CoroutineMock, MagicMock, patch
+
+from copra.websocket.transport import (AiohttpProtocol, AsyncProtocol,
+                                       BaseProtocol, TRANSPORTS,
+                                       WebsocketsProtocol)
+
+try:
+    import websockets
+except ImportError:
+    websockets = None
+
+
+class FakeWebSocket:
+    """Minimal stand-in for aiohttp.ClientWebSocketResponse."""
+
+    def __init__(self, messages, close_code=1000):
+        self.messages = messages
+        self.close_code = close_code
+        self.send_str = CoroutineMock()
+        self.close = CoroutineMock()
+
+    def exception(self):
+        return None
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self.messages:
+            raise StopAsyncIteration
+        return self.messages.pop(0)
+
+
+class TestBaseProtocol(TestCase):
+
+    def setUp(self):
+        self.protocol = BaseProtocol()
+        self.protocol.factory = MagicMock()
+
+    def test_onClose(self):
+        self.protocol.onClose(True, 200, 'OK')
+        self.protocol.factory.on_close.assert_called_with(True, 200, 'OK')
+
+    def test_onMessage(self):
+        msg_dict = {'type': 'test', 'another_key': 200}
+        self.protocol.onMessage(json.dumps(msg_dict).encode('utf8'), False)
+        self.protocol.factory.on_message.assert_called_with(msg_dict)
+
+        msg_dict = {'type': 'error', 'message': 404, 'reason': 'testing'}
+        self.protocol.onMessage(json.dumps(msg_dict).encode('utf8'), False)
+        self.protocol.factory.on_error.assert_called_with(404, 'testing')
+
+
+class TestAiohttpProtocol(TestCase):
+
+    def setUp(self):
+        self.factory = MagicMock()
+        self.factory.loop = self.loop
+        self.factory.url = 'ws://127.0.0.1:9999'
+        self.factory.compress = False
+
+    def test_transports(self):
+        self.assertIs(TRANSPORTS['aiohttp'], AiohttpProtocol)
+        self.assertIs(TRANSPORTS['websockets'], WebsocketsProtocol)
+        self.assertTrue(issubclass(AiohttpProtocol, AsyncProtocol))
+        self.assertTrue(issubclass(WebsocketsProtocol, AsyncProtocol))
+        with self.assertRaises(TypeError):
+            AsyncProtocol(self.factory)
+
+    async def test_run(self):
+        msg = {'type': 'heartbeat', 'sequence': 1}
+        ws = FakeWebSocket([aiohttp.WSMessage(aiohttp.WSMsgType.TEXT,
+                                              json.dumps(msg), None)])
+        self.factory.session = MagicMock()
+        self.factory.session.ws_connect = CoroutineMock(return_value=ws)
+
+        protocol = AiohttpProtocol(self.factory)
+        await protocol.run()
+
+        self.factory.session.ws_connect.assert_called_with(
+            self.factory.url, compress=0, max_msg_size=0)
+        self.factory.on_open.assert_called_with()
+        self.factory.on_message.assert_called_with(msg)
+        self.factory.on_close.assert_called_with(True, 1000, None)
+        # A session that was passed in is never closed by the protocol.
+        self.factory.session.close.assert_not_called()
+
+    async def test_run_handler_error(self):
+        # An exception from a callback drops the connection, like autobahn,
+        # so that the client sees it close and can reconnect.
+        ws = FakeWebSocket([aiohttp.WSMessage(aiohttp.WSMsgType.TEXT,
+                                              '{"type": "match"}', None)])
+        self.factory.session = MagicMock()
+        self.factory.session.ws_connect = CoroutineMock(return_value=ws)
+        self.factory.on_message.side_effect = KeyError('price')
+
+        with self.assertLogs('copra.websocket.transport', 'ERROR'):
+            await AiohttpProtocol(self.factory).run()
+        ws.close.assert_called_with()
+        self.factory.on_close.assert_called_with(False, None, "'price'")
+
+    async def test_run_compress(self):
+        self.factory.session = MagicMock()
+        self.factory.session.ws_connect = CoroutineMock(
+            return_value=FakeWebSocket([]))
+        self.factory.compress = True
+        self.factory.compress_window_bits = 10
+
+        await AiohttpProtocol(self.factory).run()
+        self.factory.session.ws_connect.assert_called_with(
+            self.factory.url, compress=10, max_msg_size=0)
+
+    async def test_run_connect_error(self):
+        self.factory.session = MagicMock()
+        self.factory.session.ws_connect = CoroutineMock(
+            side_effect=aiohttp.ClientError('no route'))
+
+        with self.assertRaises(aiohttp.ClientError):
+            await AiohttpProtocol(self.factory).run()
+        self.factory.on_open.assert_not_called()
+        self.factory.on_close.assert_not_called()
+
+    async def test_sendMessage(self):
+        ws = FakeWebSocket([])
+        protocol = AiohttpProtocol(self.factory)
+        protocol.ws = ws
+
+        await protocol.sendMessage(b'{"type": "subscribe"}')
+        ws.send_str.assert_called_with('{"type": "subscribe"}')
+
+    async def test_sendClose(self):
+        ws = FakeWebSocket([])
+        protocol = AiohttpProtocol(self.factory)
+
+        # Not yet connected, the connection attempt is cancelled.
+        protocol.task = MagicMock()
+        protocol.sendClose()
+        protocol.task.cancel.assert_called_with()
+
+        protocol.ws = ws
+        protocol.sendClose()
+        await asyncio.sleep(0)
+        ws.close.assert_called_with()
+
+
+class FakeWebsocketsConnection:
+    """Minimal stand-in for websockets.WebSocketClientProtocol."""
+
+    def __init__(self, messages, close_code=1000, close_reason=''):
+        self.messages = messages
+        self.close_code = close_code
+        self.close_reason = close_reason
+        self.send = CoroutineMock()
+        self.close = CoroutineMock()
+
+    async def recv(self):
+        if not self.messages:
+            raise websockets.ConnectionClosed(self.close_code,
+                                              self.close_reason)
+        return self.messages.pop(0)
+
+
+@skipIf(websockets is None, 'requires websockets')
+class TestWebsocketsProtocol(TestCase):
+
+    def setUp(self):
+        self.factory = MagicMock()
+        self.factory.loop = self.loop
+        self.factory.url = 'ws://127.0.0.1:9999'
+        self.factory.compress = False
+
+    async def test_run(self):
+        msg = {'type': 'heartbeat', 'sequence': 1, 'note': '\u20ac'}
+        data = json.dumps(msg, ensure_ascii=False)
+        ws = FakeWebsocketsConnection([data])
+
+        with patch('websockets.connect',
+                   new=CoroutineMock(return_value=ws)) as connect:
+            await WebsocketsProtocol(self.factory).run()
+
+        connect.assert_called_with(self.factory.url, compression=None,
+                                   max_size=None)
+        self.factory.on_open.assert_called_with()
+        self.factory.on_message.assert_called_with(msg)
+        self.factory.on_close.assert_called_with(True, 1000, '')
+        # Sizes are counted in bytes, not characters.
+        self.factory.metrics.message.assert_called_with(
+            msg, len(data) + 2)
+
+    async def test_run_handler_error(self):
+        ws = FakeWebsocketsConnection(['not json'])
+
+        with patch('websockets.connect',
+                   new=CoroutineMock(return_value=ws)):
+            with self.assertLogs('copra.websocket.transport', 'ERROR'):
+                await WebsocketsProtocol(self.factory).run()
+        ws.close.assert_called_with()
+        self.factory.on_open.assert_called_with()
+        self.factory.on_close.assert_called_once()
+        self.assertFalse(self.factory.on_close.call_args[0][0])
+
+    async def test_run_compress(self):
+        self.factory.compress = True
+        ws = FakeWebsocketsConnection([], 1006, 'gone')
+
+        with patch('websockets.connect',
+                   new=CoroutineMock(return_value=ws)) as connect:
+            await WebsocketsProtocol(self.factory).run()
+
+        connect.assert_called_with(self.factory.url, compression='deflate',
+                                   max_size=None)
+        self.factory.on_close.assert_called_with(False, 1006, 'gone')
+
+    async def test_run_connect_error(self):
+        with patch('websockets.connect',
+                   new=CoroutineMock(side_effect=OSError('no route'))):
+            with self.assertRaises(OSError):
+                await WebsocketsProtocol(self.factory).run()
+        self.factory.on_open.assert_not_called()
+        self.factory.on_close.assert_not_called()
+
+    async def test_sendMessage(self):
+        ws = FakeWebsocketsConnection([])
+        protocol = WebsocketsProtocol(self.factory)
+        protocol.ws = ws
+
+        await protocol.sendMessage(b'{"type": "subscribe"}')
+        ws.send.assert_called_with('{"type": "subscribe"}')
+
+    async def test_sendClose(self):
+        ws = FakeWebsocketsConnection([])
+        protocol = WebsocketsProtocol(self.factory)
+
+        # Not yet connected, the connection attempt is cancelled.
+        protocol.task = MagicMock()
+        protocol.sendClose()
+        protocol.task.cancel.assert_called_with()
+
+        protocol.ws = ws
+        protocol.sendClose()
+        await asyncio.sleep(0)
+        ws.close.assert_called_with()